@@ -1,4 +1,14 @@
-from .buffer import AudioBuffer
+from .buffer import AudioBuffer, decode_audio, decode_pcm16, window_overlap_factor
+from .codecs import AUDIO_ENCODINGS, encode_ima_adpcm, encode_mulaw, float_to_pcm16, to_pcm16
+from .endpoint import UtteranceEndpointer
+from .features import ChunkFeatures, FeatureExtractor
 from .processor import AudioProcessor
+from .resample import StreamingResampler
+from .vad import VoiceActivityDetector
 
-__all__ = ["AudioBuffer", "AudioProcessor"]
+__all__ = [
+    "AUDIO_ENCODINGS", "AudioBuffer", "AudioProcessor", "ChunkFeatures", "FeatureExtractor",
+    "StreamingResampler", "UtteranceEndpointer", "VoiceActivityDetector", "decode_audio",
+    "decode_pcm16", "encode_ima_adpcm", "encode_mulaw", "float_to_pcm16", "to_pcm16",
+    "window_overlap_factor"
+]
@@ -1,24 +1,147 @@
 import numpy as np
-from collections import deque
-from typing import Optional
+from typing import Callable, Optional
 import config
+from .codecs import AUDIO_ENCODINGS, MULAW_TO_FLOAT32, decode_ima_adpcm
+
+# Scale factor from 16-bit PCM to float32 in [-1, 1]
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+def decode_pcm16(audio_data: bytes) -> np.ndarray:
+    """Decode 16-bit PCM into a new read-only float32 array in [-1, 1]."""
+    pcm = np.frombuffer(audio_data, dtype=np.int16)
+    samples = np.multiply(pcm, PCM16_SCALE, dtype=np.float32)
+    samples.flags.writeable = False
+    return samples
+
+
+def _scale_pcm16(dst: np.ndarray, src: np.ndarray) -> None:
+    """16-bit sample values (any integer dtype) to float32 in [-1, 1]."""
+    np.multiply(src, PCM16_SCALE, out=dst, casting="unsafe")
+
+
+def _expand_mulaw(dst: np.ndarray, src: np.ndarray) -> None:
+    """µ-law codes straight to float32 by table lookup."""
+    np.take(MULAW_TO_FLOAT32, src, out=dst)
+
+
+def _copy(dst: np.ndarray, src: np.ndarray) -> None:
+    dst[:] = src
+
+
+def _frame_source(audio_data: bytes, encoding: str):
+    """The frame's undecoded samples and the function that writes them as float32."""
+    if encoding == "pcm16":
+        return np.frombuffer(audio_data, dtype=np.int16), _scale_pcm16
+    if encoding == "mulaw":
+        return np.frombuffer(audio_data, dtype=np.uint8), _expand_mulaw
+    if encoding == "ima_adpcm":
+        return decode_ima_adpcm(audio_data), _copy
+    raise ValueError(f"Unknown audio encoding '{encoding}', expected one of {AUDIO_ENCODINGS}")
+
+
+def decode_audio(audio_data: bytes, encoding: str = "pcm16") -> np.ndarray:
+    """Decode a frame in any supported encoding into a new read-only float32 array in [-1, 1]."""
+    src, convert = _frame_source(audio_data, encoding)
+    samples = np.empty(len(src), dtype=np.float32)
+    convert(samples, src)
+    samples.flags.writeable = False
+    return samples
+
+
+def window_overlap_factor(window_seconds: float, hop_seconds: float) -> float:
+    """
+    Compute cost of overlapping analysis relative to back-to-back blocks.
+    Each sample is analysed window/hop times (1.0 when hop == window).
+    """
+    return window_seconds / hop_seconds
 
 
 class AudioBuffer:
-    """Manages incoming audio chunks and assembles them for processing."""
+    """
+    Fixed-capacity circular buffer of float32 samples.
+
+    Storage is preallocated once, so appending a chunk is a single copy into
+    the ring and reads return views into it (at most one copy when the
+    requested span wraps around the end of the ring).
+
+    Arrays returned by get_audio/consume are read-only and only valid until
+    the ring wraps over them again, i.e. for roughly `max_duration_seconds`
+    of further audio. Copy them if they must outlive that.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = config.SAMPLE_RATE,
+        max_duration_seconds: float = config.AUDIO_BUFFER_SECONDS,
+        overflow: str = config.AUDIO_BUFFER_OVERFLOW
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
 
-    def __init__(self, sample_rate: int = config.SAMPLE_RATE):
         self.sample_rate = sample_rate
-        self.buffer = deque()
+        self.capacity = max(1, int(max_duration_seconds * sample_rate))
+        self.overflow = overflow
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._start = 0
         self.total_samples = 0
+        # Stream position of the oldest buffered sample
+        self._position = 0
+        # Samples lost to the overflow policy since creation/clear
+        self.dropped_samples = 0
+
+    def add_chunk(self, audio_data: bytes, encoding: str = "pcm16") -> None:
+        """Add a chunk of audio data (16-bit PCM, µ-law or IMA-ADPCM) to the buffer."""
+        # Decoded straight into the ring, no intermediate float array
+        self._write(*_frame_source(audio_data, encoding))
+
+    def add_samples(self, samples: np.ndarray) -> None:
+        """Add already-decoded float32 samples in [-1, 1] to the buffer."""
+        self._write(samples, _copy)
+
+    def _write(self, src: np.ndarray, convert: Callable[[np.ndarray, np.ndarray], None]) -> None:
+        """Copy samples into the ring, applying the overflow policy."""
+        n = len(src)
+        if n == 0:
+            return
 
-    def add_chunk(self, audio_data: bytes) -> None:
-        """Add a chunk of audio data (16-bit PCM) to the buffer."""
-        audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
-        # Normalize to [-1, 1]
-        audio_array = audio_array / 32768.0
-        self.buffer.append(audio_array)
-        self.total_samples += len(audio_array)
+        free = self.capacity - self.total_samples
+        if n > free:
+            if self.overflow == "drop_newest":
+                self.dropped_samples += n - free
+                src = src[:free]
+                n = free
+                if n == 0:
+                    return
+            else:
+                if n > self.capacity:
+                    self.dropped_samples += n - self.capacity
+                    src = src[-self.capacity:]
+                    n = self.capacity
+                # Advance the head past the oldest samples to make room
+                drop = min(n - free, self.total_samples)
+                self._advance(drop)
+                self.dropped_samples += drop
+
+        tail = (self._start + self.total_samples) % self.capacity
+        first = min(n, self.capacity - tail)
+        convert(self._data[tail:tail + first], src[:first])
+        if first < n:
+            convert(self._data[:n - first], src[first:])
+        self.total_samples += n
+
+    def _read(self, num_samples: int) -> np.ndarray:
+        """Return the oldest num_samples as a read-only array."""
+        end = self._start + num_samples
+        if end <= self.capacity:
+            audio = self._data[self._start:end]
+        else:
+            # Wrapped: one copy to make it contiguous
+            audio = np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+        audio.flags.writeable = False
+        return audio
 
     def get_audio(self, duration_seconds: float) -> Optional[np.ndarray]:
         """
@@ -30,11 +153,7 @@ class AudioBuffer:
         if self.total_samples < required_samples:
             return None
 
-        # Concatenate chunks
-        all_audio = np.concatenate(list(self.buffer))
-
-        # Return requested duration
-        return all_audio[:required_samples]
+        return self._read(required_samples)
 
     def consume(self, duration_seconds: float) -> Optional[np.ndarray]:
         """
@@ -45,27 +164,68 @@ class AudioBuffer:
         if audio is None:
             return None
 
-        samples_to_remove = len(audio)
+        self._advance(len(audio))
+        return audio
 
-        # Remove consumed samples from buffer
-        while samples_to_remove > 0 and self.buffer:
-            chunk = self.buffer[0]
-            if len(chunk) <= samples_to_remove:
-                self.buffer.popleft()
-                samples_to_remove -= len(chunk)
-                self.total_samples -= len(chunk)
-            else:
-                # Partial consumption
-                self.buffer[0] = chunk[samples_to_remove:]
-                self.total_samples -= samples_to_remove
-                samples_to_remove = 0
+    def consume_window(self, window_seconds: float, hop_seconds: float) -> Optional[np.ndarray]:
+        """
+        Get a window of audio but only remove the first hop of it, so that
+        consecutive windows overlap by (window - hop).
+        Returns None if not enough audio available.
+        """
+        audio = self.get_audio(window_seconds)
+        if audio is None:
+            return None
+
+        self._advance(min(int(hop_seconds * self.sample_rate), len(audio)))
+        return audio
 
+    def read_range(self, start: int, end: int) -> Optional[np.ndarray]:
+        """
+        Read-only audio between two stream positions (in samples), without
+        removing it. Returns None unless the whole span is still buffered.
+        """
+        if start < self._position or end > self.end_position() or end < start:
+            return None
+        offset = start - self._position
+        num_samples = end - start
+        begin = (self._start + offset) % self.capacity
+        stop = begin + num_samples
+        if stop <= self.capacity:
+            audio = self._data[begin:stop]
+        else:
+            audio = np.concatenate((self._data[begin:], self._data[:stop - self.capacity]))
+        audio.flags.writeable = False
         return audio
 
+    def discard_until(self, position: int) -> None:
+        """Drop buffered samples older than a stream position."""
+        self._advance(max(0, min(position, self.end_position()) - self._position))
+
+    def _advance(self, num_samples: int) -> None:
+        """Drop the oldest num_samples from the buffer."""
+        self._start = (self._start + num_samples) % self.capacity
+        self.total_samples -= num_samples
+        self._position += num_samples
+
     def clear(self) -> None:
         """Clear the buffer."""
-        self.buffer.clear()
+        self._start = 0
         self.total_samples = 0
+        self._position = 0
+        self.dropped_samples = 0
+
+    def position(self) -> int:
+        """Stream position (samples since the stream started) of the oldest buffered sample."""
+        return self._position
+
+    def end_position(self) -> int:
+        """Stream position just past the newest buffered sample."""
+        return self._position + self.total_samples
+
+    def position_seconds(self) -> float:
+        """Audio time (seconds since the stream started) of the oldest buffered sample."""
+        return self._position / self.sample_rate
 
     def duration_seconds(self) -> float:
         """Get current buffer duration in seconds."""
@@ -0,0 +1,216 @@
+import struct
+import numpy as np
+import config
+
+# Encodings a client can stream in (chosen with "encoding" in start_listening)
+AUDIO_ENCODINGS = ("pcm16", "mulaw", "ima_adpcm")
+
+# ---------------------------------------------------------------------------
+# G.711 µ-law: one byte per sample (128 kbit/s at 16 kHz)
+# ---------------------------------------------------------------------------
+
+_MULAW_BIAS = 0x84
+# The encoder works on 14-bit magnitudes, as in the CCITT reference
+_MULAW_CLIP_14 = 8159
+_MULAW_BIAS_14 = 0x21
+
+
+def _build_mulaw_table() -> np.ndarray:
+    """16-bit value of each of the 256 µ-law codes."""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + _MULAW_BIAS) << exponent) - _MULAW_BIAS
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+# Scale factor from 16-bit sample values to float32 in [-1, 1]
+_PCM16_TO_FLOAT32 = np.float32(1.0 / 32768.0)
+
+MULAW_TO_PCM16 = _build_mulaw_table()
+# Decoding is a single table lookup straight to float32 in [-1, 1]
+MULAW_TO_FLOAT32 = (MULAW_TO_PCM16 * _PCM16_TO_FLOAT32).astype(np.float32)
+# Segment of a biased 14-bit magnitude, indexed by magnitude >> 5
+_MULAW_SEGMENT = np.concatenate(([0], np.floor(np.log2(np.arange(1, 256))))).astype(np.int32)
+
+
+def encode_mulaw(pcm: np.ndarray) -> bytes:
+    """Encode 16-bit PCM samples as G.711 µ-law (bit-exact with the CCITT reference encoder)."""
+    samples = np.asarray(pcm, dtype=np.int32) >> 2
+    negative = samples < 0
+    magnitude = np.minimum(np.abs(samples), _MULAW_CLIP_14) + _MULAW_BIAS_14
+    # The top of the range saturates to the last code of the last segment
+    np.minimum(magnitude, 0x1FFF, out=magnitude)
+    segment = _MULAW_SEGMENT[magnitude >> 5]
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    return (code ^ np.where(negative, 0x7F, 0xFF)).astype(np.uint8).tobytes()
+
+
+# ---------------------------------------------------------------------------
+# IMA-ADPCM: four bits per sample, in independently decodable blocks
+#
+# Each block is a 4-byte header (int16 LE predictor, uint8 step index,
+# uint8 reserved) holding the encoder state at the start of the block,
+# followed by ADPCM_BLOCK_SAMPLES 4-bit codes, low nibble first. Codes
+# follow the IMA/DVI reference algorithm. Unlike WAV IMA blocks the header
+# sample is state only and is not output. With 64-sample blocks this is
+# 36 bytes per 4 ms (72 kbit/s). A frame is any whole number of blocks.
+# No bundled client sends this yet; encode_ima_adpcm below is the reference
+# a client encoder has to match.
+# ---------------------------------------------------------------------------
+
+IMA_STEP_TABLE = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767
+], dtype=np.int32)
+IMA_INDEX_TABLE = np.array([-1, -1, -1, -1, 2, 4, 6, 8] * 2, dtype=np.int32)
+_IMA_MAX_INDEX = len(IMA_STEP_TABLE) - 1
+_IMA_HEADER = struct.Struct("<hBB")
+
+
+def ima_adpcm_block_bytes(block_samples: int = config.ADPCM_BLOCK_SAMPLES) -> int:
+    """Encoded size of one block."""
+    return _IMA_HEADER.size + block_samples // 2
+
+
+def _ima_decode_block_exact(predictor: int, index: int, codes: np.ndarray) -> np.ndarray:
+    """Reference (sample-by-sample) decoder for one block."""
+    out = np.empty(len(codes), dtype=np.int32)
+    for i, code in enumerate(codes.tolist()):
+        step = int(IMA_STEP_TABLE[index])
+        diff = step >> 3
+        if code & 4:
+            diff += step
+        if code & 2:
+            diff += step >> 1
+        if code & 1:
+            diff += step >> 2
+        predictor = predictor - diff if code & 8 else predictor + diff
+        predictor = min(32767, max(-32768, predictor))
+        index = min(_IMA_MAX_INDEX, max(0, index + int(IMA_INDEX_TABLE[code])))
+        out[i] = predictor
+    return out
+
+
+def decode_ima_adpcm(data: bytes, block_samples: int = config.ADPCM_BLOCK_SAMPLES) -> np.ndarray:
+    """
+    Decode IMA-ADPCM blocks to float32 samples in [-1, 1].
+
+    Blocks are decoded side by side: the step index is advanced one code
+    position at a time across all blocks of the frame, then every sample
+    difference is computed at once and integrated with a cumulative sum,
+    which is scaled straight into the float32 output. Blocks whose running
+    sum leaves the 16-bit range (where the reference decoder clamps at
+    every step) are redone sample by sample.
+    """
+    block_bytes = ima_adpcm_block_bytes(block_samples)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) % block_bytes:
+        raise ValueError(f"IMA-ADPCM frame of {len(raw)} bytes is not a whole number of {block_bytes}-byte blocks")
+    blocks = raw.reshape(-1, block_bytes)
+    num_blocks = len(blocks)
+    if num_blocks == 0:
+        return np.empty(0, dtype=np.float32)
+
+    predictors = (blocks[:, 0].astype(np.int32) | (blocks[:, 1].astype(np.int32) << 8)).astype(np.int16).astype(np.int32)
+    index = np.minimum(blocks[:, 2].astype(np.int32), _IMA_MAX_INDEX)
+
+    # Codes laid out code position x block, so each step below reads a contiguous row
+    packed = blocks[:, _IMA_HEADER.size:].T
+    codes = np.empty((block_samples, num_blocks), dtype=np.uint8)
+    np.bitwise_and(packed, 0x0F, out=codes[0::2])
+    np.right_shift(packed, 4, out=codes[1::2])
+
+    # The step index only depends on the codes: advance it across all blocks at once
+    index_deltas = IMA_INDEX_TABLE[codes]
+    indices = np.empty((block_samples, num_blocks), dtype=np.int32)
+    for position in range(block_samples):
+        indices[position] = index
+        index += index_deltas[position]
+        np.clip(index, 0, _IMA_MAX_INDEX, out=index)
+
+    steps = IMA_STEP_TABLE[indices]
+    diffs = steps >> 3
+    diffs += np.where(codes & 4, steps, 0)
+    diffs += np.where(codes & 2, steps >> 1, 0)
+    diffs += np.where(codes & 1, steps >> 2, 0)
+    np.negative(diffs, out=diffs, where=(codes & 8).astype(bool))
+
+    samples = np.cumsum(diffs, axis=0, out=diffs)
+    samples += predictors
+
+    # Block-major float32 output, scaled in the same pass that transposes
+    out = np.empty((num_blocks, block_samples), dtype=np.float32)
+    np.multiply(samples.T, _PCM16_TO_FLOAT32, out=out, casting="unsafe")
+
+    # Only blocks that would have been clamped differ from the plain cumulative sum
+    saturated = (samples.max(axis=0) > 32767) | (samples.min(axis=0) < -32768)
+    for block in np.flatnonzero(saturated):
+        start_index = min(int(blocks[block, 2]), _IMA_MAX_INDEX)
+        exact = _ima_decode_block_exact(int(predictors[block]), start_index, codes[:, block])
+        np.multiply(exact, _PCM16_TO_FLOAT32, out=out[block], casting="unsafe")
+    return out.reshape(-1)
+
+
+def encode_ima_adpcm(pcm: np.ndarray, block_samples: int = config.ADPCM_BLOCK_SAMPLES) -> bytes:
+    """
+    Encode 16-bit PCM as IMA-ADPCM blocks (the last block is zero-padded).
+    Reference encoder, sample by sample; meant for clients, tests and benchmarks.
+    """
+    samples = np.asarray(pcm, dtype=np.int32)
+    padding = -len(samples) % block_samples
+    if padding:
+        samples = np.concatenate((samples, np.zeros(padding, dtype=np.int32)))
+
+    out = bytearray()
+    predictor = 0
+    index = 0
+    for block in samples.reshape(-1, block_samples).tolist():
+        out += _IMA_HEADER.pack(predictor, index, 0)
+        codes = []
+        for sample in block:
+            step = int(IMA_STEP_TABLE[index])
+            diff = sample - predictor
+            code = 0
+            if diff < 0:
+                code = 8
+                diff = -diff
+            delta = step >> 3
+            if diff >= step:
+                code |= 4
+                diff -= step
+                delta += step
+            if diff >= step >> 1:
+                code |= 2
+                diff -= step >> 1
+                delta += step >> 1
+            if diff >= step >> 2:
+                code |= 1
+                delta += step >> 2
+            predictor = predictor - delta if code & 8 else predictor + delta
+            predictor = min(32767, max(-32768, predictor))
+            index = min(_IMA_MAX_INDEX, max(0, index + int(IMA_INDEX_TABLE[code])))
+            codes.append(code)
+        out += bytes(low | (high << 4) for low, high in zip(codes[0::2], codes[1::2]))
+    return bytes(out)
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """Float32 samples in [-1, 1] as 16-bit PCM bytes."""
+    return np.clip(samples * 32768.0, -32768, 32767).astype(np.int16).tobytes()
+
+
+def to_pcm16(audio_data: bytes, encoding: str) -> bytes:
+    """Transcode a frame to 16-bit PCM (for consumers that store PCM, like shared-memory rings)."""
+    if encoding == "pcm16":
+        return audio_data
+    if encoding == "mulaw":
+        return MULAW_TO_PCM16[np.frombuffer(audio_data, dtype=np.uint8)].tobytes()
+    if encoding == "ima_adpcm":
+        return float_to_pcm16(decode_ima_adpcm(audio_data))
+    raise ValueError(f"Unknown audio encoding '{encoding}', expected one of {AUDIO_ENCODINGS}")
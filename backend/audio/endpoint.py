@@ -0,0 +1,64 @@
+from typing import List, Optional, Tuple
+import config
+from .buffer import AudioBuffer
+from .vad import VoiceActivityDetector
+
+
+class UtteranceEndpointer:
+    """
+    Finds utterance boundaries in a connection's live buffer.
+
+    Each call classifies the newly buffered frames with a voice-activity
+    detector (hangover ENDPOINT_SILENCE_MS) and returns the spans of
+    utterances that just ended, so they can be processed without waiting for
+    a fixed-size window to fill. Speech running longer than
+    ENDPOINT_MAX_SEGMENT_SECONDS is cut into consecutive segments.
+    Spans are (start, end) stream positions in samples.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = config.SAMPLE_RATE,
+        max_segment_seconds: float = config.ENDPOINT_MAX_SEGMENT_SECONDS,
+        preroll_ms: float = config.ENDPOINT_PREROLL_MS
+    ):
+        self.vad = VoiceActivityDetector(sample_rate, hangover_ms=config.ENDPOINT_SILENCE_MS)
+        self.max_segment = max(1, int(max_segment_seconds * sample_rate))
+        # The VAD opens a segment a few frames after speech starts; reach back over them too
+        self.lookback = int(preroll_ms * sample_rate / 1000) + self.vad.onset_frames * self.vad.frame_length
+        # Stream position where the current utterance began, None between utterances
+        self.onset: Optional[int] = None
+
+    def reset_timeline(self) -> None:
+        """The live buffer restarted at position 0; the noise floor is kept."""
+        self.vad.reset_timeline()
+        self.onset = None
+
+    def update(self, buffer: AudioBuffer) -> List[Tuple[int, int]]:
+        """Classify audio added since the last call; return spans of utterances that ended."""
+        start = max(self.vad.next_sample, buffer.position())
+        audio = buffer.read_range(start, buffer.end_position())
+        if audio is None or len(audio) == 0:
+            return []
+
+        frame_length = self.vad.frame_length
+        segments = []
+        for frame_start, speech in self.vad.classify(audio, start):
+            frame_end = frame_start + frame_length
+            if speech:
+                if self.onset is None:
+                    self.onset = max(buffer.position(), frame_start - self.lookback)
+                if frame_end - self.onset >= self.max_segment:
+                    segments.append((self.onset, frame_end))
+                    self.onset = frame_end
+            elif self.onset is not None:
+                # The VAD's hangover ran out: the utterance is over
+                segments.append((self.onset, frame_end))
+                self.onset = None
+        return segments
+
+    def keep_from(self) -> int:
+        """Oldest stream position still needed: the open utterance, or the lookback before new audio."""
+        if self.onset is not None:
+            return self.onset
+        return max(0, self.vad.next_sample - self.lookback)
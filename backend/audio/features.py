@@ -0,0 +1,127 @@
+import math
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import config
+
+# Full-scale value when converting float32 [-1, 1] to 16-bit PCM
+PCM16_MAX = np.float32(32767)
+
+# RMS breakpoints for the 0.0-1.0 volume scale.
+# Soft speech: 0.005-0.02, Normal: 0.02-0.06, Loud: 0.06+
+VOLUME_MIN_RMS = 0.005   # Below this is silence
+VOLUME_LOW_RMS = 0.02    # Soft speech
+VOLUME_MID_RMS = 0.06    # Normal speech
+VOLUME_HIGH_RMS = 0.10   # Loud speech
+
+
+def volume_from_rms(rms: float) -> float:
+    """Map RMS energy to a normalized volume level (0.0 to 1.0)."""
+    if rms < VOLUME_MIN_RMS:
+        volume = 0.0
+    elif rms < VOLUME_LOW_RMS:
+        # 0.005-0.02 -> 0.0-0.33
+        volume = (rms - VOLUME_MIN_RMS) / (VOLUME_LOW_RMS - VOLUME_MIN_RMS) * 0.33
+    elif rms < VOLUME_MID_RMS:
+        # 0.02-0.06 -> 0.33-0.66
+        volume = 0.33 + (rms - VOLUME_LOW_RMS) / (VOLUME_MID_RMS - VOLUME_LOW_RMS) * 0.33
+    elif rms < VOLUME_HIGH_RMS:
+        # 0.06-0.10 -> 0.66-1.0
+        volume = 0.66 + (rms - VOLUME_MID_RMS) / (VOLUME_HIGH_RMS - VOLUME_MID_RMS) * 0.34
+    else:
+        volume = 1.0
+    return float(min(1.0, max(0.0, volume)))
+
+
+@dataclass
+class ChunkFeatures:
+    """
+    Statistics and model-ready formats for one analysis chunk.
+
+    `normalized` (peak-normalized float32, for speaker embedding) and `pcm16`
+    (int16 PCM, for Vosk) are None for silent chunks, which are never sent to
+    the models. Both are views into the extractor's scratch arrays and are
+    only valid until its next extract() call.
+    """
+    rms: float
+    peak: float
+    volume: float
+    is_silent: bool
+    sample_rate: int
+    normalized: Optional[np.ndarray] = None
+    pcm16: Optional[np.ndarray] = None
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.pcm16) / self.sample_rate if self.pcm16 is not None else 0.0
+
+
+class FeatureExtractor:
+    """
+    Computes everything the live pipeline needs from a chunk in one stage.
+
+    RMS, peak, volume and the silence decision are derived from a single set
+    of reductions over the chunk, and the two model inputs are written into
+    scratch arrays that are allocated once and reused for every chunk. Use one
+    extractor per connection; chunks of a connection are processed one at a time.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = config.SAMPLE_RATE,
+        silence_threshold: float = config.SILENCE_RMS_THRESHOLD,
+        capacity_seconds: float = config.ANALYSIS_WINDOW_SECONDS
+    ):
+        self.sample_rate = sample_rate
+        self.silence_threshold = silence_threshold
+        capacity = max(1, int(capacity_seconds * sample_rate))
+        self._normalized = np.empty(capacity, dtype=np.float32)
+        self._pcm16 = np.empty(capacity, dtype=np.int16)
+        # Only used for chunks that exceed full scale
+        self._clipped = np.empty(capacity, dtype=np.float32)
+
+    def _reserve(self, num_samples: int) -> None:
+        """Grow the scratch arrays if a chunk is larger than any seen before."""
+        if num_samples > len(self._normalized):
+            self._normalized = np.empty(num_samples, dtype=np.float32)
+            self._pcm16 = np.empty(num_samples, dtype=np.int16)
+            self._clipped = np.empty(num_samples, dtype=np.float32)
+
+    def extract(self, audio: np.ndarray) -> ChunkFeatures:
+        """Compute statistics for a float32 chunk and, unless it is silent, its model inputs."""
+        num_samples = len(audio)
+        if num_samples == 0:
+            return ChunkFeatures(rms=0.0, peak=0.0, volume=0.0, is_silent=True, sample_rate=self.sample_rate)
+
+        audio = np.asarray(audio, dtype=np.float32)
+        # Sum of squares via dot product: no squared temporary
+        rms = math.sqrt(float(np.dot(audio, audio)) / num_samples)
+        peak = max(float(audio.max()), -float(audio.min()))
+
+        features = ChunkFeatures(
+            rms=rms,
+            peak=peak,
+            volume=volume_from_rms(rms),
+            is_silent=rms < self.silence_threshold,
+            sample_rate=self.sample_rate
+        )
+        if features.is_silent:
+            return features
+
+        self._reserve(num_samples)
+        normalized = self._normalized[:num_samples]
+        pcm16 = self._pcm16[:num_samples]
+        if peak > 0:
+            np.multiply(audio, np.float32(1.0 / peak), out=normalized)
+        else:
+            normalized[:] = audio
+        if peak > 1.0:
+            # The unsafe cast wraps around outside [-1, 1] (e.g. resampler overshoot)
+            clipped = self._clipped[:num_samples]
+            np.clip(audio, -1.0, 1.0, out=clipped)
+            audio = clipped
+        np.multiply(audio, PCM16_MAX, out=pcm16, casting="unsafe")
+
+        features.normalized = normalized
+        features.pcm16 = pcm16
+        return features
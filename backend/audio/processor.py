@@ -1,8 +1,7 @@
 import numpy as np
-import torch
-from scipy import signal
 from typing import Tuple
 import config
+from .resample import resample
 
 
 class AudioProcessor:
@@ -16,12 +15,8 @@ class AudioProcessor:
         if original_sr == self.target_sample_rate:
             return audio
 
-        # Calculate resampling ratio
-        ratio = self.target_sample_rate / original_sr
-        new_length = int(len(audio) * ratio)
-
-        resampled = signal.resample(audio, new_length)
-        return resampled.astype(np.float32)
+        # Polyphase filter, designed once per rate pair (see audio/resample.py)
+        return resample(audio, original_sr, self.target_sample_rate)
 
     def to_mono(self, audio: np.ndarray) -> np.ndarray:
         """Convert stereo audio to mono."""
@@ -36,23 +31,24 @@ class AudioProcessor:
             return audio / max_val
         return audio
 
-    def to_torch(self, audio: np.ndarray) -> torch.Tensor:
-        """Convert numpy array to torch tensor for Pyannote."""
-        # Pyannote expects (channel, samples) format
-        tensor = torch.from_numpy(audio).float()
-        if tensor.ndim == 1:
-            tensor = tensor.unsqueeze(0)
-        return tensor
-
-    def prepare_for_pyannote(self, audio: np.ndarray) -> Tuple[torch.Tensor, int]:
+    def prepare_for_embedding(self, audio: np.ndarray) -> Tuple[np.ndarray, int]:
         """
-        Prepare audio for Pyannote processing.
-        Returns (tensor, sample_rate) tuple.
+        Prepare audio for Resemblyzer speaker embedding.
+        Returns (audio, sample_rate), where audio is one new contiguous,
+        peak-normalized float32 array of shape (samples,).
         """
         audio = self.to_mono(audio)
-        audio = self.normalize(audio)
-        tensor = self.to_torch(audio)
-        return tensor, self.target_sample_rate
+        if len(audio) == 0:
+            return np.zeros(0, dtype=np.float32), self.target_sample_rate
+
+        # Peak from two reductions instead of materializing np.abs(audio)
+        max_val = max(float(audio.max()), -float(audio.min()))
+        if max_val > 0:
+            # Scale straight into the output array, no intermediate copies
+            prepared = np.multiply(audio, np.float32(1.0 / max_val), dtype=np.float32)
+        else:
+            prepared = np.array(audio, dtype=np.float32)
+        return prepared, self.target_sample_rate
 
     def prepare_for_openai(self, audio: np.ndarray) -> bytes:
         """
@@ -0,0 +1,95 @@
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+import numpy as np
+from scipy import signal
+import config
+
+
+def resample_ratio(input_rate: int, output_rate: int) -> Tuple[int, int]:
+    """(up, down) in lowest terms."""
+    divisor = gcd(input_rate, output_rate)
+    return output_rate // divisor, input_rate // divisor
+
+
+@lru_cache(maxsize=None)
+def resample_filter(up: int, down: int) -> np.ndarray:
+    """
+    Anti-aliasing low-pass FIR for resampling by up/down, designed once per ratio.
+    The same Kaiser-windowed design scipy.signal.resample_poly uses by default.
+    """
+    max_rate = max(up, down)
+    half_length = config.RESAMPLE_FILTER_HALF_LENGTH * max_rate
+    taps = signal.firwin(2 * half_length + 1, 1.0 / max_rate, window=("kaiser", config.RESAMPLE_KAISER_BETA))
+    taps *= up
+    taps.flags.writeable = False
+    return taps
+
+
+@lru_cache(maxsize=None)
+def _stream_filter(up: int, down: int) -> np.ndarray:
+    """resample_filter as float32, so upfirdn keeps chunks in float32."""
+    taps = resample_filter(up, down).astype(np.float32)
+    taps.flags.writeable = False
+    return taps
+
+
+class StreamingResampler:
+    """
+    Polyphase resampler for one audio stream, fed chunk by chunk.
+
+    Each chunk goes through scipy.signal.upfirdn, which only evaluates the
+    filter phases that land on output samples, so no upsampled signal is ever
+    built. Enough input history carries over between chunks to fill the
+    filter and to line upfirdn's output grid up with the stream's, and the
+    output phase carries over too, so chunked output is identical to
+    resampling the whole stream at once: no edge artifacts at chunk
+    boundaries. Output lags the input by the filter's group delay (about 10
+    input samples).
+
+    This buys continuity, not speed: per frame it costs about what the FFT
+    resampler did (see benchmarks/resampling.py).
+    """
+
+    def __init__(self, input_rate: int, output_rate: int = config.SAMPLE_RATE):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.up, self.down = resample_ratio(input_rate, output_rate)
+        self._taps = _stream_filter(self.up, self.down)
+        # Input samples one output depends on, plus up to down - 1 more so
+        # upfirdn can start on a sample that puts its outputs on the stream's grid
+        self.history_length = -(-len(self._taps) // self.up) - 1 + self.down
+        # Inverse of up modulo down: which start sample gives which grid offset
+        self._up_inverse = pow(self.up, -1, self.down) if self.down > 1 else 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the stream so far (filter history and phase)."""
+        self._history = np.zeros(self.history_length, dtype=np.float32)
+        # Upsampled-timeline position of the next output, relative to the next chunk's first sample
+        self._next = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next chunk of float32 input; returns the output samples it completes."""
+        length = len(samples)
+        if length == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        up, down, history = self.up, self.down, self.history_length
+        buffer = np.concatenate((self._history, np.asarray(samples, dtype=np.float32)))
+        count = max(0, -(-(length * up - self._next) // down))
+        # upfirdn's outputs fall every `down` upsampled samples from its first
+        # input: start where that grid passes through the next output
+        start = (history + self._next * self._up_inverse) % down
+        first = (self._next + (history - start) * up) // down
+        out = signal.upfirdn(self._taps, buffer[start:], up, down)[first:first + count]
+
+        self._next = self._next + count * down - length * up
+        self._history = buffer[len(buffer) - history:]
+        return out
+
+
+def resample(audio: np.ndarray, input_rate: int, output_rate: int = config.SAMPLE_RATE) -> np.ndarray:
+    """Resample a whole signal with the cached polyphase filter, compensating its delay."""
+    up, down = resample_ratio(input_rate, output_rate)
+    return signal.resample_poly(audio, up, down, window=resample_filter(up, down) / up).astype(np.float32)
@@ -0,0 +1,153 @@
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+import numpy as np
+import config
+
+# Added to frame power before taking logs, so digital silence stays finite
+_EPS = 1e-10
+
+
+class VoiceActivityDetector:
+    """
+    Local, per-connection voice-activity detector.
+
+    Audio is split into short frames. A frame is a speech candidate when its
+    energy is VAD_ENERGY_MARGIN_DB above the connection's noise floor, most of
+    its energy lies in the speech band and its spectrum is not flat like
+    broadband noise. The noise floor follows quiet frames quickly and loud
+    non-speech frames slowly, so steady crowd or game noise is absorbed into
+    it. Hangover smoothing opens a segment after VAD_ONSET_FRAMES candidates
+    in a row and holds it for VAD_HANGOVER_MS after the last one, so word
+    gaps and soft consonants don't chop an utterance.
+
+    Windows may overlap: each frame is classified once, by stream position,
+    and later windows reuse the stored decision.
+    """
+
+    def __init__(self, sample_rate: int = config.SAMPLE_RATE, hangover_ms: float = config.VAD_HANGOVER_MS):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * config.VAD_FRAME_MS / 1000))
+        self.margin_db = config.VAD_ENERGY_MARGIN_DB
+        self.min_band_ratio = config.VAD_MIN_SPEECH_BAND_RATIO
+        self.max_flatness = config.VAD_MAX_SPECTRAL_FLATNESS
+        self.onset_frames = max(1, config.VAD_ONSET_FRAMES)
+        self.hangover_frames = max(0, int(hangover_ms / config.VAD_FRAME_MS))
+
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / sample_rate)
+        low, high = config.VAD_SPEECH_BAND_HZ
+        self._band = (freqs >= low) & (freqs <= high)
+
+        self.noise_floor_db = config.VAD_INITIAL_NOISE_FLOOR_DB
+        self._speech_run = 0
+        self._hangover = 0
+        self._active = False
+
+        # (frame start sample, is speech) for recently classified frames
+        history_frames = int(config.AUDIO_BUFFER_SECONDS * sample_rate / self.frame_length) + 1
+        self._history: Deque[Tuple[int, bool]] = deque(maxlen=history_frames)
+        self._next_sample = 0
+
+        self.windows_total = 0
+        self.windows_skipped = 0
+
+    def reset_timeline(self) -> None:
+        """Forget frame positions (the live buffer restarted); the noise floor is kept."""
+        self._history.clear()
+        self._next_sample = 0
+        self._speech_run = 0
+        self._hangover = 0
+        self._active = False
+
+    def _frame_features(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Energy (dBFS), speech-band energy ratio and spectral flatness per frame."""
+        energy_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / self.frame_length + _EPS)
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + _EPS
+        total = power.sum(axis=1)
+        band_ratio = power[:, self._band].sum(axis=1) / total
+        flatness = np.exp(np.log(power).mean(axis=1)) / (total / power.shape[1])
+        return energy_db, band_ratio, flatness
+
+    @property
+    def next_sample(self) -> int:
+        """Stream position of the first sample not yet classified."""
+        return self._next_sample
+
+    def classify(self, audio: np.ndarray, start_sample: int) -> List[Tuple[int, bool]]:
+        """
+        Classify whole frames of `audio` (starting at stream sample
+        `start_sample`) not seen before, updating noise floor and hangover.
+        Returns (frame start sample, is speech) for the newly classified frames.
+        """
+        skip = max(0, self._next_sample - start_sample)
+        new_audio = audio[skip:]
+        num_frames = len(new_audio) // self.frame_length
+        if num_frames == 0:
+            return []
+
+        frames = new_audio[:num_frames * self.frame_length].reshape(num_frames, self.frame_length)
+        energy_db, band_ratio, flatness = self._frame_features(frames)
+        spectral_ok = (band_ratio >= self.min_band_ratio) & (flatness <= self.max_flatness)
+
+        frame_start = start_sample + skip
+        decisions = []
+        for i in range(num_frames):
+            energy = float(energy_db[i])
+            candidate = bool(spectral_ok[i]) and energy >= self.noise_floor_db + self.margin_db
+
+            # Noise floor: fast down, slow up, slowest while speech is likely
+            if energy < self.noise_floor_db:
+                self.noise_floor_db += 0.3 * (energy - self.noise_floor_db)
+            elif not candidate:
+                self.noise_floor_db += 0.02 * (energy - self.noise_floor_db)
+            else:
+                self.noise_floor_db += 0.002 * (energy - self.noise_floor_db)
+
+            # Hangover smoothing
+            if candidate:
+                self._speech_run += 1
+                if self._speech_run >= self.onset_frames:
+                    self._active = True
+                    self._hangover = self.hangover_frames
+            else:
+                self._speech_run = 0
+                if self._active:
+                    if self._hangover > 0:
+                        self._hangover -= 1
+                    else:
+                        self._active = False
+
+            decisions.append((frame_start, self._active))
+            frame_start += self.frame_length
+
+        self._history.extend(decisions)
+        self._next_sample = frame_start
+        return decisions
+
+    def contains_speech(self, audio: np.ndarray, start_sample: int) -> bool:
+        """
+        Whether a window of the live stream, starting at stream sample
+        `start_sample`, contains speech. Updates the skip counters.
+        """
+        self.classify(audio, start_sample)
+        end_sample = start_sample + len(audio)
+        speech = False
+        for frame_start, active in reversed(self._history):
+            if frame_start < start_sample:
+                break
+            if active and frame_start < end_sample:
+                speech = True
+                break
+
+        self.windows_total += 1
+        if not speech:
+            self.windows_skipped += 1
+        return speech
+
+    def stats(self) -> Dict[str, float]:
+        """Window counters and the current noise floor."""
+        return {
+            "windows": self.windows_total,
+            "skipped": self.windows_skipped,
+            "noise_floor_db": round(self.noise_floor_db, 1)
+        }
@@ -0,0 +1,83 @@
+"""
+Benchmark decoding of the audio encodings clients can stream in.
+
+Encodes a few seconds of a synthetic voiced signal as 16-bit PCM, G.711
+µ-law and IMA-ADPCM, splits each into CHUNK_DURATION_MS frames and measures
+the cost of AudioBuffer.add_chunk (decode straight into the float32 ring)
+per second of audio, along with bitrate and reconstruction SNR.
+
+Run from backend/:  python benchmarks/audio_codecs.py [seconds]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from audio.buffer import AudioBuffer
+from audio.codecs import encode_ima_adpcm, encode_mulaw, ima_adpcm_block_bytes
+
+REPEATS = 20
+
+
+def voiced_signal(seconds: float) -> np.ndarray:
+    """Harmonics of a wandering 120-220 Hz pitch with a syllable envelope, plus noise."""
+    sr = config.SAMPLE_RATE
+    t = np.arange(int(seconds * sr)) / sr
+    pitch = 170 + 50 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+    rng = np.random.default_rng(0)
+    signal = voice * envelope * 6000 + rng.standard_normal(len(t)) * 200
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+def frames_for(pcm: np.ndarray, encoding: str):
+    """The frames a client would send, CHUNK_DURATION_MS each."""
+    chunk = int(config.SAMPLE_RATE * config.CHUNK_DURATION_MS / 1000)
+    if encoding == "pcm16":
+        return [pcm[i:i + chunk].tobytes() for i in range(0, len(pcm), chunk)]
+    if encoding == "mulaw":
+        data = encode_mulaw(pcm)
+        return [data[i:i + chunk] for i in range(0, len(data), chunk)]
+    # ADPCM keeps its encoder state across frames, so encode once and cut at block boundaries
+    data = encode_ima_adpcm(pcm)
+    frame_bytes = chunk // config.ADPCM_BLOCK_SAMPLES * ima_adpcm_block_bytes()
+    return [data[i:i + frame_bytes] for i in range(0, len(data), frame_bytes)]
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    pcm = voiced_signal(seconds)
+    reference = pcm.astype(np.float64)
+
+    print(f"{seconds:.0f}s of audio in {config.CHUNK_DURATION_MS}ms frames, "
+          f"ADPCM blocks of {config.ADPCM_BLOCK_SAMPLES} samples\n")
+    print(f"{'encoding':<10} {'kbit/s':>7} {'decode us per s':>16} {'SNR dB':>7}")
+    for encoding in ("pcm16", "mulaw", "ima_adpcm"):
+        frames = frames_for(pcm, encoding)
+        total_bytes = sum(len(frame) for frame in frames)
+
+        buffer = AudioBuffer(max_duration_seconds=seconds + 1)
+        for frame in frames:
+            buffer.add_chunk(frame, encoding)
+        decoded = buffer.get_audio(len(pcm) / config.SAMPLE_RATE).astype(np.float64) * 32768
+        noise = np.sum((decoded[:len(pcm)] - reference) ** 2)
+        snr = 10 * np.log10(np.sum(reference ** 2) / noise) if noise > 0 else float("inf")
+
+        t0 = time.perf_counter()
+        for _ in range(REPEATS):
+            buffer.clear()
+            for frame in frames:
+                buffer.add_chunk(frame, encoding)
+        elapsed = (time.perf_counter() - t0) / REPEATS
+
+        print(f"{encoding:<10} {total_bytes * 8 / seconds / 1000:>7.0f} "
+              f"{elapsed / seconds * 1e6:>16.1f} {snr:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Soak test for per-connection state in WebSocketHandler.
+
+Runs many scripted connections through one handler: each starts listening,
+sends a second of quiet audio, starts a dance (arming its 30s timer) and
+disconnects. After a warm-up batch, the traced heap, the connection
+registry and the event loop's pending timers should stay flat no matter how
+many more cycles run.
+
+Run from backend/:  python benchmarks/connection_soak.py [cycles]
+"""
+import asyncio
+import gc
+import json
+import os
+import sys
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from ws.handler import WebSocketHandler
+
+WARM_UP_CYCLES = 500
+# Allowed heap growth per cycle after warm-up (allocator noise, interned strings)
+MAX_GROWTH_BYTES_PER_CYCLE = 16
+
+
+class ScriptedWebSocket:
+    """Stands in for a Starlette WebSocket: replays messages, discards what is sent."""
+
+    def __init__(self, messages):
+        self._messages = list(reversed(messages))
+
+    async def accept(self) -> None:
+        pass
+
+    async def receive(self):
+        # Yield like a real socket would, so the processing task gets to run
+        await asyncio.sleep(0)
+        return self._messages.pop()
+
+    async def send_text(self, text: str) -> None:
+        pass
+
+
+def session_messages():
+    """The ASGI messages of one short session."""
+    rng = np.random.default_rng(0)
+    frame = (rng.standard_normal(config.SAMPLE_RATE // 2) * 30).astype(np.int16).tobytes()
+    return [
+        {"type": "websocket.receive", "text": json.dumps({"type": "start_listening", "game": "pong"})},
+        {"type": "websocket.receive", "bytes": frame},
+        {"type": "websocket.receive", "bytes": frame},
+        {"type": "websocket.receive", "text": json.dumps({"type": "set_mode", "mode": "game"})},
+        {"type": "websocket.receive", "text": json.dumps({"type": "start_dance"})},
+        {"type": "websocket.receive", "bytes": frame},
+        {"type": "websocket.disconnect"},
+    ]
+
+
+def pending_timers(loop: asyncio.AbstractEventLoop) -> int:
+    """Timers still scheduled on the loop (cancelled ones are removed lazily)."""
+    return sum(1 for handle in getattr(loop, "_scheduled", []) if not handle.cancelled())
+
+
+async def run_cycles(handler: WebSocketHandler, messages, cycles: int) -> None:
+    for _ in range(cycles):
+        await handler.handle_connection(ScriptedWebSocket(messages))
+    # Let cancelled processing tasks finish
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+async def main(cycles: int) -> None:
+    handler = WebSocketHandler()
+    messages = session_messages()
+    loop = asyncio.get_running_loop()
+
+    # Per-connection prints would dominate the run
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        await run_cycles(handler, messages, WARM_UP_CYCLES)
+        gc.collect()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        await run_cycles(handler, messages, cycles)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    growth = current - baseline
+    per_cycle = growth / cycles
+    print(f"Cycles:            {cycles} (after {WARM_UP_CYCLES} warm-up)")
+    print(f"Heap growth:       {growth / 1024:.1f} KiB ({per_cycle:.1f} bytes/cycle), peak {peak / 1024:.1f} KiB")
+    print(f"Open connections:  {len(handler.connections)}")
+    print(f"Pending timers:    {pending_timers(loop)}")
+
+    leaked = len(handler.connections) or pending_timers(loop) or per_cycle > MAX_GROWTH_BYTES_PER_CYCLE
+    print("LEAK" if leaked else "OK: memory flat")
+    if leaked:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
@@ -0,0 +1,89 @@
+"""
+Benchmark the speaker-ID preprocessing path, per analysis window.
+
+Compares the old Pyannote-era path (normalize, wrap in a torch tensor, convert
+back to numpy, take channel 0, astype) against
+AudioProcessor.prepare_for_embedding, which goes straight from the PCM buffer
+to the contiguous float32 array Resemblyzer receives.
+
+Run from backend/:  python benchmarks/embedding_prep.py [window_seconds]
+"""
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from audio.buffer import decode_pcm16
+from audio.processor import AudioProcessor
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+
+def legacy_prepare(audio: np.ndarray) -> np.ndarray:
+    """The former prepare_for_pyannote + extract_embedding conversion."""
+    max_val = np.max(np.abs(audio))
+    if max_val > 0:
+        audio = audio / max_val
+    if torch is not None:
+        tensor = torch.from_numpy(audio).float().unsqueeze(0)
+        audio = tensor.numpy()
+    else:
+        # Same shapes without torch: from_numpy/.numpy() share memory
+        audio = audio[np.newaxis, :]
+    audio = audio[0]
+    return audio.astype(np.float32)
+
+
+def numpy_prepare(processor: AudioProcessor, audio: np.ndarray) -> np.ndarray:
+    """The numpy-native path."""
+    prepared, _ = processor.prepare_for_embedding(audio)
+    return prepared
+
+
+def measure(fn, audio: np.ndarray, iterations: int):
+    """(peak bytes allocated, mean microseconds) per call."""
+    fn(audio)  # warm up
+
+    # numpy reports its buffers to tracemalloc, so the peak counts temporaries too
+    tracemalloc.start()
+    fn(audio)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(audio)
+    elapsed = (time.perf_counter() - t0) / iterations
+    return peak, elapsed * 1e6
+
+
+def main() -> None:
+    window = float(sys.argv[1]) if len(sys.argv) > 1 else config.ANALYSIS_WINDOW_SECONDS
+    samples = int(window * config.SAMPLE_RATE)
+    rng = np.random.default_rng(0)
+    pcm = (rng.standard_normal(samples) * 3000).clip(-32768, 32767).astype(np.int16).tobytes()
+    audio = decode_pcm16(pcm)
+    processor = AudioProcessor()
+
+    legacy = legacy_prepare(audio)
+    native = numpy_prepare(processor, audio)
+    assert np.allclose(legacy, native, atol=1e-6), "paths disagree"
+    assert native.flags.c_contiguous and native.dtype == np.float32
+
+    print(f"Window: {window:.2f}s ({samples} samples, {audio.nbytes} bytes float32)"
+          f"{'' if torch is not None else ' [torch not installed, tensor wrap simulated]'}")
+    print(f"{'path':<10} {'peak bytes':>12} {'buffers':>8} {'us/call':>10}")
+    for name, fn in (("legacy", legacy_prepare), ("numpy", lambda a: numpy_prepare(processor, a))):
+        peak, micros = measure(fn, audio, iterations=2000)
+        print(f"{name:<10} {peak:>12} {peak / audio.nbytes:>8.1f} {micros:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
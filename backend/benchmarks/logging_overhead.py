@@ -0,0 +1,72 @@
+"""
+Benchmark the caller-side cost of per-chunk logging.
+
+Compares the print() the hot path used to make for every chunk with the
+chunk logger switched off (LOG_CHUNKS=0), switched on with the per-call-site
+rate limit, and with no limit, where records go through the background
+queue. Output goes to /dev/null, so this is the cost paid on the event loop
+or inference thread, not the terminal's.
+
+Run from backend/:  python benchmarks/logging_overhead.py [iterations]
+"""
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import logs
+
+
+def per_call(fn, iterations: int) -> float:
+    """Mean nanoseconds per call of fn()."""
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1e9
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rms, volume = 0.0123, 0.42
+
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        logs.setup_logging()
+        chunk_log = logs.get_chunk_logger()
+
+        def printed():
+            print(f"[Volume] RMS: {rms:.4f} -> volume: {volume:.2f}")
+
+        def logged():
+            chunk_log.debug("[Volume] RMS: %.4f -> volume: %.2f", rms, volume)
+
+        results = [("print (before)", per_call(printed, iterations))]
+
+        chunk_log.setLevel(logging.CRITICAL + 1)
+        results.append(("chunk log off", per_call(logged, iterations)))
+
+        chunk_log.setLevel(logging.DEBUG)
+        results.append((f"chunk log on, {config.LOG_CHUNK_RATE_PER_SECOND:.0f}/s limit", per_call(logged, iterations)))
+
+        chunk_log.rate_limiter = None
+        # Keep under the queue bound so nothing is dropped
+        unlimited = min(iterations, config.LOG_QUEUE_SIZE // 2)
+        results.append(("chunk log on, unlimited", per_call(logged, unlimited)))
+        logs.stop_logging()
+        dropped = logs.logging_stats()["dropped"]
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{'per-chunk line':<30} {'ns/call':>8}")
+    for name, nanos in results:
+        print(f"{name:<30} {nanos:>8.0f}")
+    print(f"\nrecords dropped on a full queue: {dropped}")
+
+
+if __name__ == "__main__":
+    main()
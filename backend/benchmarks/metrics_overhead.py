@@ -0,0 +1,72 @@
+"""
+Benchmark the cost of hot-path instrumentation.
+
+Measures Histogram.observe() (with the perf_counter() calls around a timed
+stage) and Counter.inc() against an empty loop, and the time to render
+/api/metrics with a few inference processes' snapshots merged in. Also
+checks the bucket quantile estimate against numpy on a known distribution.
+
+Run from backend/:  python benchmarks/metrics_overhead.py [iterations]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import STAGES, Counter, Histogram, MetricsRegistry
+
+PROCESS_SNAPSHOTS = 4
+
+
+def per_call(fn, iterations: int) -> float:
+    """Mean nanoseconds per call of fn()."""
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1e9
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    histogram = Histogram()
+    counter = Counter()
+    perf_counter = time.perf_counter
+
+    def timed_stage():
+        start = perf_counter()
+        histogram.observe(perf_counter() - start)
+
+    baseline = per_call(lambda: None, iterations)
+    print(f"{iterations} calls each, net of an empty call ({baseline:.0f} ns)\n")
+    print(f"{'operation':<28} {'ns/call':>8}")
+    print(f"{'Histogram.observe':<28} {per_call(lambda: histogram.observe(0.003), iterations) - baseline:>8.0f}")
+    print(f"{'timed stage (observe + 2x clock)':<28} {per_call(timed_stage, iterations) - baseline:>8.0f}")
+    print(f"{'Counter.inc':<28} {per_call(counter.inc, iterations) - baseline:>8.0f}")
+
+    # Log-normal latencies around 40 ms, like a Vosk decode
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(np.log(0.04), 0.5, 50000)
+    registry = MetricsRegistry()
+    for stage in STAGES:
+        for value in samples[:5000]:
+            registry.stage(stage).observe(value)
+    estimate = Histogram()
+    for value in samples:
+        estimate.observe(value)
+    for q in (0.5, 0.99):
+        print(f"\np{q * 100:.0f}: bucket estimate {estimate.quantile(q) * 1000:.1f} ms, "
+              f"exact {np.quantile(samples, q) * 1000:.1f} ms", end="")
+    print()
+
+    others = [registry.snapshot() for _ in range(PROCESS_SNAPSHOTS)]
+    t0 = time.perf_counter()
+    text = registry.render(others)
+    elapsed = time.perf_counter() - t0
+    print(f"\nrender with {PROCESS_SNAPSHOTS} process snapshots: {elapsed * 1000:.2f} ms, "
+          f"{len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
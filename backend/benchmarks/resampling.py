@@ -0,0 +1,83 @@
+"""
+Benchmark resampling client audio to SAMPLE_RATE.
+
+Compares the FFT resampler AudioProcessor used before (scipy.signal.resample,
+applied to each client frame on its own) with the per-connection
+StreamingResampler, which carries filter state across frames. Reports the
+cost per second of audio and the error of the chunked output against
+resampling the whole signal at once with the same method, which shows the
+edge artifacts introduced at frame boundaries. Expect the two to cost about
+the same (polyphase a little slower at 48 and 8 kHz, faster at 22.05 kHz):
+the streaming resampler is there for continuity, not speed.
+
+Run from backend/:  python benchmarks/resampling.py [seconds]
+"""
+import os
+import sys
+import time
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from audio.resample import StreamingResampler
+
+INPUT_RATES = (48000, 44100, 22050, 8000)
+# Samples per frame the browser client sends (bufferSize in frontend/js/audio-capture.js)
+FRAME_SAMPLES = 4096
+REPEATS = 5
+
+
+def test_signal(seconds: float, sr: int) -> np.ndarray:
+    """A few tones inside the 8 kHz passband, plus a little noise."""
+    t = np.arange(int(seconds * sr)) / sr
+    rng = np.random.default_rng(0)
+    tones = sum(np.sin(2 * np.pi * f * t) / 4 for f in (220, 1250, 3100))
+    return (tones + rng.standard_normal(len(t)) * 0.01).astype(np.float32)
+
+
+def fft_chunked(chunks, sr):
+    ratio = config.SAMPLE_RATE / sr
+    return np.concatenate([signal.resample(c, int(len(c) * ratio)).astype(np.float32) for c in chunks])
+
+
+def polyphase_chunked(chunks, sr):
+    resampler = StreamingResampler(sr)
+    return np.concatenate([resampler.process(c) for c in chunks])
+
+
+def timed(fn, *args):
+    """(output, mean seconds)."""
+    out = fn(*args)
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return out, (time.perf_counter() - t0) / REPEATS
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    print(f"{seconds:.0f}s of audio in {FRAME_SAMPLES}-sample frames -> {config.SAMPLE_RATE} Hz\n")
+    print(f"{'rate':>6} {'method':<10} {'us per s':>9} {'max err vs whole':>17}")
+
+    for sr in INPUT_RATES:
+        audio = test_signal(seconds, sr)
+        chunks = [audio[i:i + FRAME_SAMPLES] for i in range(0, len(audio), FRAME_SAMPLES)]
+
+        fft_out, fft_time = timed(fft_chunked, chunks, sr)
+        fft_whole = signal.resample(audio, int(len(audio) * config.SAMPLE_RATE / sr))
+        n = min(len(fft_out), len(fft_whole))
+        fft_err = np.max(np.abs(fft_out[:n] - fft_whole[:n]))
+
+        poly_out, poly_time = timed(polyphase_chunked, chunks, sr)
+        poly_whole = StreamingResampler(sr).process(audio)
+        n = min(len(poly_out), len(poly_whole))
+        poly_err = np.max(np.abs(poly_out[:n] - poly_whole[:n]))
+
+        print(f"{sr:>6} {'fft':<10} {fft_time / seconds * 1e6:>9.0f} {fft_err:>17.2e}")
+        print(f"{sr:>6} {'polyphase':<10} {poly_time / seconds * 1e6:>9.0f} {poly_err:>17.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark result serialization: JSON text messages vs binary command batches.
+
+JSON sends one text frame per command, built with CommandResult.to_dict and
+json.dumps (the handler's _send_message path). The binary format packs every
+command from one processed window into a single frame.
+
+Run from backend/:  python benchmarks/result_protocol.py [commands_per_window]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ws.handler import CommandResult
+from ws.protocol import decode_command_batch, encode_command_batch
+
+ITERATIONS = 20000
+
+
+def make_results(count: int):
+    return [
+        CommandResult(
+            timestamp=time.time(),
+            speaker="Alice",
+            speaker_confidence=0.82,
+            command=("jab", "cross", "hook", "up")[i % 4],
+            raw_text="jab cross hook up",
+            command_confidence=0.95,
+            volume=0.6,
+            speech_duration=0.4
+        )
+        for i in range(count)
+    ]
+
+
+def json_frames(results, players):
+    """The JSON path: one text frame per command."""
+    return [
+        json.dumps({"type": "command", "player": player, **result.to_dict()}, default=str)
+        for result, player in zip(results, players)
+    ]
+
+
+def binary_frames(results, players):
+    """The binary path: one frame per window."""
+    return [encode_command_batch(results, players)]
+
+
+def measure(encode, results, players):
+    """(mean microseconds per window, frames per window, bytes per window)."""
+    frames = encode(results, players)
+    t0 = time.perf_counter()
+    for _ in range(ITERATIONS):
+        encode(results, players)
+    elapsed = time.perf_counter() - t0
+    size = sum(len(frame.encode("utf-8") if isinstance(frame, str) else frame) for frame in frames)
+    return elapsed / ITERATIONS * 1e6, len(frames), size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    results = make_results(count)
+    players = [1] * count
+
+    decoded = decode_command_batch(binary_frames(results, players)[0])
+    assert [c["command"] for c in decoded] == [r.command for r in results]
+
+    print(f"{count} command(s) per window, {ITERATIONS} windows\n")
+    print(f"{'format':<8} {'us/window':>10} {'frames':>7} {'bytes':>7}")
+    for name, encode in (("json", json_frames), ("binary", binary_frames)):
+        micros, frames, size = measure(encode, results, players)
+        print(f"{name:<8} {micros:>10.1f} {frames:>7} {size:>7}")
+
+
+if __name__ == "__main__":
+    main()
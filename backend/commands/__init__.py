@@ -1,3 +1,4 @@
-from .parser import CommandParser
+from .parser import CommandParser, VoskStream, is_silence_hallucination
+from .dedup import CommandDeduplicator, command_span
 
-__all__ = ["CommandParser"]
+__all__ = ["CommandParser", "VoskStream", "CommandDeduplicator", "command_span", "is_silence_hallucination"]
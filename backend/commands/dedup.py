@@ -0,0 +1,57 @@
+from typing import List, Optional, Tuple
+import config
+
+
+class CommandDeduplicator:
+    """
+    Drops repeat detections of one utterance seen by overlapping analysis windows.
+
+    Detections are keyed on audio time (seconds since the stream started), so a
+    "jab" spoken once but heard by two windows is only reported once, while two
+    separate "jab"s are both kept.
+    """
+
+    def __init__(self, tolerance_seconds: float = config.COMMAND_DEDUP_TOLERANCE_SECONDS):
+        self.tolerance_seconds = tolerance_seconds
+        # (command, start, end) of recently emitted commands, in audio time
+        self._recent: List[Tuple[str, float, float]] = []
+        self.duplicates_dropped = 0
+
+    def is_duplicate(self, command: str, start: float, end: float) -> bool:
+        """
+        Check a detection spanning [start, end] against recent ones.
+        Records it when it is new.
+        """
+        for seen_command, seen_start, seen_end in self._recent:
+            if (seen_command == command
+                    and start <= seen_end + self.tolerance_seconds
+                    and end >= seen_start - self.tolerance_seconds):
+                self.duplicates_dropped += 1
+                return True
+
+        self._recent.append((command, start, end))
+        return False
+
+    def prune(self, before: float) -> None:
+        """Forget detections that ended before the given audio time."""
+        horizon = before - self.tolerance_seconds
+        self._recent = [entry for entry in self._recent if entry[2] >= horizon]
+
+    def reset(self) -> None:
+        """Forget all detections (e.g. when the audio timeline restarts)."""
+        self._recent.clear()
+
+
+def command_span(
+    window_start: float,
+    window_seconds: float,
+    start: Optional[float],
+    end: Optional[float]
+) -> Tuple[float, float]:
+    """
+    Convert a command's window-relative timing into audio time.
+    Falls back to the whole window when the recognizer gave no word timings.
+    """
+    if start is None or end is None:
+        return window_start, window_start + window_seconds
+    return window_start + start, window_start + end
@@ -1,9 +1,19 @@
 import json
+import logging
+import threading
 import time
-from typing import Optional, List
+from collections import deque
+from typing import Optional, List, Tuple, Dict, Any
 from dataclasses import dataclass
 import numpy as np
 import config
+from audio import float_to_pcm16
+from logs import get_chunk_logger, get_logger
+from model_registry import get_model_registry
+
+log = get_logger("commands")
+# Per-window transcripts: off unless LOG_CHUNKS, so use %-style arguments
+chunk_log = get_chunk_logger()
 
 
 @dataclass
@@ -12,48 +22,134 @@ class ParsedCommand:
     command: Optional[str]
     raw_text: Optional[str]
     confidence: float
+    # Word timing within the parsed audio (seconds), when the recognizer reports it
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+class VoskStream:
+    """Decoder state for one connection's continuous audio stream."""
+
+    def __init__(self, recognizer, stability: int = config.VOSK_PARTIAL_STABILITY):
+        self.recognizer = recognizer
+        # Command lists from the most recent partial results; a command is
+        # considered stable once it appears in all of them
+        self.partials = deque(maxlen=max(1, stability))
+        # Commands of the current utterance already reported
+        self.emitted = 0
+        # True while an utterance has been fed but not finalized
+        self.active = False
+        # Buffer position (in samples) up to which audio has been handed to the recognizer
+        self.fed_position = 0
+        # Speaker the caller attributed the current utterance to, and the volume it was heard at
+        self.speaker = None
+        self.volume = 0.0
+        # Commands decoded before any speaker was identified
+        self.held: List[ParsedCommand] = []
+
+    def end_utterance(self) -> None:
+        """Forget per-utterance state. The recognizer resets itself after a final result."""
+        self.partials.clear()
+        self.emitted = 0
+        self.active = False
 
 
 class VoskTranscriber:
     """Local speech recognition using Vosk (fast, no cloud)."""
 
     def __init__(self):
-        from vosk import Model, KaldiRecognizer
-        import os
-
-        model_path = config.VOSK_MODEL_PATH
-        if not os.path.exists(model_path):
-            raise RuntimeError(
-                f"Vosk model not found at {model_path}\n"
-                f"Download from: https://alphacephei.com/vosk/models\n"
-                f"Recommended: vosk-model-small-en-us-0.15 (~40MB)"
-            )
-
-        print("[Vosk] Loading model...")
-        self._model = Model(model_path)
+        # Shared with every other consumer in this process
+        self._model = get_model_registry().vosk_model()
         self._sample_rate = config.SAMPLE_RATE
-        print("[Vosk] Model loaded")
 
-    def transcribe(self, audio: np.ndarray, sample_rate: int) -> str:
+        # Idle recognizers keyed by (grammar, sample_rate, words). A recognizer
+        # is reset by FinalResult(), so it can be reused for the next chunk
+        # instead of being rebuilt (grammar recognizers are costly to build).
+        self._idle: Dict[Tuple[Optional[str], int, bool], List[Any]] = {}
+        self._idle_lock = threading.Lock()
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int, grammar: Optional[str] = None) -> str:
         """Transcribe audio using Vosk."""
-        from vosk import KaldiRecognizer
+        result = self._recognize(audio, sample_rate, words=False, grammar=grammar)
+        return result.get("text", "").strip()
 
-        # Create recognizer for this audio
-        rec = KaldiRecognizer(self._model, sample_rate)
-        rec.SetWords(False)  # Don't need word-level timing
+    def transcribe_words(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        grammar: Optional[str] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Transcribe audio using Vosk, with word-level timing.
+        Returns (text, words) where each word has "word", "start" and "end" (seconds).
+        """
+        result = self._recognize(audio, sample_rate, words=True, grammar=grammar)
+        return result.get("text", "").strip(), result.get("result", [])
+
+    def _new_recognizer(self, sample_rate: int, words: bool, grammar: Optional[str]):
+        """Build a recognizer, restricted to a JSON word list when grammar is given."""
+        from vosk import KaldiRecognizer
 
-        # Convert float32 [-1, 1] to int16 PCM
-        if audio.dtype == np.float32:
-            audio_int16 = (audio * 32767).astype(np.int16)
+        if grammar:
+            rec = KaldiRecognizer(self._model, sample_rate, grammar)
         else:
-            audio_int16 = audio.astype(np.int16)
+            rec = KaldiRecognizer(self._model, sample_rate)
+        rec.SetWords(words)
+        return rec
+
+    def _recognize(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        words: bool,
+        grammar: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run a one-shot recognition and return Vosk's final result."""
+        key = (grammar, sample_rate, words)
+        with self._idle_lock:
+            idle = self._idle.get(key)
+            rec = idle.pop() if idle else None
+        if rec is None:
+            rec = self._new_recognizer(sample_rate, words, grammar)
 
         # Process audio
-        rec.AcceptWaveform(audio_int16.tobytes())
+        rec.AcceptWaveform(self._to_pcm16(audio))
 
-        # Get final result
+        # Get final result (also resets the recognizer for reuse)
         result = json.loads(rec.FinalResult())
-        return result.get("text", "").strip()
+
+        with self._idle_lock:
+            self._idle.setdefault(key, []).append(rec)
+        return result
+
+    def create_stream(self, sample_rate: int, grammar: Optional[str] = None) -> VoskStream:
+        """Create a long-lived recognizer for incremental decoding."""
+        return VoskStream(self._new_recognizer(sample_rate, False, grammar))
+
+    def accept(self, stream: VoskStream, audio: np.ndarray) -> Tuple[bool, str]:
+        """
+        Feed audio to a stream.
+        Returns (final, text): final is True when Vosk detected the end of an
+        utterance, in which case text is the final transcript, otherwise the partial one.
+        """
+        stream.active = True
+        if stream.recognizer.AcceptWaveform(self._to_pcm16(audio)):
+            return True, json.loads(stream.recognizer.Result()).get("text", "").strip()
+        return False, json.loads(stream.recognizer.PartialResult()).get("partial", "").strip()
+
+    def finalize(self, stream: VoskStream) -> str:
+        """Force the end of the current utterance and return its final transcript."""
+        return json.loads(stream.recognizer.FinalResult()).get("text", "").strip()
+
+    @staticmethod
+    def _to_pcm16(audio: np.ndarray) -> bytes:
+        """Convert float32 [-1, 1] to int16 PCM bytes (int16 input is used as-is)."""
+        if audio.dtype == np.int16:
+            return audio.tobytes()
+        if audio.dtype == np.float32:
+            # Clipped, so samples past full scale don't wrap around
+            return float_to_pcm16(audio)
+        return audio.astype(np.int16).tobytes()
 
 
 # Phonetic mappings for common misrecognitions
@@ -104,17 +200,75 @@ PHONETIC_MATCHES = {
 }
 
 
+def build_grammar(commands: List[str]) -> str:
+    """
+    Build a Vosk grammar (JSON word list) that only decodes the given commands,
+    their phonetic aliases and "[unk]" for everything else.
+    """
+    words = set(commands)
+    words.update(alias for alias, command in PHONETIC_MATCHES.items() if command in words)
+    return json.dumps(sorted(words) + ["[unk]"])
+
+
+# Common Whisper hallucinations on silence (filter these only)
+SILENCE_HALLUCINATIONS = [
+    "thank you", "thanks for watching", "subscribe",
+    "like and subscribe", "thanks for listening",
+    "please subscribe", "thank you for watching"
+]
+
+
+def is_silence_hallucination(text: Optional[str]) -> bool:
+    """Check if transcription is empty or a known Whisper silence hallucination."""
+    if not text:
+        return True
+    text_lower = text.lower().strip().rstrip(".")
+    return text_lower in SILENCE_HALLUCINATIONS
+
+
 class CommandParser:
     """Parses voice commands using local Vosk transcription."""
 
-    def __init__(self):
+    def __init__(self, pool_workers: int = config.TRANSCRIBE_POOL_WORKERS):
         self.valid_commands = set(config.VALID_COMMANDS)
-        print("[CommandParser] Using Vosk (local) for transcription")
-        self._transcriber = VoskTranscriber()
-
-    def _transcribe(self, audio: np.ndarray, sample_rate: int) -> str:
+        log.info("[CommandParser] Using Vosk (local) for transcription")
+        self._local_transcriber = self._transcriber = VoskTranscriber()
+
+        # Optionally spread one-shot decoding over worker processes (forked by start_pool())
+        if pool_workers > 0:
+            import multiprocessing
+            if "fork" in multiprocessing.get_all_start_methods():
+                from .pool import TranscriptionPool
+                self._transcriber = TranscriptionPool(self._transcriber, pool_workers)
+            else:
+                log.warning("[CommandParser] Process pool needs fork(), transcribing in-process")
+
+        # One restricted vocabulary per game
+        self._grammars: Dict[str, str] = {}
+        if config.VOSK_GRAMMAR:
+            for game, commands in config.GAME_COMMANDS.items():
+                self._grammars[game] = build_grammar([cmd for cmd in commands if cmd in self.valid_commands])
+            log.info("[CommandParser] Grammar decoding for: %s", ", ".join(self._grammars))
+
+    def start_pool(self) -> None:
+        """Fork the transcription workers, if configured. Call once the server is starting."""
+        if self._transcriber is not self._local_transcriber:
+            self._transcriber.start([None, *self._grammars.values()])
+
+    def warm_up(self) -> None:
+        """Build the in-process recognizers used for live commands ahead of the first chunk
+        (pool workers build their own when they start)."""
+        silence = np.zeros(config.SAMPLE_RATE // 2, dtype=np.float32)
+        for grammar in [None, *self._grammars.values()]:
+            self._local_transcriber.transcribe_words(silence, config.SAMPLE_RATE, grammar=grammar)
+
+    def grammar_for(self, game: Optional[str]) -> Optional[str]:
+        """Grammar for a game type, or None for open-vocabulary decoding."""
+        return self._grammars.get(game) if game else None
+
+    def _transcribe(self, audio: np.ndarray, sample_rate: int, game: Optional[str] = None) -> str:
         """Transcribe audio using Vosk."""
-        return self._transcriber.transcribe(audio, sample_rate)
+        return self._transcriber.transcribe(audio, sample_rate, grammar=self.grammar_for(game))
 
     def _match_command(self, word: str) -> Optional[str]:
         """Match a word to a command (direct or phonetic)."""
@@ -132,65 +286,155 @@ class CommandParser:
 
         return None
 
-    def parse(self, audio: np.ndarray, sample_rate: int) -> ParsedCommand:
+    def parse(self, audio: np.ndarray, sample_rate: int, game: Optional[str] = None) -> ParsedCommand:
         """Parse audio to extract a single command."""
         try:
             t0 = time.perf_counter()
-            raw_text = self._transcribe(audio, sample_rate)
+            raw_text = self._transcribe(audio, sample_rate, game)
             transcribe_time = (time.perf_counter() - t0) * 1000
 
             if not raw_text:
-                print(f"[Transcribe] {transcribe_time:.0f}ms (empty)")
+                chunk_log.debug("[Transcribe] %.0fms (empty)", transcribe_time)
                 return ParsedCommand(command=None, raw_text=None, confidence=0.0)
 
             # Try to match the whole text first
             cmd = self._match_command(raw_text)
             if cmd:
-                print(f"[Transcribe] {transcribe_time:.0f}ms | Direct match: '{cmd}'")
+                chunk_log.debug("[Transcribe] %.0fms | Direct match: '%s'", transcribe_time, cmd)
                 return ParsedCommand(command=cmd, raw_text=raw_text, confidence=0.95)
 
             # Try matching individual words
             for word in raw_text.lower().split():
                 cmd = self._match_command(word)
                 if cmd:
-                    print(f"[Transcribe] {transcribe_time:.0f}ms | Word match: '{cmd}' from '{raw_text}'")
+                    chunk_log.debug("[Transcribe] %.0fms | Word match: '%s' from '%s'", transcribe_time, cmd, raw_text)
                     return ParsedCommand(command=cmd, raw_text=raw_text, confidence=0.85)
 
-            print(f"[Transcribe] {transcribe_time:.0f}ms | No match: '{raw_text}'")
+            chunk_log.debug("[Transcribe] %.0fms | No match: '%s'", transcribe_time, raw_text)
             return ParsedCommand(command=None, raw_text=raw_text, confidence=0.0)
 
         except Exception as e:
-            print(f"Command parsing error: {e}")
+            log.error("Command parsing error: %s", e)
             return ParsedCommand(command=None, raw_text=str(e), confidence=0.0)
 
-    def parse_multiple(self, audio: np.ndarray, sample_rate: int) -> List[ParsedCommand]:
-        """Parse audio and extract ALL commands found."""
+    def parse_multiple(self, audio: np.ndarray, sample_rate: int, game: Optional[str] = None) -> List[ParsedCommand]:
+        """
+        Parse audio and extract ALL commands found, with word timing when available.
+        With a game type, decoding is restricted to that game's command grammar.
+        """
         try:
             t0 = time.perf_counter()
-            raw_text = self._transcribe(audio, sample_rate)
+            raw_text, words = self._transcriber.transcribe_words(
+                audio, sample_rate, grammar=self.grammar_for(game)
+            )
             transcribe_time = (time.perf_counter() - t0) * 1000
 
             if not raw_text:
-                print(f"[Transcribe] {transcribe_time:.0f}ms (empty)")
+                chunk_log.debug("[Transcribe] %.0fms (empty)", transcribe_time)
                 return []
 
+            if not words:
+                words = [{"word": word} for word in raw_text.split()]
+
             # Find all commands in the text
             commands_found = []
-            for word in raw_text.lower().split():
-                cmd = self._match_command(word)
+            for word in words:
+                cmd = self._match_command(word["word"])
                 if cmd:
-                    commands_found.append(cmd)
+                    commands_found.append(ParsedCommand(
+                        command=cmd,
+                        raw_text=raw_text,
+                        confidence=0.9,
+                        start=word.get("start"),
+                        end=word.get("end")
+                    ))
 
             if commands_found:
-                print(f"[Transcribe] {transcribe_time:.0f}ms | Found {len(commands_found)} commands: {commands_found} from '{raw_text}'")
-                return [
-                    ParsedCommand(command=cmd, raw_text=raw_text, confidence=0.9)
-                    for cmd in commands_found
-                ]
+                if chunk_log.isEnabledFor(logging.DEBUG):
+                    chunk_log.debug("[Transcribe] %.0fms | Found %d commands: %s from '%s'", transcribe_time,
+                                    len(commands_found), [parsed.command for parsed in commands_found], raw_text)
+                return commands_found
             else:
-                print(f"[Transcribe] {transcribe_time:.0f}ms | No commands in: '{raw_text}'")
+                chunk_log.debug("[Transcribe] %.0fms | No commands in: '%s'", transcribe_time, raw_text)
                 return [ParsedCommand(command=None, raw_text=raw_text, confidence=0.0)]
 
         except Exception as e:
-            print(f"Command parsing error: {e}")
+            log.error("Command parsing error: %s", e)
             return []
+
+    def create_stream(self, sample_rate: int, game: Optional[str] = None) -> VoskStream:
+        """Create per-connection streaming state for parse_stream."""
+        return self._transcriber.create_stream(sample_rate, grammar=self.grammar_for(game))
+
+    def parse_stream(self, stream: VoskStream, audio: np.ndarray, sample_rate: int) -> List[ParsedCommand]:
+        """
+        Streaming counterpart of parse_multiple.
+
+        Feeds the next piece of audio to the connection's recognizer and returns
+        only commands that became stable since the last call: a command is
+        reported once it appears in VOSK_PARTIAL_STABILITY consecutive partial
+        results, or when the utterance ends, whichever comes first.
+        """
+        try:
+            t0 = time.perf_counter()
+            final, raw_text = self._transcriber.accept(stream, audio)
+            transcribe_time = (time.perf_counter() - t0) * 1000
+
+            if final:
+                chunk_log.debug("[Transcribe] %.0fms | Utterance end: '%s'", transcribe_time, raw_text)
+                return self._end_stream_utterance(stream, raw_text)
+
+            stream.partials.append(self._commands_in(raw_text))
+            if len(stream.partials) < stream.partials.maxlen:
+                return []
+
+            # Commands every recent partial agrees on
+            stable = []
+            for commands in zip(*stream.partials):
+                if any(cmd != commands[0] for cmd in commands):
+                    break
+                stable.append(commands[0])
+
+            new_commands = stable[stream.emitted:]
+            stream.emitted = max(stream.emitted, len(stable))
+            if new_commands:
+                chunk_log.debug("[Transcribe] %.0fms | Stable partial: %s from '%s'", transcribe_time, new_commands, raw_text)
+            return [
+                ParsedCommand(command=cmd, raw_text=raw_text, confidence=0.85)
+                for cmd in new_commands
+            ]
+
+        except Exception as e:
+            log.error("Command parsing error: %s", e)
+            stream.end_utterance()
+            return []
+
+    def finish_stream(self, stream: VoskStream) -> List[ParsedCommand]:
+        """End the stream's current utterance (e.g. on silence) and return its unreported commands."""
+        if not stream.active:
+            return []
+        try:
+            raw_text = self._transcriber.finalize(stream)
+        except Exception as e:
+            log.error("Command parsing error: %s", e)
+            stream.end_utterance()
+            return []
+        return self._end_stream_utterance(stream, raw_text)
+
+    def _end_stream_utterance(self, stream: VoskStream, raw_text: str) -> List[ParsedCommand]:
+        """Report final commands not already sent from partials, then reset utterance state."""
+        new_commands = self._commands_in(raw_text)[stream.emitted:]
+        stream.end_utterance()
+        return [
+            ParsedCommand(command=cmd, raw_text=raw_text, confidence=0.9)
+            for cmd in new_commands
+        ]
+
+    def _commands_in(self, text: str) -> List[str]:
+        """All commands in a transcript, in spoken order."""
+        commands = []
+        for word in text.lower().split():
+            cmd = self._match_command(word)
+            if cmd:
+                commands.append(cmd)
+        return commands
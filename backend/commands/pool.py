@@ -0,0 +1,182 @@
+import atexit
+import json
+import multiprocessing
+import queue
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import config
+from logs import get_logger
+
+log = get_logger("commands")
+
+# Set in the parent before the workers are forked, so every worker inherits the
+# loaded Vosk model and the shared-memory slot mappings without copying them
+_worker_transcriber = None
+_worker_slots: List[memoryview] = []
+
+
+def _recognize_slot(
+    slot: int,
+    num_samples: int,
+    sample_rate: int,
+    words: bool,
+    grammar: Optional[str]
+) -> Dict[str, Any]:
+    """Worker entry point: decode int16 PCM from a shared-memory slot."""
+    transcriber = _worker_transcriber
+    key = (grammar, sample_rate, words)
+    idle = transcriber._idle.get(key)
+    rec = idle.pop() if idle else transcriber._new_recognizer(sample_rate, words, grammar)
+
+    rec.AcceptWaveform(bytes(_worker_slots[slot][:num_samples * 2]))
+    result = json.loads(rec.FinalResult())
+
+    transcriber._idle.setdefault(key, []).append(rec)
+    return result
+
+
+def _warm_worker(grammars: List[Optional[str]]) -> None:
+    """Worker initializer: build the live-command recognizers before taking jobs."""
+    transcriber = _worker_transcriber
+    silence = bytes(config.SAMPLE_RATE)  # Half a second of int16 zeros
+    for grammar in grammars:
+        rec = transcriber._new_recognizer(config.SAMPLE_RATE, True, grammar)
+        rec.AcceptWaveform(silence)
+        rec.FinalResult()
+        transcriber._idle.setdefault((grammar, config.SAMPLE_RATE, True), []).append(rec)
+
+
+class TranscriptionPool:
+    """
+    Runs one-shot Vosk decoding in forked worker processes.
+
+    The model is loaded once in the parent and shared copy-on-write with the
+    workers. Audio is written as int16 PCM into preallocated shared-memory
+    slots, so only the slot index crosses the process boundary. Exposes the
+    same interface as VoskTranscriber; streaming recognizers stay in-process.
+
+    Workers are only forked by start(), called from a server startup hook, so
+    importing the app (or each uvicorn worker doing so) forks nothing. Until
+    then, and whenever a worker doesn't answer within
+    TRANSCRIBE_POOL_TIMEOUT_SECONDS, audio is decoded in-process.
+    """
+
+    def __init__(self, transcriber, workers: int = config.TRANSCRIBE_POOL_WORKERS):
+        self._local = transcriber
+        self.workers = workers
+        self.max_samples = int(config.TRANSCRIBE_POOL_MAX_SECONDS * config.SAMPLE_RATE)
+        self.timeout = config.TRANSCRIBE_POOL_TIMEOUT_SECONDS
+        self._slots: List[SharedMemory] = []
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        self._pool = None
+        # Jobs decoded in-process because no slot or worker answered in time
+        self.timeouts = 0
+
+    def start(self, grammars: List[Optional[str]]) -> None:
+        """Fork the workers, each building the recognizers for `grammars` before taking jobs."""
+        global _worker_transcriber, _worker_slots
+        if self._pool is not None:
+            return
+
+        # Two slots per worker keeps every worker busy while the next job is written
+        self._slots = [
+            SharedMemory(create=True, size=self.max_samples * 2)
+            for _ in range(self.workers * 2)
+        ]
+        for index in range(len(self._slots)):
+            self._free_slots.put(index)
+
+        _worker_transcriber = self._local
+        _worker_slots = [slot.buf for slot in self._slots]
+
+        # The initializer also runs in any worker the pool replaces
+        self._pool = multiprocessing.get_context("fork").Pool(
+            processes=self.workers, initializer=_warm_worker, initargs=(grammars,)
+        )
+        log.info(f"[Vosk] Transcription pool started with {self.workers} worker processes")
+        atexit.register(self.close)
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int, grammar: Optional[str] = None) -> str:
+        """Transcribe audio using Vosk."""
+        result = self._recognize(audio, sample_rate, words=False, grammar=grammar)
+        return result.get("text", "").strip()
+
+    def transcribe_words(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        grammar: Optional[str] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Transcribe audio using Vosk, with word-level timing.
+        Returns (text, words) where each word has "word", "start" and "end" (seconds).
+        """
+        result = self._recognize(audio, sample_rate, words=True, grammar=grammar)
+        return result.get("text", "").strip(), result.get("result", [])
+
+    def _recognize(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        words: bool,
+        grammar: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Decode in a worker process, or in-process if the pool isn't running,
+        the audio doesn't fit a slot or the workers don't answer in time."""
+        if self._pool is None or len(audio) > self.max_samples:
+            return self._local._recognize(audio, sample_rate, words, grammar)
+
+        try:
+            slot = self._free_slots.get(timeout=self.timeout)
+        except queue.Empty:
+            self.timeouts += 1
+            return self._local._recognize(audio, sample_rate, words, grammar)
+
+        def release(_):
+            # A slot is reused only once its worker is done with it, even after a timeout
+            self._free_slots.put(slot)
+
+        try:
+            # Convert straight into shared memory, no pickled array
+            pcm = np.ndarray((len(audio),), dtype=np.int16, buffer=self._slots[slot].buf)
+            if audio.dtype == np.float32:
+                np.multiply(np.clip(audio, -1.0, 1.0), 32767, out=pcm, casting="unsafe")
+            else:
+                pcm[:] = audio
+            pending = self._pool.apply_async(
+                _recognize_slot, (slot, len(audio), sample_rate, words, grammar),
+                callback=release, error_callback=release
+            )
+        except Exception:
+            self._free_slots.put(slot)
+            raise
+
+        try:
+            return pending.get(timeout=self.timeout)
+        except multiprocessing.TimeoutError:
+            self.timeouts += 1
+            log.warning(f"[Vosk] Worker took over {self.timeout:.1f}s, transcribing in-process")
+            return self._local._recognize(audio, sample_rate, words, grammar)
+
+    def create_stream(self, sample_rate: int, grammar: Optional[str] = None):
+        """Create a long-lived recognizer for incremental decoding (in-process)."""
+        return self._local.create_stream(sample_rate, grammar)
+
+    def accept(self, stream, audio: np.ndarray) -> Tuple[bool, str]:
+        """Feed audio to an in-process stream."""
+        return self._local.accept(stream, audio)
+
+    def finalize(self, stream) -> str:
+        """Force the end of a stream's current utterance."""
+        return self._local.finalize(stream)
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory."""
+        if self._pool is None:
+            return
+        self._pool.terminate()
+        self._pool = None
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
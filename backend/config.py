@@ -12,19 +12,141 @@ LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o-mini")
 USE_VOSK = True  # Always use local Vosk
 VOSK_MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "vosk-model-small-en-us-0.15")
 
+# Streaming recognition: keep one Vosk recognizer per connection and report
+# commands from partial results instead of decoding each chunk from scratch
+VOSK_STREAMING = False
+# The recognizer is fed every client frame as it arrives, so this counts per-frame partials
+VOSK_PARTIAL_STABILITY = 2  # Consecutive partial results that must agree before a command is sent
+
+# Grammar-constrained decoding: when a client declares its game, Vosk only
+# decodes that game's commands (plus phonetic aliases and [unk])
+VOSK_GRAMMAR = True
+GAME_COMMANDS = {
+    "pong": ["up", "down", "start", "pause", "serve", "resume"],
+    "boxing": [
+        "jab", "cross", "hook", "uppercut", "upper",
+        "block", "guard", "dodge", "duck",
+        "forward", "back", "advance", "retreat", "left", "right",
+        "start", "pause", "fight",
+    ],
+    "headsoccer": ["left", "right", "jump", "up", "kick", "shoot", "power", "start", "pause"],
+}
+
+# Multi-core transcription: number of forked Vosk worker processes (0 = decode in-process)
+TRANSCRIBE_POOL_WORKERS = int(os.getenv("TRANSCRIBE_POOL_WORKERS", "0"))
+TRANSCRIBE_POOL_MAX_SECONDS = 60.0  # Longest audio a worker slot holds; longer audio decodes in-process
+TRANSCRIBE_POOL_TIMEOUT_SECONDS = 5.0  # Longest wait for a worker's result before decoding in-process instead
+
+# Out-of-process inference: the web process only copies each connection's PCM
+# into a shared-memory ring, and this many inference processes run VAD, speaker
+# ID and Vosk on it, sending results back over a queue (0 = infer in-process)
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))
+INFERENCE_RING_SECONDS = 10.0  # Shared-memory ring capacity per connection
+INFERENCE_HEALTH_CHECK_SECONDS = 1.0  # How often dead inference processes are looked for
+
+# Load models and run dummy inferences at startup instead of on the first chunk
+WARM_UP_MODELS = os.getenv("WARM_UP_MODELS", "1") != "0"
+
 # Audio settings
 SAMPLE_RATE = 16000
 CHANNELS = 1
 CHUNK_DURATION_MS = 500
+AUDIO_BUFFER_SECONDS = 10.0  # Ring buffer capacity per connection
+AUDIO_BUFFER_OVERFLOW = "drop_oldest"  # "drop_oldest" or "drop_newest" when the ring is full
+# Encoding of incoming audio frames unless the client picks another in
+# start_listening ("encoding"): "pcm16", "mulaw" (G.711, 2x smaller) or
+# "ima_adpcm" (blocks of ADPCM_BLOCK_SAMPLES 4-bit codes, ~3.5x smaller)
+AUDIO_ENCODING = "pcm16"
+# IMA-ADPCM wire format: each frame is a whole number of blocks, each block a
+# 4-byte header (int16 LE predictor, uint8 step index, uint8 zero) followed by
+# ADPCM_BLOCK_SAMPLES / 2 bytes of 4-bit IMA codes, low nibble first. The
+# header is the encoder state before the block's first code, not a sample.
+# Reference encoder: audio.codecs.encode_ima_adpcm (the bundled clients send pcm16)
+ADPCM_BLOCK_SAMPLES = 64
+# Clients may declare their capture rate ("sample_rate" in start_listening);
+# other rates are resampled to SAMPLE_RATE per connection with a streaming
+# polyphase filter (the same Kaiser design as scipy.signal.resample_poly)
+CLIENT_SAMPLE_RATE_RANGE = (8000, 96000)
+RESAMPLE_FILTER_HALF_LENGTH = 10  # Filter half-length in multiples of max(up, down)
+RESAMPLE_KAISER_BETA = 5.0
+
+# Live command analysis windows. A hop shorter than the window gives overlapping
+# windows (e.g. 0.75s window / 0.25s hop) so words on a block boundary aren't split,
+# at the cost of analysing each sample window/hop times.
+ANALYSIS_WINDOW_SECONDS = 0.5
+ANALYSIS_HOP_SECONDS = 0.5
+COMMAND_DEDUP_TOLERANCE_SECONDS = 0.1  # Slack when matching one utterance across windows
+SILENCE_RMS_THRESHOLD = 0.01  # Chunks with RMS below this are skipped as silence
+
+# Local voice-activity detection: only windows containing speech reach speaker
+# ID and transcription. Frames are speech when they rise far enough above an
+# adaptive per-connection noise floor and have a speech-like spectrum.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") != "0"
+VAD_FRAME_MS = 20
+VAD_INITIAL_NOISE_FLOOR_DB = -50.0  # dBFS, adapts per connection from there
+VAD_ENERGY_MARGIN_DB = 9.0  # Frame energy above the noise floor needed for speech
+VAD_SPEECH_BAND_HZ = (250, 4000)
+VAD_MIN_SPEECH_BAND_RATIO = 0.35  # Share of frame energy inside the speech band (rejects hum and hiss)
+VAD_MAX_SPECTRAL_FLATNESS = 0.45  # Flatter (noise-like) spectra are rejected; white noise is ~0.56
+VAD_ONSET_FRAMES = 2  # Consecutive speech frames needed to open a segment
+VAD_HANGOVER_MS = 200  # Keep a segment open this long after the last speech frame
+
+# Utterance endpointing: instead of fixed analysis windows, process each
+# utterance as soon as the VAD sees it end (clients opt in with "endpointing")
+ENDPOINTING = False
+ENDPOINT_SILENCE_MS = 120  # Non-speech after an utterance that ends it
+ENDPOINT_PREROLL_MS = 100  # Audio kept before the detected onset
+ENDPOINT_MAX_SEGMENT_SECONDS = 3.0  # Long speech is cut into segments of at most this length
+
+# Per-connection queue between the WebSocket reader and the processing task.
+# When it is full the oldest audio is dropped, and audio older than the max
+# age is dropped unprocessed so games never act on stale commands.
+PROCESSING_QUEUE_SIZE = 4
+PROCESSING_MAX_AUDIO_AGE_SECONDS = 1.0
+
+# How detected commands are sent unless the client asks otherwise in
+# start_listening ("result_format"): "json" sends one text message per
+# command, "binary" one packed frame per processed window (see ws/protocol.py)
+RESULT_FORMAT = "json"
+
+# Hot-path latency histograms and counters, served at /api/metrics in the
+# Prometheus text format (see metrics.py). Inference processes send their
+# metrics to the web process every METRICS_PUSH_INTERVAL_SECONDS.
+METRICS_NAMESPACE = "playearone"
+METRICS_BUCKETS_SECONDS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0
+)
+METRICS_PUSH_INTERVAL_SECONDS = 1.0
+
+# Logging (see logs.py): records are formatted and written to stdout by a
+# background thread. Per-chunk lines (volume, speech duration, speaker
+# matches, per-window transcripts) are off unless LOG_CHUNKS=1, and then
+# limited to LOG_CHUNK_RATE_PER_SECOND lines per call site (0 = unlimited).
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_CHUNKS = os.getenv("LOG_CHUNKS", "0") == "1"
+LOG_CHUNK_RATE_PER_SECOND = float(os.getenv("LOG_CHUNK_RATE_PER_SECOND", "5"))
+LOG_QUEUE_SIZE = 10000  # Records waiting for the writer thread; more are dropped
 
 # Speaker identification (using Resemblyzer - fast local)
 SPEAKER_SIMILARITY_THRESHOLD = 0.40  # Threshold for speaker matching
 SPEAKER_GAME_THRESHOLD = 0.40  # Lower threshold for active game players
 ENROLLMENT_DURATION_SECONDS = 5
+# Longest enrollment recording kept; audio past it is dropped and the client told
+ENROLLMENT_MAX_SECONDS = 30.0
+# Cross-connection batching of Resemblyzer embeddings: requests arriving within
+# this window of each other share one LSTM forward pass (0 = no batching)
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "10"))
+EMBEDDING_BATCH_MAX_UTTERANCES = 16
 
 # Paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
-SPEAKERS_FILE = os.path.join(DATA_DIR, "speakers.json")
+SPEAKERS_FILE = os.path.join(DATA_DIR, "speakers.json")  # Legacy JSON store, migrated on first start
+SPEAKERS_META_FILE = os.path.join(DATA_DIR, "speakers.meta.json")  # Names/enrollment times + current .npy matrix
+SPEAKERS_EMBEDDING_DTYPE = os.getenv("SPEAKERS_EMBEDDING_DTYPE", "float32")  # or "float16" to halve the file
+SPEAKER_EMBEDDING_DIM = 256
+SPEAKERS_SAVE_DELAY_SECONDS = 0.5  # Coalesce speaker writes made within this window
+SPEAKERS_RELOAD_CHECK_SECONDS = 2.0  # How often to check the file for external changes
 
 # Valid commands (superset for all games)
 VALID_COMMANDS = [
@@ -40,6 +162,10 @@ VALID_COMMANDS = [
     "start", "serve", "resume", "pause", "fight",
 ]
 
-# Player assignments: speaker name → player number (1 = left, 2 = right)
+# Player assignments: speaker name → player number (1 = left, 2 = right).
+# These seed PLAYER_ASSIGNMENTS_FILE on first start; after that the file is the
+# source of truth, shared by all server workers.
 PLAYER_ASSIGNMENTS = {
 }
+PLAYER_ASSIGNMENTS_FILE = os.path.join(DATA_DIR, "player_assignments.json")
+PLAYER_ASSIGNMENTS_RELOAD_CHECK_SECONDS = 0.5  # How often a worker checks for changes made by another
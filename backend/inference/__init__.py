@@ -0,0 +1,4 @@
+from .pool import InferenceProcessPool
+from .ring import SharedAudioRing
+
+__all__ = ["InferenceProcessPool", "SharedAudioRing"]
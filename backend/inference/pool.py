@@ -0,0 +1,232 @@
+import asyncio
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+import config
+from logs import get_logger
+from .ring import SharedAudioRing
+from .worker import ResultRow, run_worker
+
+log = get_logger("inference")
+
+
+class _PooledConnection:
+    """A connection's ring, process and callback, as tracked by the web process."""
+
+    __slots__ = ("index", "ring", "loop", "on_results", "settings")
+
+    def __init__(self, index: int, ring: SharedAudioRing, loop: asyncio.AbstractEventLoop,
+                 on_results: Callable, settings: Dict[str, Any]):
+        self.index = index
+        self.ring = ring
+        self.loop = loop
+        self.on_results = on_results
+        # Latest analysis settings, replayed if the process has to be restarted
+        self.settings = settings
+
+
+class InferenceProcessPool:
+    """
+    Live command detection in separate inference processes.
+
+    Each process loads its own models. A connection is pinned to the least
+    loaded process for its lifetime; the web process appends the client's raw
+    PCM to the connection's shared-memory ring and sends a one-tuple
+    notification, so audio never crosses a pipe. Results come back on a
+    shared queue and are handed to the connection's callback on the event
+    loop that opened it.
+
+    A ring is only unlinked once its process has acknowledged the close, so
+    a process still loading models never finds the ring of a connection that
+    came and went already gone. The results reader checks every
+    INFERENCE_HEALTH_CHECK_SECONDS for processes that died, restarts them and
+    re-attaches their connections with a reset timeline.
+    """
+
+    def __init__(self, processes: int = config.INFERENCE_PROCESSES):
+        # Spawned, not forked: the web process already runs threads and an event loop
+        self._context = multiprocessing.get_context("spawn")
+        self.ring_capacity = int(config.INFERENCE_RING_SECONDS * config.SAMPLE_RATE)
+        self._results = self._context.Queue()
+        self._inboxes: List[Any] = [None] * processes
+        self._processes: List[Any] = [None] * processes
+        for index in range(processes):
+            self._start_process(index)
+
+        self._lock = threading.Lock()
+        self._connections: Dict[int, _PooledConnection] = {}
+        # Closed connections whose process hasn't acknowledged yet: conn_id -> (index, ring)
+        self._closing: Dict[int, tuple] = {}
+        self._load = [0] * processes
+        self._results_received = 0
+        self._restarts = 0
+        # Latest metrics snapshot from each process
+        self._metrics: Dict[int, Dict[str, dict]] = {}
+        self._closed = False
+
+        self._reader = threading.Thread(target=self._read_results, name="inference-results", daemon=True)
+        self._reader.start()
+        log.info(f"[Inference] Started {processes} inference processes")
+        atexit.register(self.close)
+
+    def _start_process(self, index: int) -> None:
+        """Start (or replace) process `index`, with a fresh inbox."""
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=run_worker, args=(index, inbox, self._results),
+            name=f"inference-{index}", daemon=True
+        )
+        process.start()
+        self._inboxes[index] = inbox
+        self._processes[index] = process
+
+    def _restart_dead_processes(self) -> None:
+        """Replace processes that died, re-attaching their connections. Call with _lock held."""
+        if self._closed:
+            return
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            log.error(f"[Inference] Process {index} died (exit code {process.exitcode}), restarting")
+            self._restarts += 1
+            self._metrics.pop(index, None)
+            self._start_process(index)
+            # Its pending closes will never be acknowledged
+            for conn_id, (closing_index, ring) in list(self._closing.items()):
+                if closing_index == index:
+                    del self._closing[conn_id]
+                    ring.close()
+            for conn_id, entry in self._connections.items():
+                if entry.index == index:
+                    self._inboxes[index].put((
+                        "open", conn_id, entry.ring.name, entry.ring.capacity, dict(entry.settings, reset=True)
+                    ))
+
+    def open(
+        self,
+        conn_id: int,
+        settings: Dict[str, Any],
+        on_results: Callable[[List[ResultRow], float], None]
+    ) -> None:
+        """Give a connection a ring and a process. Must be called from the event loop.
+        on_results(rows, ready_at) gets each batch of results, ready_at being the
+        time.monotonic() at which the audio they came from was written."""
+        ring = SharedAudioRing(self.ring_capacity)
+        with self._lock:
+            self._restart_dead_processes()
+            index = min(range(len(self._load)), key=self._load.__getitem__)
+            self._load[index] += 1
+            self._connections[conn_id] = _PooledConnection(
+                index, ring, asyncio.get_running_loop(), on_results, settings
+            )
+            self._inboxes[index].put(("open", conn_id, ring.name, ring.capacity, settings))
+
+    def configure(self, conn_id: int, settings: Dict[str, Any]) -> None:
+        """Change a connection's analysis settings (settings["reset"] restarts its timeline)."""
+        entry = self._connections.get(conn_id)
+        if entry is not None:
+            entry.settings = settings
+            self._inboxes[entry.index].put(("configure", conn_id, settings))
+
+    def write(self, conn_id: int, pcm: bytes) -> None:
+        """Append a frame of 16-bit PCM to the connection's ring."""
+        entry = self._connections.get(conn_id)
+        if entry is None:
+            return
+        entry.ring.write(pcm)
+        self._inboxes[entry.index].put(("audio", conn_id, time.monotonic()))
+
+    def close_connection(self, conn_id: int) -> None:
+        """Release a connection's process slot; its ring goes once the process lets go of it."""
+        with self._lock:
+            entry = self._connections.pop(conn_id, None)
+            if entry is None:
+                return
+            self._load[entry.index] -= 1
+            self._closing[conn_id] = (entry.index, entry.ring)
+            self._inboxes[entry.index].put(("close", conn_id))
+
+    def _release_ring(self, conn_id: int) -> None:
+        """The process detached from a closed connection's ring: unlink it."""
+        with self._lock:
+            pending = self._closing.pop(conn_id, None)
+        if pending is not None:
+            pending[1].close()
+
+    def _read_results(self) -> None:
+        """Reader thread: hand each batch of results to its connection's event loop,
+        and restart processes that died."""
+        interval = config.INFERENCE_HEALTH_CHECK_SECONDS
+        next_check = time.monotonic() + interval
+        while True:
+            now = time.monotonic()
+            if now >= next_check:
+                with self._lock:
+                    self._restart_dead_processes()
+                next_check = now + interval
+            try:
+                message = self._results.get(timeout=max(0.0, next_check - now))
+            except queue.Empty:
+                continue
+            if message is None:
+                return
+            kind = message[0]
+            if kind == "metrics":
+                _, index, snapshot = message
+                self._metrics[index] = snapshot
+                continue
+            if kind == "closed":
+                self._release_ring(message[1])
+                continue
+            _, conn_id, rows, ready_at = message
+            self._results_received += len(rows)
+            entry = self._connections.get(conn_id)
+            if entry is None:
+                continue
+            try:
+                entry.loop.call_soon_threadsafe(entry.on_results, rows, ready_at)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    def metrics_snapshots(self) -> List[Dict[str, dict]]:
+        """The inference processes' latest metrics (see metrics.MetricsRegistry.render)."""
+        return list(self._metrics.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Process liveness, connections per process, restarts and results received."""
+        return {
+            "processes": [
+                {"pid": process.pid, "alive": process.is_alive(), "connections": load}
+                for process, load in zip(self._processes, self._load)
+            ],
+            "connections": len(self._connections),
+            "closing": len(self._closing),
+            "restarts": self._restarts,
+            "results": self._results_received
+        }
+
+    def close(self) -> None:
+        """Stop the inference processes and release every ring."""
+        with self._lock:
+            if self._closed:
+                return
+            # Under the lock, so the reader can't be midway through a restart
+            self._closed = True
+        for inbox in self._inboxes:
+            inbox.put(("stop",))
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._reader.join(timeout=5)
+        with self._lock:
+            rings = [entry.ring for entry in self._connections.values()]
+            rings += [ring for _, ring in self._closing.values()]
+            self._connections.clear()
+            self._closing.clear()
+        for ring in rings:
+            ring.close()
@@ -0,0 +1,87 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional
+import numpy as np
+
+# int64 write position ahead of the samples
+_HEADER_BYTES = 8
+
+
+class SharedAudioRing:
+    """
+    Single-writer ring of 16-bit PCM in shared memory.
+
+    The header holds the stream write position (total samples ever written);
+    samples follow it. The web process creates the ring and appends frames
+    as they arrive, with no decoding. An inference process attaches to it by
+    name and reads any span written within the last `capacity` samples.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self.capacity = capacity
+        self._owner = name is None
+        if self._owner:
+            self._shm = SharedMemory(create=True, size=_HEADER_BYTES + capacity * 2)
+        else:
+            try:
+                # The creating process owns cleanup (Python 3.13+)
+                self._shm = SharedMemory(name=name, track=False)
+            except TypeError:
+                self._shm = SharedMemory(name=name)
+        self._head = np.ndarray((1,), dtype=np.int64, buffer=self._shm.buf)
+        self._data = np.ndarray((capacity,), dtype=np.int16, buffer=self._shm.buf, offset=_HEADER_BYTES)
+        if self._owner:
+            self._head[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write_position(self) -> int:
+        """Total samples written so far."""
+        return int(self._head[0])
+
+    def write(self, pcm: bytes) -> None:
+        """Append 16-bit PCM. Only the creating process may write."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        position = int(self._head[0])
+        if len(samples) > self.capacity:
+            position += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+
+        start = position % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < len(samples):
+            self._data[:len(samples) - first] = samples[first:]
+        # Publish only after the samples are in place
+        self._head[0] = position + len(samples)
+
+    def read(self, start: int, end: int) -> Optional[List[np.ndarray]]:
+        """
+        Views of the samples between two stream positions (one, or two when the
+        span wraps). None if part of the span was already overwritten.
+        Copy the views before the writer can lap them.
+        """
+        if start < end - self.capacity or start < self.write_position() - self.capacity:
+            return None
+        begin = start % self.capacity
+        stop = begin + (end - start)
+        if stop <= self.capacity:
+            return [self._data[begin:stop]]
+        return [self._data[begin:], self._data[:stop - self.capacity]]
+
+    def overwritten(self, start: int) -> bool:
+        """Whether the sample at stream position `start` has since been overwritten."""
+        return start < self.write_position() - self.capacity
+
+    def close(self) -> None:
+        """Detach from the shared memory (and remove it, in the creating process)."""
+        # Views into the buffer must go before it can be closed
+        self._head = None
+        self._data = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,313 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+import config
+from audio import AudioBuffer, FeatureExtractor, UtteranceEndpointer, VoiceActivityDetector
+from commands import CommandDeduplicator, CommandParser, command_span, is_silence_hallucination
+from logs import get_logger, setup_logging, stop_logging
+from metrics import CHUNKS_PROCESSED, CHUNKS_SKIPPED_SILENT, STAGE_SECONDS, get_metrics
+from model_registry import get_model_registry
+from player_assignments import get_player_assignments
+from speakers import SpeakerIdentifier
+from .ring import SharedAudioRing
+
+# Result rows sent to the web process, in CommandResult field order:
+# (timestamp, speaker, speaker_confidence, command, raw_text, command_confidence, volume, speech_duration)
+ResultRow = Tuple[float, str, float, Optional[str], Optional[str], float, float, float]
+
+log = get_logger("inference")
+
+
+class _Models:
+    """The models of one inference process, loaded once and shared by its sessions."""
+
+    def __init__(self):
+        # One speaker-ID thread, so an embedding batch would never form
+        get_model_registry().embedding_batch_window_ms = 0
+        self.identifier = SpeakerIdentifier()
+        # This process is already one of several, so no nested transcription pool
+        self.parser = CommandParser(pool_workers=0)
+        self.assignments = get_player_assignments()
+        # Speaker ID runs beside transcription; both spend their time in native code
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speaker-id")
+
+    def identify(self, audio: np.ndarray, sample_rate: int, allowed_speakers: Optional[List[str]]):
+        start = time.perf_counter()
+        match = self.identifier.identify(audio, sample_rate, allowed_speakers=allowed_speakers)
+        STAGE_SECONDS["speaker_id"].observe(time.perf_counter() - start)
+        return match
+
+    def parse(self, pcm16: np.ndarray, sample_rate: int, game: Optional[str]):
+        start = time.perf_counter()
+        parsed = self.parser.parse_multiple(pcm16, sample_rate, game=game)
+        STAGE_SECONDS["vosk_decode"].observe(time.perf_counter() - start)
+        return parsed
+
+
+class LiveSession:
+    """
+    Live command detection for one connection, inside an inference process.
+
+    Reads new PCM from the connection's shared-memory ring into a local
+    buffer, cuts it into analysis windows (or endpointed utterances), gates
+    them with voice-activity detection and runs speaker ID and Vosk on the
+    rest, just as the in-process path in WebSocketHandler does.
+    """
+
+    def __init__(self, ring: SharedAudioRing, models: _Models, settings: Dict[str, Any]):
+        self.ring = ring
+        self.models = models
+        self.extractor = FeatureExtractor()
+        self.max_age = int(config.PROCESSING_MAX_AUDIO_AGE_SECONDS * config.SAMPLE_RATE)
+        self.vad: Optional[VoiceActivityDetector] = None
+        self.endpointer: Optional[UtteranceEndpointer] = None
+        self.deduplicator: Optional[CommandDeduplicator] = None
+        # Speech session start per speaker, for speech_duration
+        self.speech_start: Dict[str, float] = {}
+        self.windows = 0
+        self.dropped_stale = 0
+        self.configure(dict(settings, reset=True))
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        """Apply the connection's analysis settings; restart the timeline if asked to."""
+        self.window = settings["window_seconds"]
+        self.hop = settings["hop_seconds"]
+        self.game = settings.get("game")
+        self.mode = settings.get("mode", "frontend")
+        self.endpointing = settings.get("endpointing", False)
+        if settings.get("reset"):
+            self._restart(self.ring.write_position())
+
+    def _restart(self, position: int) -> None:
+        """Start a fresh local buffer at ring position `position`."""
+        # Local buffer positions count from here
+        self.base = position
+        self.read_pos = position
+        self.buffer = AudioBuffer()
+        self.speech_start.clear()
+
+        if self.endpointing:
+            if self.endpointer is None:
+                self.endpointer = UtteranceEndpointer()
+            else:
+                # Keep the learned noise floor across restarts
+                self.endpointer.reset_timeline()
+            self.deduplicator = None
+            return
+
+        self.endpointer = None
+        if config.VAD_ENABLED:
+            if self.vad is None:
+                self.vad = VoiceActivityDetector()
+            else:
+                self.vad.reset_timeline()
+        self.deduplicator = CommandDeduplicator() if self.hop < self.window else None
+
+    def _pull(self) -> None:
+        """Copy audio written since the last call from the ring into the local buffer."""
+        end = self.ring.write_position()
+        if end - self.read_pos > self.max_age:
+            # Fell behind: audio this old is no longer worth acting on
+            self.dropped_stale += 1
+            self._restart(end - self.max_age)
+
+        segments = self.ring.read(self.read_pos, end)
+        if segments is None:
+            self._restart(end)
+            return
+        for segment in segments:
+            self.buffer.add_chunk(segment)
+        if self.ring.overwritten(self.read_pos):
+            # The writer lapped us while copying; the copy may be torn
+            self._restart(end)
+            return
+        self.read_pos = end
+
+    def process(self) -> List[ResultRow]:
+        """Analyse every complete window (or ended utterance) available now."""
+        self._pull()
+        sr = config.SAMPLE_RATE
+
+        # Every window is analysed before the buffer is written again, so no copies
+        jobs: List[Tuple[np.ndarray, float]] = []
+        if self.endpointer is not None:
+            for start, end in self.endpointer.update(self.buffer):
+                audio = self.buffer.read_range(start, end)
+                if audio is not None:
+                    jobs.append((audio, start / sr))
+                self.buffer.discard_until(end)
+            self.buffer.discard_until(self.endpointer.keep_from())
+        else:
+            while True:
+                window_start = self.buffer.position_seconds()
+                audio = self.buffer.consume_window(self.window, self.hop)
+                if audio is None:
+                    break
+                if self.vad is not None and not self.vad.contains_speech(audio, int(round(window_start * sr))):
+                    CHUNKS_SKIPPED_SILENT.inc()
+                    self.speech_start.clear()
+                    continue
+                jobs.append((audio, window_start))
+
+        results: List[ResultRow] = []
+        for audio, window_start in jobs:
+            window_end = self.base + int(round(window_start * sr)) + len(audio)
+            if self.ring.write_position() - window_end > self.max_age:
+                self.dropped_stale += 1
+                continue
+            self.windows += 1
+            results.extend(self._analyse(audio, window_start))
+        return results
+
+    def _analyse(self, audio: np.ndarray, window_start: float) -> List[ResultRow]:
+        """Speaker ID and command parsing for one window."""
+        start = time.perf_counter()
+        features = self.extractor.extract(audio)
+        STAGE_SECONDS["feature_extraction"].observe(time.perf_counter() - start)
+        if features.is_silent:
+            CHUNKS_SKIPPED_SILENT.inc()
+            self.speech_start.clear()
+            return []
+        CHUNKS_PROCESSED.inc()
+
+        assignments = self.models.assignments.get_all() if self.mode == "game" else None
+        allowed_speakers = list(assignments.keys()) if assignments else None
+        speaker_future = self.models.executor.submit(
+            self.models.identify, features.normalized, features.sample_rate, allowed_speakers
+        )
+        parsed_list = self.models.parse(features.pcm16, features.sample_rate, self.game)
+        speaker_match = speaker_future.result()
+
+        raw_text = parsed_list[0].raw_text if parsed_list else None
+        speech_duration = self._speech_duration(speaker_match.name)
+        if is_silence_hallucination(raw_text):
+            return []
+
+        window_seconds = len(audio) / features.sample_rate
+        if self.deduplicator:
+            self.deduplicator.prune(window_start)
+
+        timestamp = time.time()
+        rows = []
+        for parsed in parsed_list:
+            if not parsed.command:
+                continue
+            if self.deduplicator:
+                start, end = command_span(window_start, window_seconds, parsed.start, parsed.end)
+                if self.deduplicator.is_duplicate(parsed.command, start, end):
+                    continue
+            rows.append((
+                timestamp, speaker_match.name, float(speaker_match.confidence),
+                parsed.command, parsed.raw_text, float(parsed.confidence),
+                float(features.volume), speech_duration
+            ))
+        return rows
+
+    def _speech_duration(self, speaker: str) -> float:
+        """How long a speaker has been speaking continuously, capped at 1.5s."""
+        now = time.time()
+        start = self.speech_start.get(speaker)
+        if start is None:
+            self.speech_start[speaker] = now
+            return 0.1
+        return min(now - start, 1.5)
+
+    def close(self) -> None:
+        self.ring.close()
+
+
+def run_worker(index: int, inbox, outbox) -> None:
+    """
+    Inference process entry point.
+
+    Messages on `inbox`:
+        ("open", conn_id, ring_name, capacity, settings)
+        ("configure", conn_id, settings)
+        ("audio", conn_id, written_at)  new PCM was written to the connection's ring
+                                        at time.monotonic() written_at
+        ("close", conn_id)     answered with ("closed", conn_id) once detached from the ring
+        ("stop",)
+    Results go to `outbox` as ("results", conn_id, [ResultRow, ...], ready_at),
+    ready_at being when the oldest audio they were analysed from was written
+    (time.monotonic() is system-wide, so the web process can time the commands
+    from it), and a snapshot of this process's metrics as ("metrics", index, snapshot) at most
+    every METRICS_PUSH_INTERVAL_SECONDS.
+    """
+    setup_logging()
+    tag = f"[Inference {index}]"
+    models = _Models()
+    if config.WARM_UP_MODELS:
+        get_model_registry().warm_up()
+        models.parser.warm_up()
+    log.info(f"{tag} Ready")
+
+    sessions: Dict[int, LiveSession] = {}
+    metrics = get_metrics()
+    metrics_sent = 0.0
+    while True:
+        # Drain everything pending, so a backlog of audio notifications costs one pass
+        try:
+            messages = [inbox.get(timeout=config.METRICS_PUSH_INTERVAL_SECONDS)]
+        except queue.Empty:
+            messages = []
+        while True:
+            try:
+                messages.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+
+        # Connections with new audio -> when the oldest of it was written
+        dirty: Dict[int, float] = {}
+        for message in messages:
+            kind = message[0]
+            if kind == "stop":
+                for session in sessions.values():
+                    session.close()
+                log.info(f"{tag} Stopped")
+                stop_logging()
+                return
+            conn_id = message[1]
+            if kind == "open":
+                _, _, ring_name, capacity, settings = message
+                try:
+                    ring = SharedAudioRing(capacity, name=ring_name)
+                except (FileNotFoundError, OSError, ValueError) as e:
+                    log.error(f"{tag} Could not attach to the ring of connection {conn_id}: {e}")
+                    continue
+                previous = sessions.pop(conn_id, None)
+                if previous is not None:
+                    previous.close()
+                sessions[conn_id] = LiveSession(ring, models, settings)
+            elif kind == "close":
+                session = sessions.pop(conn_id, None)
+                if session is not None:
+                    log.info(f"{tag} Connection {conn_id}: {session.windows} windows analysed, "
+                             f"{session.dropped_stale} dropped as stale")
+                    session.close()
+                # The web process unlinks the ring only after this
+                outbox.put(("closed", conn_id))
+            elif kind == "configure" and conn_id in sessions:
+                sessions[conn_id].configure(message[2])
+            elif kind == "audio" and conn_id in sessions and conn_id not in dirty:
+                dirty[conn_id] = message[2]
+
+        for conn_id, ready_at in dirty.items():
+            session = sessions.get(conn_id)
+            if session is None:
+                continue
+            STAGE_SECONDS["queue_wait"].observe(time.monotonic() - ready_at)
+            try:
+                rows = session.process()
+            except Exception as e:
+                log.exception(f"{tag} Processing error for {conn_id}: {e}")
+                continue
+            if rows:
+                outbox.put(("results", conn_id, rows, ready_at))
+
+        now = time.monotonic()
+        if now - metrics_sent >= config.METRICS_PUSH_INTERVAL_SECONDS:
+            metrics_sent = now
+            outbox.put(("metrics", index, metrics.snapshot()))
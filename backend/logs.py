@@ -0,0 +1,160 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import config
+
+# Per-chunk lines (volume, speech duration, speaker matches, per-window
+# transcripts) all go to this one logger, so they can be switched off, or
+# rate limited, separately from everything else
+CHUNK_LOGGER = "playearone.chunk"
+
+_FORMAT = "%(asctime)s %(levelname)-7s %(processName)s %(message)s"
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for one part of the backend (e.g. "ws", "commands")."""
+    return logging.getLogger(f"playearone.{name}")
+
+
+class RateLimiter:
+    """
+    Lets through at most `per_second` records per call site (file and line)
+    each second, and counts the ones it suppressed in between.
+    """
+
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self._lock = threading.Lock()
+        # Call site -> (window start, records in window, suppressed)
+        self._sites: Dict[Tuple[str, int], Tuple[float, int, int]] = {}
+
+    def admit(self, site: Tuple[str, int], now: float) -> Optional[int]:
+        """None to suppress the record; otherwise how many were suppressed before it."""
+        with self._lock:
+            start, count, suppressed = self._sites.get(site, (now, 0, 0))
+            if now - start >= 1.0:
+                start, count = now, 0
+            if count >= self.per_second:
+                self._sites[site] = (start, count, suppressed + 1)
+                return None
+            self._sites[site] = (start, count + 1, 0)
+        return suppressed
+
+
+class ChunkLogger(logging.Logger):
+    """
+    The per-chunk logger. debug() checks the level, then the rate limit, and
+    only builds a record (caller lookup, LogRecord, queueing) for lines that
+    will be written. A logging.Filter would only see records already built,
+    which costs several microseconds per suppressed call. The first line let
+    through after a suppressed run says how many were dropped.
+    """
+
+    rate_limiter: Optional[RateLimiter] = None
+
+    def debug(self, msg, *args, **kwargs) -> None:
+        if not self.isEnabledFor(logging.DEBUG):
+            return
+        if self.rate_limiter is not None:
+            caller = sys._getframe(1)
+            suppressed = self.rate_limiter.admit((caller.f_code.co_filename, caller.f_lineno), time.time())
+            if suppressed is None:
+                return
+            if suppressed:
+                msg = f"{msg} ({suppressed} similar suppressed)"
+        # Attribute the record to our caller, not to this method
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+        self._log(logging.DEBUG, msg, args, **kwargs)
+
+
+# Created once as a ChunkLogger; every other logger keeps the default class
+_default_logger_class = logging.getLoggerClass()
+logging.setLoggerClass(ChunkLogger)
+_chunk_logger = logging.getLogger(CHUNK_LOGGER)
+logging.setLoggerClass(_default_logger_class)
+
+
+def get_chunk_logger() -> ChunkLogger:
+    """
+    Logger for lines written once per chunk or window.
+
+    Log to it at DEBUG with %-style arguments (not f-strings), so that with
+    LOG_CHUNKS off a call costs one cached level check and nothing is formatted.
+    """
+    return _chunk_logger
+
+
+class _BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread unformatted: formatting and writing
+    happen there, not on the event loop or an inference thread. When the
+    queue is full, records are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments are formatted later, on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[_BackgroundQueueHandler] = None
+
+
+def setup_logging() -> None:
+    """
+    Route the backend's loggers through a bounded queue to a stdout writer
+    thread. Levels come from LOG_LEVEL, and LOG_CHUNKS switches the per-chunk
+    logger on (rate limited to LOG_CHUNK_RATE_PER_SECOND lines per call site).
+    Safe to call more than once; each process calls it at startup.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter(_FORMAT))
+
+    _handler = _BackgroundQueueHandler(queue.Queue(config.LOG_QUEUE_SIZE))
+    _listener = logging.handlers.QueueListener(_handler.queue, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    root = logging.getLogger("playearone")
+    root.setLevel(config.LOG_LEVEL)
+    root.addHandler(_handler)
+    root.propagate = False
+
+    # Above CRITICAL: every call is rejected by the level check alone
+    _chunk_logger.setLevel(logging.DEBUG if config.LOG_CHUNKS else logging.CRITICAL + 1)
+    if config.LOG_CHUNK_RATE_PER_SECOND > 0:
+        _chunk_logger.rate_limiter = RateLimiter(config.LOG_CHUNK_RATE_PER_SECOND)
+
+
+def logging_stats() -> Dict[str, int]:
+    """Records waiting for the writer thread and records dropped on a full queue."""
+    if _handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
+
+
+def stop_logging() -> None:
+    """Flush pending records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -20,14 +20,25 @@ huggingface_hub.hf_hub_download = _patched_hf_hub_download
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from logs import logging_stats, setup_logging
+
+# Before anything logs: records are written by a background thread from here on
+setup_logging()
 
 from ws.handler import WebSocketHandler
-from speakers.storage import SpeakerStorage
+from ws.protocol import MAX_PLAYER
+from speakers.storage import get_speaker_storage
+from model_registry import get_model_registry
+from metrics import get_metrics
+from player_assignments import get_player_assignments
 import config
 
-# Initialize storage (creates data directory and speakers.json if needed)
-SpeakerStorage()
+# Initialize the shared stores (create the data directory and files if needed).
+# Both are file-backed, so every uvicorn worker sees the same speakers and players.
+speaker_storage = get_speaker_storage()
+player_assignments = get_player_assignments()
 
 app = FastAPI(title="PlayEarOne - Voice Command System")
 
@@ -43,6 +54,27 @@ app.add_middleware(
 # WebSocket handler
 ws_handler = WebSocketHandler()
 
+
+@app.on_event("startup")
+async def start_transcription_pool():
+    """Fork transcription workers (from here, not at import, so each server process forks its own once)."""
+    ws_handler.start_transcription_pool()
+
+
+@app.on_event("startup")
+async def start_inference_processes():
+    """Start inference processes (from here, not at import, so they aren't started on re-import)."""
+    ws_handler.start_inference_processes()
+
+
+@app.on_event("startup")
+async def warm_up_models():
+    """Load and warm models so the first command doesn't pay for it."""
+    if config.WARM_UP_MODELS:
+        import asyncio
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, ws_handler.warm_up)
+
 # Serve frontend static files
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
 
@@ -58,22 +90,65 @@ async def root():
 
 @app.get("/api/health")
 async def health():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint. Per-process stats endpoints describe the worker named here."""
+    return {"status": "healthy", "worker_pid": os.getpid()}
+
+
+@app.get("/api/models")
+async def model_footprint():
+    """Memory footprint of each loaded model."""
+    return {"models": get_model_registry().memory_footprint()}
+
+
+@app.get("/api/vad")
+async def vad_stats():
+    """How many analysis windows voice-activity detection kept away from the models."""
+    return ws_handler.vad_stats()
+
+
+@app.get("/api/queues")
+async def queue_stats():
+    """Per-connection processing queue depth and dropped-audio counts."""
+    return {"connections": ws_handler.queue_stats()}
+
+
+@app.get("/api/scheduler")
+async def scheduler_stats():
+    """Inference scheduler queue depths and per-priority counters."""
+    return ws_handler.scheduler.stats()
+
+
+@app.get("/api/inference")
+async def inference_stats():
+    """Inference processes and their connections (empty when inferring in-process)."""
+    pool = ws_handler.inference_pool
+    return pool.stats() if pool else {"processes": [], "connections": 0, "closing": 0, "restarts": 0, "results": 0}
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Hot-path latency histograms and counters, in the Prometheus text format."""
+    pool = ws_handler.inference_pool
+    text = get_metrics().render(pool.metrics_snapshots() if pool else ())
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/logging")
+async def log_stats():
+    """Log records waiting to be written and records dropped because the queue was full."""
+    return logging_stats()
 
 
 @app.get("/api/speakers")
 async def list_speakers():
     """List all enrolled speakers."""
-    storage = SpeakerStorage()
-    return {"speakers": storage.list_speaker_names()}
+    return {"speakers": speaker_storage.list_speaker_names()}
 
 
 @app.delete("/api/speakers/{name}")
 async def remove_speaker(name: str):
     """Remove an enrolled speaker."""
-    storage = SpeakerStorage()
-    success = storage.remove_speaker(name)
+    success = speaker_storage.remove_speaker(name)
     return {"success": success, "name": name}
 
 
@@ -85,17 +160,27 @@ async def get_config():
         "sample_rate": config.SAMPLE_RATE,
         "enrollment_duration_seconds": config.ENROLLMENT_DURATION_SECONDS,
         "chunk_duration_ms": config.CHUNK_DURATION_MS,
-        "player_assignments": config.PLAYER_ASSIGNMENTS
+        "analysis_window_seconds": config.ANALYSIS_WINDOW_SECONDS,
+        "analysis_hop_seconds": config.ANALYSIS_HOP_SECONDS,
+        "player_assignments": player_assignments.get_all()
     }
 
 
 @app.post("/api/player-assignments")
 async def update_player_assignments(assignments: dict):
     """Update player assignments. Body: {"speaker_name": player_number, ...}"""
-    # Update the runtime config
-    config.PLAYER_ASSIGNMENTS.clear()
-    config.PLAYER_ASSIGNMENTS.update(assignments)
-    return {"success": True, "player_assignments": config.PLAYER_ASSIGNMENTS}
+    invalid = [
+        name for name, player in assignments.items()
+        if not isinstance(player, int) or isinstance(player, bool) or not 0 <= player <= MAX_PLAYER
+    ]
+    if invalid:
+        return {"success": False, "error": f"Player numbers must be integers from 0 to {MAX_PLAYER}: {', '.join(invalid)}"}
+    # Written to the shared store, so every worker picks it up (file lock and
+    # fsync run on a thread, not the event loop)
+    import asyncio
+    loop = asyncio.get_event_loop()
+    updated = await loop.run_in_executor(None, player_assignments.replace, assignments)
+    return {"success": True, "player_assignments": updated}
 
 
 @app.websocket("/ws")
@@ -0,0 +1,199 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import config
+
+# Hot-path stages timed by the stage_seconds histogram
+STAGES = (
+    "frame_receive",       # Handling one incoming audio frame (decode, resample, buffer)
+    "queue_wait",          # Analysis window waiting in the connection's processing queue
+    "feature_extraction",  # RMS, silence check and model inputs
+    "speaker_id",          # Speaker embedding and matching
+    "vosk_decode",         # Transcription
+    "result_send",         # Serializing and sending a window's commands
+    "narration",           # Generating narrator audio for a command
+)
+
+# (name, labels) identifies one series; labels are sorted (key, value) pairs
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in seconds.
+
+    observe() is a bisect and two additions under a lock, so it is cheap
+    enough for every frame. Quantiles are estimated from the buckets the same
+    way Prometheus' histogram_quantile() does.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Iterable[float] = config.METRICS_BUCKETS_SECONDS):
+        self.bounds = tuple(sorted(bounds))
+        # One count per bound, plus the +Inf bucket (not cumulative here)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile (0-1), interpolating within the bucket it falls in."""
+        return _bucket_quantile(q, self.bounds, self.counts)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Counter:
+    """Monotonic counter."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+def _bucket_quantile(q: float, bounds: Tuple[float, ...], counts: List[int]) -> Optional[float]:
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if seen + count >= rank and count:
+            if index == len(bounds):
+                # Beyond the last bound: the best estimate is that bound
+                return bounds[-1]
+            lower = bounds[index - 1] if index else 0.0
+            return lower + (bounds[index] - lower) * (rank - seen) / count
+        seen += count
+    return bounds[-1]
+
+
+class MetricsRegistry:
+    """
+    This process's metrics, rendered in the Prometheus text exposition format.
+
+    Metrics are per process. Inference processes send snapshots of their
+    registry to the web process (see inference/pool.py), which adds them to
+    its own when rendering, so /api/metrics covers both.
+    """
+
+    def __init__(self, namespace: str = config.METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[SeriesKey, Histogram] = {}
+        self._counters: Dict[SeriesKey, Counter] = {}
+        self._help: Dict[str, str] = {}
+
+    def histogram(self, name: str, help: str, **labels: str) -> Histogram:
+        """The histogram for name and labels, created on first use."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+                self._help.setdefault(name, help)
+        return histogram
+
+    def counter(self, name: str, help: str, **labels: str) -> Counter:
+        """The counter for name and labels, created on first use."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = Counter()
+                self._help.setdefault(name, help)
+        return counter
+
+    def stage(self, stage: str) -> Histogram:
+        """Latency histogram for one of STAGES."""
+        return self.histogram("stage_seconds", "Time spent in each hot-path stage", stage=stage)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Picklable copy of every series (for sending between processes)."""
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+            help_text = dict(self._help)
+        return {
+            "help": help_text,
+            "histograms": {key: (histogram.bounds, *histogram.snapshot()) for key, histogram in histograms},
+            "counters": {key: counter.value for key, counter in counters}
+        }
+
+    def render(self, others: Iterable[Dict[str, dict]] = ()) -> str:
+        """Text exposition of this registry plus other processes' snapshots, summed per series."""
+        help_text: Dict[str, str] = {}
+        histograms: Dict[SeriesKey, list] = {}
+        counters: Dict[SeriesKey, int] = {}
+        for snapshot in (self.snapshot(), *others):
+            help_text.update(snapshot["help"])
+            for key, (bounds, counts, total, count) in snapshot["histograms"].items():
+                merged = histograms.setdefault(key, [bounds, [0] * len(counts), 0.0, 0])
+                merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                merged[2] += total
+                merged[3] += count
+            for key, value in snapshot["counters"].items():
+                counters[key] = counters.get(key, 0) + value
+
+        lines = []
+        for name in sorted({key[0] for key in histograms}):
+            full = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {full} {help_text.get(name, '')}")
+            lines.append(f"# TYPE {full} histogram")
+            for key in sorted(key for key in histograms if key[0] == name):
+                bounds, counts, total, count = histograms[key]
+                cumulative = 0
+                for bound, bucket in zip((*bounds, float("inf")), counts):
+                    cumulative += bucket
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{full}_bucket{_labels(key[1], le=le)} {cumulative}")
+                lines.append(f"{full}_sum{_labels(key[1])} {total!r}")
+                lines.append(f"{full}_count{_labels(key[1])} {count}")
+        for name in sorted({key[0] for key in counters}):
+            full = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {full} {help_text.get(name, '')}")
+            lines.append(f"# TYPE {full} counter")
+            for key in sorted(key for key in counters if key[0] == name):
+                lines.append(f"{full}{_labels(key[1])} {counters[key]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _metrics
+
+
+# Hot-path series, shared by the web process and the inference processes
+STAGE_SECONDS = {stage: _metrics.stage(stage) for stage in STAGES}
+COMMAND_LATENCY = _metrics.histogram(
+    "command_latency_seconds", "From an analysis window being ready to its commands being sent"
+)
+CHUNKS_PROCESSED = _metrics.counter("chunks_processed_total", "Analysis windows run through speaker ID and transcription")
+CHUNKS_SKIPPED_SILENT = _metrics.counter("chunks_skipped_silent_total", "Analysis windows skipped as silent (VAD or volume)")
+COMMANDS_SENT = _metrics.counter("commands_sent_total", "Commands sent to clients")
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import numpy as np
+import config
+from logs import get_logger
+
+log = get_logger("models")
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, where the platform exposes it."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Loads each model once per process and hands out shared handles.
+
+    Every consumer (enrollment, identification, command parsing) asks the
+    registry instead of building its own copy, so the process holds a single
+    Resemblyzer encoder and a single Vosk model.
+    """
+
+    def __init__(self):
+        # Reentrant: a loader may ask the registry for the models it wraps
+        self._lock = threading.RLock()
+        self._models: Dict[str, Any] = {}
+        self._footprints: Dict[str, Dict[str, Any]] = {}
+        # Batch window of the embedding service. Set to 0 before first use in
+        # processes where only one thread ever embeds: a batch never forms there
+        self.embedding_batch_window_ms = config.EMBEDDING_BATCH_WINDOW_MS
+
+    def _get(self, name: str, loader) -> Any:
+        """Return a model, loading it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                rss_before = _rss_bytes()
+                t0 = time.perf_counter()
+                model = loader()
+                footprint: Dict[str, Any] = {"load_seconds": round(time.perf_counter() - t0, 3)}
+                rss_after = _rss_bytes()
+                if rss_before is not None and rss_after is not None:
+                    footprint["rss_delta_bytes"] = rss_after - rss_before
+                self._footprints[name] = footprint
+                self._models[name] = model
+        return model
+
+    def voice_encoder(self):
+        """The shared Resemblyzer VoiceEncoder."""
+        def load():
+            from resemblyzer import VoiceEncoder
+            log.info("[Models] Loading Resemblyzer encoder...")
+            encoder = VoiceEncoder()
+            log.info("[Models] Resemblyzer encoder loaded")
+            return encoder
+
+        encoder = self._get("resemblyzer", load)
+        footprint = self._footprints["resemblyzer"]
+        if "parameter_bytes" not in footprint:
+            footprint["parameter_bytes"] = sum(
+                tensor.numel() * tensor.element_size()
+                for tensor in list(encoder.parameters()) + list(encoder.buffers())
+            )
+        return encoder
+
+    def embedding_service(self):
+        """The shared cross-connection embedding batcher around the encoder."""
+        # Resolved first, so the encoder's load isn't counted as the batcher's
+        encoder = self.voice_encoder()
+
+        def load():
+            from speakers.batching import EmbeddingService
+            return EmbeddingService(encoder, window_ms=self.embedding_batch_window_ms)
+
+        return self._get("embedding_service", load)
+
+    def vosk_model(self):
+        """The shared Vosk model."""
+        def load():
+            from vosk import Model
+
+            model_path = config.VOSK_MODEL_PATH
+            if not os.path.exists(model_path):
+                raise RuntimeError(
+                    f"Vosk model not found at {model_path}\n"
+                    f"Download from: https://alphacephei.com/vosk/models\n"
+                    f"Recommended: vosk-model-small-en-us-0.15 (~40MB)"
+                )
+
+            log.info("[Vosk] Loading model...")
+            model = Model(model_path)
+            log.info("[Vosk] Model loaded")
+            return model
+
+        return self._get("vosk", load)
+
+    def warm_up(self) -> None:
+        """Load every model and run a dummy inference so the first real request has normal latency."""
+        t0 = time.perf_counter()
+
+        # One second of quiet noise through the batcher, so its thread and the LSTM are warm
+        rng = np.random.default_rng(0)
+        noise = (rng.standard_normal(config.SAMPLE_RATE) * 0.01).astype(np.float32)
+        self.embedding_service().embed_utterance(noise)
+
+        from vosk import KaldiRecognizer
+        rec = KaldiRecognizer(self.vosk_model(), config.SAMPLE_RATE)
+        rec.AcceptWaveform(np.zeros(config.SAMPLE_RATE // 2, dtype=np.int16).tobytes())
+        rec.FinalResult()
+
+        log.info(f"[Models] Warm-up done in {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+    def memory_footprint(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load time, RSS growth at load and (where known) parameter bytes."""
+        return {name: dict(footprint) for name, footprint in self._footprints.items()}
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """The process-wide model registry."""
+    return _registry
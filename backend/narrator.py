@@ -1,4 +1,3 @@
-import os
 import base64
 import time
 import asyncio
@@ -6,6 +5,10 @@ import edge_tts
 from openai import OpenAI
 from typing import Optional
 import config
+from logs import get_logger
+
+log = get_logger("narrator")
+
 
 class Narrator:
     def __init__(self, game_type):
@@ -53,7 +56,7 @@ class Narrator:
             )
             return response.choices[0].message.content
         except Exception as e:
-            print(f"OpenRouter Text Error: {e}")
+            log.error(f"OpenRouter Text Error: {e}")
             return None
 
     async def generate_tts_audio(self, text: str) -> Optional[str]:
@@ -67,7 +70,7 @@ class Narrator:
             
             return base64.b64encode(audio_data).decode('utf-8')
         except Exception as e:
-            print(f"Edge-TTS Error: {e}")
+            log.error(f"Edge-TTS Error: {e}")
             return None
 
     async def get_narration(self, speaker: str, action: str) -> Optional[str]:
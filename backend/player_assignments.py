@@ -0,0 +1,124 @@
+import atexit
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+import config
+from shared_files import atomic_write, file_lock, stat_stamp
+from logs import get_logger
+
+log = get_logger("players")
+
+
+class PlayerAssignmentStore:
+    """
+    Speaker name → player number, shared by every server worker process.
+
+    The assignments live in a small JSON file. Reads are served from memory
+    and never touch the file (they happen on the event loop for every batch
+    of results); a background thread re-checks it every
+    PLAYER_ASSIGNMENTS_RELOAD_CHECK_SECONDS, so a change made through any
+    worker reaches all of them. Subscribers are
+    called whenever the assignments change, locally or in another process.
+    """
+
+    def __init__(self, filepath: str = config.PLAYER_ASSIGNMENTS_FILE):
+        self.filepath = filepath
+        self.lock_path = filepath + ".lock"
+        self.reload_interval = config.PLAYER_ASSIGNMENTS_RELOAD_CHECK_SECONDS
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, int]], None]] = []
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with file_lock(self.lock_path):
+            if not os.path.exists(filepath):
+                self._write(dict(config.PLAYER_ASSIGNMENTS))
+
+        self._assignments: Dict[str, int] = {}
+        self._stamp = None
+        self._reload()
+
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="player-assignments", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def _write(self, assignments: Dict[str, int]) -> None:
+        """Replace the file. Call with the file lock held."""
+        atomic_write(
+            self.filepath,
+            lambda f: f.write(json.dumps(assignments, indent=2).encode()),
+            prefix=".player-assignments-"
+        )
+
+    def _reload(self) -> bool:
+        """Re-read the file if it changed. Returns True if the assignments changed."""
+        with file_lock(self.lock_path, exclusive=False):
+            stamp = stat_stamp(self.filepath)
+            if stamp is None or stamp == self._stamp:
+                return False
+            with open(self.filepath, "r") as f:
+                assignments = json.load(f)
+        with self._lock:
+            self._stamp = stamp
+            changed = assignments != self._assignments
+            self._assignments = assignments
+        if changed:
+            self._notify(assignments)
+        return changed
+
+    def _notify(self, assignments: Dict[str, int]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(dict(assignments))
+            except Exception as e:
+                log.error(f"[PlayerAssignments] Listener error: {e}")
+
+    def _run(self) -> None:
+        """Background thread: pick up changes made by other processes."""
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self._reload()
+            except (OSError, ValueError) as e:
+                log.warning(f"[PlayerAssignments] Reload failed: {e}")
+
+    def close(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+
+    def get_all(self) -> Dict[str, int]:
+        """Current assignments (a copy)."""
+        return dict(self._assignments)
+
+    def get(self, speaker: str) -> Optional[int]:
+        """Player number of a speaker, or None if unassigned."""
+        return self._assignments.get(speaker)
+
+    def replace(self, assignments: Dict[str, int]) -> Dict[str, int]:
+        """Replace all assignments, for every worker. Blocks on file I/O: keep it off the event loop."""
+        assignments = dict(assignments)
+        with file_lock(self.lock_path):
+            self._write(assignments)
+            stamp = stat_stamp(self.filepath)
+        with self._lock:
+            self._stamp = stamp
+            self._assignments = assignments
+        self._notify(assignments)
+        return dict(assignments)
+
+    def subscribe(self, listener: Callable[[Dict[str, int]], None]) -> None:
+        """Call listener(assignments) whenever the assignments change."""
+        self._listeners.append(listener)
+
+
+_store: Optional[PlayerAssignmentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_player_assignments() -> PlayerAssignmentStore:
+    """Process-wide PlayerAssignmentStore, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlayerAssignmentStore()
+        return _store
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+from logs import get_logger
+
+log = get_logger("scheduler")
+
+
+class Priority(IntEnum):
+    """Inference priority classes, most urgent first."""
+    GAME = 0        # Live commands from a game
+    FRONTEND = 1    # Live commands from the web frontend
+    ENROLLMENT = 2  # Voice enrollment
+    DANCE = 3       # Long dance-description transcriptions
+
+
+class DeadlineExpired(Exception):
+    """The job's deadline passed before a worker could start it."""
+
+
+class _Job:
+    __slots__ = ("fn", "args", "future", "deadline")
+
+    def __init__(self, fn: Callable, args: tuple, future: Future, deadline: Optional[float]):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.deadline = deadline
+
+
+class InferenceScheduler:
+    """
+    Runs speaker-ID and transcription work on a fixed set of worker threads.
+
+    Workers always take a job from the most urgent non-empty priority class.
+    Within a class, connections (the job `key`) are served round-robin, so one
+    busy connection can't starve the others. A job whose deadline (a
+    time.monotonic() value) has passed when a worker reaches it is skipped and
+    its future fails with DeadlineExpired.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._cond = threading.Condition()
+        # Per priority: key -> pending jobs, in round-robin order
+        self._queues: List["OrderedDict[Hashable, Deque[_Job]]"] = [OrderedDict() for _ in Priority]
+
+        self.submitted = {priority.name.lower(): 0 for priority in Priority}
+        self.completed = {priority.name.lower(): 0 for priority in Priority}
+        self.expired = {priority.name.lower(): 0 for priority in Priority}
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"inference-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        fn: Callable,
+        *args: Any,
+        priority: Priority = Priority.FRONTEND,
+        key: Hashable = None,
+        deadline: Optional[float] = None
+    ) -> Future:
+        """Queue fn(*args); the returned future resolves to its result."""
+        future: Future = Future()
+        job = _Job(fn, args, future, deadline)
+        with self._cond:
+            self._queues[priority].setdefault(key, deque()).append(job)
+            self.submitted[Priority(priority).name.lower()] += 1
+            self._cond.notify()
+        return future
+
+    def _next_job(self) -> Optional[tuple]:
+        """Pop (priority, job) from the most urgent class, rotating between keys. Call with _cond held."""
+        for priority, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            key, jobs = next(iter(queue.items()))
+            job = jobs.popleft()
+            if jobs:
+                # This key goes to the back of the line
+                queue.move_to_end(key)
+            else:
+                del queue[key]
+            return Priority(priority), job
+        return None
+
+    def _run(self) -> None:
+        """Worker loop."""
+        while True:
+            with self._cond:
+                entry = self._next_job()
+                while entry is None:
+                    self._cond.wait()
+                    entry = self._next_job()
+            try:
+                self._execute(*entry)
+            except Exception as e:
+                # Whatever went wrong with one job, the worker keeps serving the rest
+                log.exception(f"[Scheduler] Worker error: {e}")
+
+    def _execute(self, priority: Priority, job: _Job) -> None:
+        """Run one job, or fail it with DeadlineExpired. Cancelled jobs are skipped."""
+        name = priority.name.lower()
+        # A future cancelled while queued (e.g. its connection closed) can't take a result
+        if not job.future.set_running_or_notify_cancel():
+            return
+
+        if job.deadline is not None and time.monotonic() > job.deadline:
+            with self._cond:
+                self.expired[name] += 1
+            job.future.set_exception(DeadlineExpired())
+            return
+
+        try:
+            result = job.fn(*job.args)
+        except BaseException as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        with self._cond:
+            self.completed[name] += 1
+
+    def pending(self) -> Dict[str, int]:
+        """Jobs waiting in each priority class."""
+        with self._cond:
+            return {
+                priority.name.lower(): sum(len(jobs) for jobs in self._queues[priority].values())
+                for priority in Priority
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker count, queue depths and per-class counters."""
+        pending = self.pending()
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "pending": pending,
+                "submitted": dict(self.submitted),
+                "completed": dict(self.completed),
+                "expired": dict(self.expired)
+            }
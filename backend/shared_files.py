@@ -0,0 +1,50 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, BinaryIO
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str, exclusive: bool = True) -> Iterator[None]:
+    """
+    Advisory lock shared by every process using the same lock file.
+    Readers take it shared, writers exclusive. A no-op where fcntl is unavailable.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def atomic_write(path: str, write: Callable[[BinaryIO], None], prefix: str = ".tmp-") -> None:
+    """Write a file via a temp file in the same directory and os.replace."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=prefix, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def stat_stamp(path: str):
+    """(mtime, size, inode) of a file, or None if it is missing; changes whenever the file is replaced."""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except OSError:
+        return None
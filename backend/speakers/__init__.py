@@ -1,5 +1,7 @@
+from .batching import EmbeddingService
 from .enrollment import SpeakerEnrollment
 from .identifier import SpeakerIdentifier
-from .storage import SpeakerStorage
+from .index import SpeakerIndex
+from .storage import SpeakerStorage, get_speaker_storage
 
-__all__ = ["SpeakerEnrollment", "SpeakerIdentifier", "SpeakerStorage"]
+__all__ = ["EmbeddingService", "SpeakerEnrollment", "SpeakerIdentifier", "SpeakerIndex", "SpeakerStorage", "get_speaker_storage"]
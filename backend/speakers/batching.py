@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+import numpy as np
+import torch
+from resemblyzer import audio
+import config
+
+
+class _EmbeddingRequest:
+    __slots__ = ("mels", "future")
+
+    def __init__(self, mels: np.ndarray, future: Future):
+        self.mels = mels
+        self.future = future
+
+
+class EmbeddingService:
+    """
+    Micro-batches Resemblyzer embedding requests from all connections.
+
+    Callers turn their audio into partial-utterance mel frames on their own
+    thread, then queue them. A single worker collects whatever arrives within
+    `window_ms` of the first pending request (up to `max_batch` utterances),
+    runs all their frames through the encoder's LSTM as one batch and resolves
+    each caller's future with its own embedding. The window bounds the extra
+    latency a request can pick up while waiting for company.
+    """
+
+    def __init__(
+        self,
+        encoder,
+        window_ms: float = config.EMBEDDING_BATCH_WINDOW_MS,
+        max_batch: int = config.EMBEDDING_BATCH_MAX_UTTERANCES
+    ):
+        self.encoder = encoder
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[_EmbeddingRequest]" = queue.Queue()
+
+        self.batches = 0
+        self.utterances = 0
+
+        if self.window > 0:
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def partial_mels(self, wav: np.ndarray, rate: float = 1.3, min_coverage: float = 0.75) -> np.ndarray:
+        """Split a preprocessed wav into the partial mel frames embed_utterance would use."""
+        wav_slices, mel_slices = self.encoder.compute_partial_slices(len(wav), rate, min_coverage)
+        max_wave_length = wav_slices[-1].stop
+        if max_wave_length >= len(wav):
+            wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
+        mel = audio.wav_to_mel_spectrogram(wav)
+        return np.array([mel[s] for s in mel_slices])
+
+    def submit(self, wav: np.ndarray) -> Future:
+        """Queue a preprocessed wav; the future resolves to its 256-dim embedding."""
+        future: Future = Future()
+        self._queue.put(_EmbeddingRequest(self.partial_mels(wav), future))
+        return future
+
+    def embed_utterance(self, wav: np.ndarray) -> np.ndarray:
+        """Embed one utterance, batched with concurrent callers when batching is enabled."""
+        return self.embed_async(wav).result()
+
+    def embed_async(self, wav: np.ndarray) -> Future:
+        """
+        Like embed_utterance, but return a future instead of waiting for the
+        batch, so the caller's thread is free meanwhile. Without batching the
+        embedding is computed here and the future is already resolved.
+        """
+        if self.window > 0:
+            return self.submit(wav)
+        future: Future = Future()
+        future.set_result(self.encoder.embed_utterance(wav))
+        return future
+
+    def stats(self) -> Dict[str, float]:
+        """Batch counters, for checking how well requests are being grouped."""
+        return {
+            "batches": self.batches,
+            "utterances": self.utterances,
+            "mean_batch_size": self.utterances / self.batches if self.batches else 0.0
+        }
+
+    def _run(self) -> None:
+        """Worker loop: gather a batch over the window, then run it."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_EmbeddingRequest]) -> None:
+        """One forward pass for every partial of every request in the batch."""
+        try:
+            mels = np.concatenate([request.mels for request in batch])
+            with torch.no_grad():
+                frames = torch.from_numpy(mels).to(self.encoder.device)
+                partial_embeds = self.encoder(frames).cpu().numpy()
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.utterances += len(batch)
+
+        offset = 0
+        for request in batch:
+            count = len(request.mels)
+            raw_embed = np.mean(partial_embeds[offset:offset + count], axis=0)
+            offset += count
+            request.future.set_result(raw_embed / np.linalg.norm(raw_embed, 2))
@@ -1,64 +1,71 @@
 import numpy as np
-import torch
+from concurrent.futures import Future
 from typing import Optional, Tuple
-from resemblyzer import VoiceEncoder, preprocess_wav
-import config
-from .storage import SpeakerStorage
+from resemblyzer import preprocess_wav
+from logs import get_logger
+from model_registry import get_model_registry
+from .batching import EmbeddingService
+from .storage import SpeakerStorage, get_speaker_storage
+
+log = get_logger("speakers")
 
 
 class SpeakerEnrollment:
     """Handles voice enrollment for new speakers using Resemblyzer (fast, local)."""
 
     def __init__(self, storage: Optional[SpeakerStorage] = None):
-        self.storage = storage or SpeakerStorage()
+        self.storage = storage or get_speaker_storage()
         self._encoder = None
+        self._embedder: Optional[EmbeddingService] = None
 
     def _load_model(self) -> None:
-        """Lazy load the Resemblyzer encoder."""
+        """Fetch the shared Resemblyzer encoder (loaded once per process)."""
         if self._encoder is None:
-            print("[Speaker] Loading Resemblyzer encoder...")
-            self._encoder = VoiceEncoder()
-            print("[Speaker] Resemblyzer encoder loaded")
+            registry = get_model_registry()
+            # Batches concurrent embedding requests from all connections
+            self._embedder = registry.embedding_service()
+            self._encoder = registry.voice_encoder()
 
-    def extract_embedding(self, audio: torch.Tensor, sample_rate: int) -> np.ndarray:
+    def extract_embedding(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
         """
         Extract speaker embedding from audio using Resemblyzer.
 
         Args:
-            audio: Torch tensor of shape (channels, samples) or (samples,)
+            audio: Float32 array of shape (samples,), or (channels, samples)
+                in which case the first channel is used
             sample_rate: Audio sample rate
 
         Returns:
             Speaker embedding as numpy array (256-dim)
         """
-        self._load_model()
+        return self.extract_embedding_async(audio, sample_rate).result()
 
-        # Convert torch tensor to numpy
-        if isinstance(audio, torch.Tensor):
-            audio_np = audio.numpy()
-        else:
-            audio_np = audio
+    def extract_embedding_async(self, audio: np.ndarray, sample_rate: int) -> Future:
+        """
+        Preprocess audio on this thread and queue it for embedding; the future
+        resolves to the 256-dim embedding once its batch has run.
+        """
+        self._load_model()
 
-        # Handle multi-channel audio - take first channel or squeeze
-        if audio_np.ndim == 2:
-            audio_np = audio_np[0]  # Take first channel
+        # Handle multi-channel audio - take first channel
+        if audio.ndim == 2:
+            audio = audio[0]
 
-        audio_np = audio_np.astype(np.float32)
+        # No copy when the caller already passes float32 (prepare_for_embedding does)
+        audio = np.asarray(audio, dtype=np.float32)
 
         # Preprocess for Resemblyzer (resamples to 16kHz if needed)
-        wav = preprocess_wav(audio_np, source_sr=sample_rate)
+        wav = preprocess_wav(audio, source_sr=sample_rate)
 
-        # Extract embedding
-        embedding = self._encoder.embed_utterance(wav)
-        return embedding
+        return self._embedder.embed_async(wav)
 
-    def enroll(self, name: str, audio: torch.Tensor, sample_rate: int) -> Tuple[bool, str]:
+    def enroll(self, name: str, audio: np.ndarray, sample_rate: int) -> Tuple[bool, str]:
         """
         Enroll a new speaker with their voice sample.
 
         Args:
             name: Speaker's name
-            audio: Audio tensor (channels, samples)
+            audio: Float32 audio samples
             sample_rate: Audio sample rate
 
         Returns:
@@ -87,7 +94,7 @@ class SpeakerEnrollment:
 
             # Debug: check embedding quality
             embedding_norm = np.linalg.norm(embedding)
-            print(f"[Enrollment] Speaker: {name}, embedding norm: {embedding_norm:.3f}, shape: {embedding.shape}")
+            log.info(f"[Enrollment] Speaker: {name}, embedding norm: {embedding_norm:.3f}, shape: {embedding.shape}")
 
             # Normalize the embedding
             if embedding_norm > 0:
@@ -105,13 +112,13 @@ class SpeakerEnrollment:
             traceback.print_exc()
             return False, f"Enrollment failed: {str(e)}"
 
-    def re_enroll(self, name: str, audio: torch.Tensor, sample_rate: int) -> Tuple[bool, str]:
+    def re_enroll(self, name: str, audio: np.ndarray, sample_rate: int) -> Tuple[bool, str]:
         """
         Re-enroll an existing speaker with new voice sample.
 
         Args:
             name: Speaker's name
-            audio: Audio tensor (channels, samples)
+            audio: Float32 audio samples
             sample_rate: Audio sample rate
 
         Returns:
@@ -1,10 +1,15 @@
 import numpy as np
-import torch
-from typing import Optional, Tuple, List
+from concurrent.futures import Future
+from typing import Optional, List
 from dataclasses import dataclass
 import config
+from logs import get_chunk_logger
 from .enrollment import SpeakerEnrollment
-from .storage import SpeakerStorage
+from .index import SpeakerIndex
+from .storage import SpeakerStorage, get_speaker_storage
+
+# One line per identified window: off unless LOG_CHUNKS
+chunk_log = get_chunk_logger()
 
 
 @dataclass
@@ -23,26 +28,52 @@ class SpeakerIdentifier:
         storage: Optional[SpeakerStorage] = None,
         threshold: float = config.SPEAKER_SIMILARITY_THRESHOLD
     ):
-        self.storage = storage or SpeakerStorage()
+        self.storage = storage or get_speaker_storage()
         self.threshold = threshold
         self._enrollment = SpeakerEnrollment(self.storage)
 
-    def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
-        """Compute cosine similarity between two vectors."""
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
-
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-
-        return float(np.dot(a, b) / (norm_a * norm_b))
+        # Embedding index, rebuilt when the storage revision changes
+        self._index: Optional[SpeakerIndex] = None
+        self._index_revision = None
+
+    def _get_index(self) -> SpeakerIndex:
+        """Return the embedding index, rebuilding it if speakers were added, removed or updated."""
+        revision = self.storage.revision()
+        index = self._index
+        if index is None or revision != self._index_revision:
+            index = SpeakerIndex(*self.storage.get_embedding_matrix())
+            self._index = index
+            self._index_revision = revision
+        return index
+
+    def invalidate(self) -> None:
+        """Drop the cached embedding index."""
+        self._index = None
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        embedding_norm = np.linalg.norm(embedding)
+        if embedding_norm > 0:
+            embedding = embedding / embedding_norm
+        return embedding
+
+    def _embed(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Extract a unit-length embedding from audio."""
+        return self._unit(self._enrollment.extract_embedding(audio, sample_rate))
+
+    def embed_async(self, audio: np.ndarray, sample_rate: int) -> Future:
+        """
+        Preprocess audio on this thread and queue it for embedding, without
+        waiting for the batch. Pass the future's result to match().
+        """
+        return self._enrollment.extract_embedding_async(audio, sample_rate)
 
-    def identify(self, audio: torch.Tensor, sample_rate: int, allowed_speakers: Optional[List[str]] = None) -> SpeakerMatch:
+    def identify(self, audio: np.ndarray, sample_rate: int, allowed_speakers: Optional[List[str]] = None) -> SpeakerMatch:
         """
         Identify a speaker from audio.
 
         Args:
-            audio: Audio tensor (channels, samples)
+            audio: Float32 audio samples
             sample_rate: Audio sample rate
             allowed_speakers: Optional list of speaker names to restrict identification to
 
@@ -51,61 +82,38 @@ class SpeakerIdentifier:
         """
         # Extract embedding from input audio
         try:
-            input_embedding = self._enrollment.extract_embedding(audio, sample_rate)
-            # Normalize the embedding
-            embedding_norm = np.linalg.norm(input_embedding)
-            if embedding_norm > 0:
-                input_embedding = input_embedding / embedding_norm
-            print(f"[Speaker ID] Input embedding norm after normalization: {np.linalg.norm(input_embedding):.3f}")
-        except Exception as e:
+            embedding = self._enrollment.extract_embedding(audio, sample_rate)
+        except Exception:
+            embedding = None
+        return self.match(embedding, allowed_speakers)
+
+    def match(self, embedding: Optional[np.ndarray], allowed_speakers: Optional[List[str]] = None) -> SpeakerMatch:
+        """Match an embedding (None when embedding failed) against enrolled speakers."""
+        if embedding is None:
             return SpeakerMatch(
                 name="Unknown",
                 confidence=0.0,
                 is_known=False
             )
+        input_embedding = self._unit(embedding)
 
-        # Get all enrolled speakers
-        speakers = self.storage.get_all_speakers()
+        # Score against all enrolled (or allowed) speakers at once
+        names, similarities = self._get_index().scores(input_embedding, allowed_speakers)
 
-        if not speakers:
+        if not names:
             return SpeakerMatch(
                 name="Unknown",
                 confidence=0.0,
                 is_known=False
             )
 
-        # Filter to allowed speakers if specified
-        if allowed_speakers:
-            speakers = [s for s in speakers if s["name"] in allowed_speakers]
-            if not speakers:
-                return SpeakerMatch(
-                    name="Unknown",
-                    confidence=0.0,
-                    is_known=False
-                )
-
         # Find best match
-        best_match: Optional[str] = None
-        best_similarity: float = -1.0
-
-        for speaker in speakers:
-            # Ensure stored embedding is normalized
-            stored_embedding = np.array(speaker["embedding"])
-            stored_norm = np.linalg.norm(stored_embedding)
-            if stored_norm > 0:
-                stored_embedding = stored_embedding / stored_norm
-            
-            similarity = self._cosine_similarity(
-                input_embedding,
-                stored_embedding
-            )
+        best = int(np.argmax(similarities))
+        best_match: Optional[str] = names[best]
+        best_similarity: float = float(similarities[best])
 
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = speaker["name"]
-
-        # Debug logging
-        print(f"[Speaker ID] Best match: {best_match}, similarity: {best_similarity:.3f}, allowed: {allowed_speakers}")
+        chunk_log.debug("[Speaker ID] Best match: %s, similarity: %.3f, allowed: %s",
+                        best_match, best_similarity, allowed_speakers)
 
         # Use lower threshold when restricted to game players
         threshold = config.SPEAKER_GAME_THRESHOLD if allowed_speakers else self.threshold
@@ -126,7 +134,7 @@ class SpeakerIdentifier:
 
     def identify_with_alternatives(
         self,
-        audio: torch.Tensor,
+        audio: np.ndarray,
         sample_rate: int,
         top_k: int = 3
     ) -> List[SpeakerMatch]:
@@ -136,28 +144,16 @@ class SpeakerIdentifier:
         Returns list of potential matches sorted by confidence.
         """
         try:
-            input_embedding = self._enrollment.extract_embedding(audio, sample_rate)
+            input_embedding = self._embed(audio, sample_rate)
         except Exception:
             return [SpeakerMatch(name="Unknown", confidence=0.0, is_known=False)]
 
-        speakers = self.storage.get_all_speakers()
+        top = self._get_index().top_k(input_embedding, top_k)
 
-        if not speakers:
+        if not top:
             return [SpeakerMatch(name="Unknown", confidence=0.0, is_known=False)]
 
-        # Calculate similarities for all speakers
-        matches = []
-        for speaker in speakers:
-            similarity = self._cosine_similarity(
-                input_embedding,
-                speaker["embedding"]
-            )
-            matches.append(SpeakerMatch(
-                name=speaker["name"],
-                confidence=similarity,
-                is_known=similarity >= self.threshold
-            ))
-
-        # Sort by confidence and return top-k
-        matches.sort(key=lambda x: x.confidence, reverse=True)
-        return matches[:top_k]
+        return [
+            SpeakerMatch(name=name, confidence=similarity, is_known=similarity >= self.threshold)
+            for name, similarity in top
+        ]
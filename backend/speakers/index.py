@@ -0,0 +1,70 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class SpeakerIndex:
+    """
+    In-memory (N, dim) float32 matrix of pre-normalized speaker embeddings.
+
+    Scoring an input embedding against every enrolled speaker is a single
+    matrix-vector product. Subsets restricted to a list of allowed speakers
+    are built once and cached.
+    """
+
+    def __init__(self, names: List[str], matrix: np.ndarray):
+        """Build from a names list and an (N, dim) embedding matrix of any float dtype."""
+        self.names: List[str] = list(names)
+        if self.names:
+            matrix = np.asarray(matrix, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = matrix / norms
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._subsets: Dict[Tuple[str, ...], Tuple[List[str], np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _subset(self, allowed_speakers: Optional[List[str]]) -> Tuple[List[str], np.ndarray]:
+        """Names and rows for the allowed speakers (all speakers when None)."""
+        if not allowed_speakers:
+            return self.names, self.matrix
+
+        key = tuple(sorted(allowed_speakers))
+        subset = self._subsets.get(key)
+        if subset is None:
+            allowed = set(allowed_speakers)
+            rows = [i for i, name in enumerate(self.names) if name in allowed]
+            subset = ([self.names[i] for i in rows], self.matrix[rows])
+            self._subsets[key] = subset
+        return subset
+
+    def scores(
+        self,
+        embedding: np.ndarray,
+        allowed_speakers: Optional[List[str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Cosine similarity of a normalized embedding to each (allowed) speaker."""
+        names, matrix = self._subset(allowed_speakers)
+        if not names:
+            return names, np.zeros(0, dtype=np.float32)
+        return names, matrix @ embedding.astype(np.float32, copy=False)
+
+    def top_k(
+        self,
+        embedding: np.ndarray,
+        k: int,
+        allowed_speakers: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """The k most similar speakers as (name, similarity), best first."""
+        names, similarities = self.scores(embedding, allowed_speakers)
+        if not names or k <= 0:
+            return []
+
+        if k < len(names):
+            candidates = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            candidates = np.arange(len(names))
+        candidates = candidates[np.argsort(-similarities[candidates])]
+        return [(names[i], float(similarities[i])) for i in candidates]
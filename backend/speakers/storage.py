@@ -1,110 +1,385 @@
+import atexit
 import json
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import config
+from shared_files import atomic_write, file_lock, stat_stamp
+from logs import get_logger
+
+log = get_logger("speakers")
+
+# (profiles, embedding matrix)
+State = Tuple[List[Dict], np.ndarray]
 
 
 class SpeakerStorage:
-    """Handles persistence of speaker profiles and embeddings."""
+    """
+    Handles persistence of speaker profiles and embeddings.
+
+    On disk, embeddings are one contiguous (N, dim) matrix in a .npy file that
+    is memory-mapped read-only, so every process serving the same data shares
+    one page-cached copy. A small JSON sidecar holds names, enrollment times
+    and the name of the current .npy file. Replacing the sidecar is the single
+    atomic commit point, so readers never see a half-written database.
+
+    Profiles are loaded once and served from memory. Changes are written by a
+    background thread: writes made within SPEAKERS_SAVE_DELAY_SECONDS of each
+    other are coalesced into one write, and the sidecar's mtime is polled so
+    edits made outside this process are picked up. No method other than
+    flush() touches the disk after construction.
 
-    def __init__(self, filepath: str = config.SPEAKERS_FILE):
+    Several server worker processes can share one database. File access is
+    serialized by an advisory lock file, and each store keeps the changes it
+    hasn't written yet as a list of operations: if another process wrote in
+    the meantime, flush() replays them on top of that process's data instead
+    of overwriting it.
+    """
+
+    def __init__(
+        self,
+        filepath: str = config.SPEAKERS_META_FILE,
+        legacy_filepath: Optional[str] = config.SPEAKERS_FILE,
+        dtype: str = config.SPEAKERS_EMBEDDING_DTYPE
+    ):
         self.filepath = filepath
+        self.directory = os.path.dirname(filepath)
+        self.lock_path = filepath + ".lock"
+        self.legacy_filepath = legacy_filepath
+        self.dtype = np.dtype(dtype)
+        self.save_delay = config.SPEAKERS_SAVE_DELAY_SECONDS
+        self.reload_interval = config.SPEAKERS_RELOAD_CHECK_SECONDS
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        # Bumped whenever the in-memory speakers change
+        self._version = 0
+        self._dirty = False
+        # Operations applied in memory but not yet written
+        self._pending_ops: List[tuple] = []
+        self._flush_due = 0.0
+        self._reload_due = time.monotonic() + self.reload_interval
+        self._file_stamp = None
+        # Embeddings file the sidecar currently points to
+        self._embeddings_name: Optional[str] = None
+
         self._ensure_file_exists()
+        # (profiles, embedding matrix), always replaced together
+        self._state: State = self._load_data()
+
+        self._worker = threading.Thread(target=self._run, name="speaker-storage", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
 
     def _ensure_file_exists(self) -> None:
-        """Create speakers file if it doesn't exist."""
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        if not os.path.exists(self.filepath):
-            self._save_data({"speakers": []})
+        """Create the speaker database if needed, migrating the legacy JSON file once."""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.filepath):
+            return
 
-    def _load_data(self) -> Dict:
-        """Load speakers data from file."""
+        with self._io_lock, file_lock(self.lock_path):
+            # Another worker may have created it while we waited for the lock
+            if os.path.exists(self.filepath):
+                return
+
+            profiles: List[Dict] = []
+            matrix = np.zeros((0, config.SPEAKER_EMBEDDING_DIM), dtype=self.dtype)
+            if self.legacy_filepath and os.path.exists(self.legacy_filepath):
+                with open(self.legacy_filepath, "r") as f:
+                    legacy = json.load(f)
+                speakers = legacy.get("speakers", [])
+                profiles = [{"name": s["name"], "enrolled_at": s["enrolled_at"]} for s in speakers]
+                if speakers:
+                    matrix = np.array([s["embedding"] for s in speakers], dtype=self.dtype)
+                log.info(f"[SpeakerStorage] Migrated {len(profiles)} speakers from {self.legacy_filepath}")
+
+            self._write_files(profiles, matrix)
+
+    def _stat_stamp(self) -> Optional[tuple]:
+        """Stamp of the sidecar file, or None if it is missing."""
+        return stat_stamp(self.filepath)
+
+    def _read_files(self) -> Tuple[State, Optional[tuple], str]:
+        """
+        Read the sidecar and map its matrix. Call with the file lock held.
+        Returns (state, sidecar stamp, embeddings file name).
+        """
         with open(self.filepath, "r") as f:
-            return json.load(f)
+            meta = json.load(f)
+        stamp = self._stat_stamp()
+        profiles = meta["speakers"]
+        embeddings_path = os.path.join(self.directory, meta["embeddings"])
+        if profiles:
+            matrix = np.load(embeddings_path, mmap_mode="r")
+        else:
+            matrix = np.load(embeddings_path)
+        if len(matrix) != len(profiles):
+            raise ValueError(f"{embeddings_path} has {len(matrix)} rows for {len(profiles)} speakers")
+        return (profiles, matrix), stamp, meta["embeddings"]
 
-    def _save_data(self, data: Dict) -> None:
-        """Save speakers data to file."""
-        with open(self.filepath, "w") as f:
-            json.dump(data, f, indent=2)
+    def _load_data(self) -> State:
+        """Load profiles and memory-map the embedding matrix they point to."""
+        with self._io_lock, file_lock(self.lock_path, exclusive=False):
+            state, self._file_stamp, self._embeddings_name = self._read_files()
+        return state
 
-    def add_speaker(self, name: str, embedding: np.ndarray) -> bool:
+    def _write_files(self, profiles: List[Dict], matrix: np.ndarray) -> None:
         """
-        Add a new speaker profile.
-        Returns False if speaker with same name already exists.
+        Write a new embeddings file, then commit it by replacing the sidecar.
+        Call with _io_lock and the exclusive file lock held.
+        """
+        embeddings_name = f"speakers-{time.time_ns()}.npy"
+        atomic_write(
+            os.path.join(self.directory, embeddings_name),
+            lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=self.dtype)),
+            prefix=".speakers-"
+        )
+        meta = {
+            "embeddings": embeddings_name,
+            "dtype": self.dtype.name,
+            "speakers": profiles
+        }
+        atomic_write(self.filepath, lambda f: f.write(json.dumps(meta, indent=2).encode()), prefix=".speakers-")
+        self._file_stamp = self._stat_stamp()
+
+        # Drop the matrix we replaced; anyone still mapping it keeps a valid view
+        previous, self._embeddings_name = self._embeddings_name, embeddings_name
+        if previous and previous != embeddings_name:
+            try:
+                os.unlink(os.path.join(self.directory, previous))
+            except OSError:
+                pass
+
+    def _apply(self, state: State, op: tuple) -> Tuple[State, Any]:
+        """
+        Apply one operation to (profiles, matrix) without modifying them.
+        Returns the new state and the operation's result (falsy if it changed nothing).
         """
-        data = self._load_data()
+        profiles, matrix = state
+        kind = op[0]
+
+        if kind == "add":
+            _, profile, row = op
+            # Check for duplicate name
+            if self._find(profiles, profile["name"]) is not None:
+                return state, False
+            row = row.reshape(1, -1)
+            new_matrix = row if len(matrix) == 0 else np.concatenate([matrix, row])
+            return (profiles + [profile], new_matrix), True
+
+        if kind == "remove":
+            _, name = op
+            keep = [i for i, s in enumerate(profiles) if s["name"].lower() != name.lower()]
+            if len(keep) == len(profiles):
+                return state, False
+            return ([profiles[i] for i in keep], np.asarray(matrix)[keep]), True
+
+        if kind == "update":
+            _, name, row, enrolled_at = op
+            i = self._find(profiles, name)
+            if i is None:
+                return state, False
+            new_profiles = list(profiles)
+            new_profiles[i] = {**profiles[i], "enrolled_at": enrolled_at}
+            new_matrix = np.array(matrix)
+            new_matrix[i] = row
+            return (new_profiles, new_matrix), True
+
+        if kind == "clear":
+            dim = matrix.shape[1] if matrix.ndim == 2 and matrix.shape[1] else config.SPEAKER_EMBEDDING_DIM
+            return ([], np.zeros((0, dim), dtype=self.dtype)), True
+
+        raise ValueError(f"Unknown speaker operation '{kind}'")
+
+    def _commit(self, op: tuple) -> Any:
+        """Apply an operation to the in-memory speakers and schedule a write."""
+        with self._lock:
+            state, result = self._apply(self._state, op)
+            if result:
+                self._set_state(state, op)
+            return result
+
+    def _set_state(self, state: State, op: tuple) -> None:
+        """Swap in new speakers and schedule a write. Call with _lock held."""
+        self._state = state
+        self._pending_ops.append(op)
+        self._version += 1
+        if not self._dirty:
+            self._dirty = True
+            self._flush_due = time.monotonic() + self.save_delay
+            self._wake.set()
 
-        # Check for duplicate name
-        for speaker in data["speakers"]:
+    def _run(self) -> None:
+        """Background thread: debounced writes and external change detection."""
+        while not self._closed:
+            with self._lock:
+                due = self._flush_due if self._dirty else self._reload_due
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+
+            try:
+                if self._dirty:
+                    self.flush()
+                else:
+                    self._reload_if_changed()
+                    self._reload_due = time.monotonic() + self.reload_interval
+            except Exception as e:
+                log.error(f"[SpeakerStorage] Background I/O error: {e}")
+                self._reload_due = time.monotonic() + self.reload_interval
+
+    def _reload_if_changed(self) -> None:
+        """Reload the database if something other than this store modified it."""
+        stamp = self._stat_stamp()
+        if stamp is None or stamp == self._file_stamp:
+            return
+        with self._io_lock, file_lock(self.lock_path, exclusive=False):
+            state, stamp, embeddings_name = self._read_files()
+        with self._lock:
+            # With local changes pending, flush() merges them with the external edit
+            if self._dirty:
+                return
+            self._state = state
+            self._file_stamp = stamp
+            self._embeddings_name = embeddings_name
+            self._version += 1
+        log.info(f"[SpeakerStorage] Reloaded {self.filepath} after external change")
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        with self._lock:
+            if not self._dirty:
+                return
+            state = self._state
+            ops, self._pending_ops = self._pending_ops, []
+            self._dirty = False
+
+        try:
+            merged = False
+            with self._io_lock, file_lock(self.lock_path):
+                if self._stat_stamp() != self._file_stamp:
+                    # Another process wrote since we last loaded: redo our changes on its data
+                    state, _, self._embeddings_name = self._read_files()
+                    for op in ops:
+                        state, _ = self._apply(state, op)
+                    merged = True
+                self._write_files(*state)
+        except Exception:
+            with self._lock:
+                self._pending_ops = ops + self._pending_ops
+                if not self._dirty:
+                    self._dirty = True
+                    self._flush_due = time.monotonic() + self.save_delay
+            raise
+
+        if merged:
+            with self._lock:
+                # Keep changes made while we were writing on top of the merged data
+                for op in self._pending_ops:
+                    state, _ = self._apply(state, op)
+                self._state = state
+                self._version += 1
+            log.info("[SpeakerStorage] Merged local changes with another process's update")
+
+    def close(self) -> None:
+        """Flush pending changes and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def revision(self) -> int:
+        """Counter that changes whenever the stored speakers change, so callers can cache derived data."""
+        return self._version
+
+    def _find(self, profiles: List[Dict], name: str) -> Optional[int]:
+        """Index of a speaker by case-insensitive name."""
+        for i, speaker in enumerate(profiles):
             if speaker["name"].lower() == name.lower():
-                return False
+                return i
+        return None
 
+    def add_speaker(self, name: str, embedding: np.ndarray) -> bool:
+        """
+        Add a new speaker profile.
+        Returns False if speaker with same name already exists.
+        """
         speaker_profile = {
             "name": name,
-            "enrolled_at": datetime.utcnow().isoformat() + "Z",
-            "embedding": embedding.tolist()
+            "enrolled_at": datetime.utcnow().isoformat() + "Z"
         }
-
-        data["speakers"].append(speaker_profile)
-        self._save_data(data)
-        return True
+        row = np.asarray(embedding, dtype=self.dtype)
+        return bool(self._commit(("add", speaker_profile, row)))
 
     def get_speaker(self, name: str) -> Optional[Dict]:
         """Get a speaker profile by name."""
-        data = self._load_data()
-        for speaker in data["speakers"]:
-            if speaker["name"].lower() == name.lower():
-                return {
-                    "name": speaker["name"],
-                    "enrolled_at": speaker["enrolled_at"],
-                    "embedding": np.array(speaker["embedding"], dtype=np.float32)
-                }
-        return None
+        profiles, matrix = self._state
+        i = self._find(profiles, name)
+        if i is None:
+            return None
+        return {
+            "name": profiles[i]["name"],
+            "enrolled_at": profiles[i]["enrolled_at"],
+            "embedding": np.array(matrix[i], dtype=np.float32)
+        }
 
     def get_all_speakers(self) -> List[Dict]:
         """Get all speaker profiles with embeddings as numpy arrays."""
-        data = self._load_data()
-        speakers = []
-        for speaker in data["speakers"]:
-            speakers.append({
+        profiles, matrix = self._state
+        return [
+            {
                 "name": speaker["name"],
                 "enrolled_at": speaker["enrolled_at"],
-                "embedding": np.array(speaker["embedding"], dtype=np.float32)
-            })
-        return speakers
+                "embedding": np.array(matrix[i], dtype=np.float32)
+            }
+            for i, speaker in enumerate(profiles)
+        ]
+
+    def get_embedding_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Speaker names and their (N, dim) embedding matrix in storage dtype.
+        The matrix is usually a read-only memory map; don't modify it.
+        """
+        profiles, matrix = self._state
+        return [speaker["name"] for speaker in profiles], matrix
 
     def list_speaker_names(self) -> List[str]:
         """Get list of all enrolled speaker names."""
-        data = self._load_data()
-        return [speaker["name"] for speaker in data["speakers"]]
+        profiles, _ = self._state
+        return [speaker["name"] for speaker in profiles]
 
     def remove_speaker(self, name: str) -> bool:
         """Remove a speaker by name. Returns True if found and removed."""
-        data = self._load_data()
-        original_count = len(data["speakers"])
-        data["speakers"] = [
-            s for s in data["speakers"]
-            if s["name"].lower() != name.lower()
-        ]
-
-        if len(data["speakers"]) < original_count:
-            self._save_data(data)
-            return True
-        return False
+        return bool(self._commit(("remove", name)))
 
     def update_speaker(self, name: str, new_embedding: np.ndarray) -> bool:
         """Update a speaker's embedding. Returns True if found and updated."""
-        data = self._load_data()
-        for speaker in data["speakers"]:
-            if speaker["name"].lower() == name.lower():
-                speaker["embedding"] = new_embedding.tolist()
-                speaker["enrolled_at"] = datetime.utcnow().isoformat() + "Z"
-                self._save_data(data)
-                return True
-        return False
+        row = np.asarray(new_embedding, dtype=self.dtype)
+        return bool(self._commit(("update", name, row, datetime.utcnow().isoformat() + "Z")))
 
     def clear_all(self) -> None:
         """Remove all speaker profiles."""
-        self._save_data({"speakers": []})
+        self._commit(("clear",))
+
+
+_stores: Dict[str, SpeakerStorage] = {}
+_stores_lock = threading.Lock()
+
+
+def get_speaker_storage(filepath: str = config.SPEAKERS_META_FILE) -> SpeakerStorage:
+    """Process-wide SpeakerStorage for a database, created on first use."""
+    path = os.path.abspath(filepath)
+    with _stores_lock:
+        storage = _stores.get(path)
+        if storage is None:
+            storage = SpeakerStorage(filepath)
+            _stores[path] = storage
+        return storage
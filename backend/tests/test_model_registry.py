@@ -0,0 +1,35 @@
+import sys
+import threading
+import types
+from model_registry import ModelRegistry
+
+
+class _Encoder:
+    def parameters(self):
+        return []
+
+    def buffers(self):
+        return []
+
+
+class _EmbeddingService:
+    def __init__(self, encoder, window_ms=None):
+        self.encoder = encoder
+
+
+def test_embedding_service_cold_load(monkeypatch):
+    """embedding_service() on a fresh registry loads the encoder it wraps without deadlocking."""
+    monkeypatch.setitem(sys.modules, "resemblyzer", types.SimpleNamespace(VoiceEncoder=_Encoder))
+    monkeypatch.setitem(sys.modules, "speakers.batching", types.SimpleNamespace(EmbeddingService=_EmbeddingService))
+    registry = ModelRegistry()
+    loaded = []
+
+    thread = threading.Thread(target=lambda: loaded.append(registry.embedding_service()), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive(), "embedding_service() deadlocked on a cold registry"
+    service = loaded[0]
+    assert service.encoder is registry.voice_encoder()
+    assert registry.embedding_service() is service
+    assert set(registry.memory_footprint()) == {"resemblyzer", "embedding_service"}
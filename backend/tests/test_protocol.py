@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+from ws.protocol import NO_PLAYER, decode_command_batch, encode_command_batch
+
+
+def _result(speaker):
+    return SimpleNamespace(
+        timestamp=1.0, speaker=speaker, speaker_confidence=0.9, command="up",
+        raw_text="up", command_confidence=0.8, volume=0.5, speech_duration=0.4
+    )
+
+
+def test_unencodable_players_fall_back_to_no_player():
+    """A player the int8 field can't carry is sent as unassigned instead of failing the batch."""
+    players = [2, "2", 300, -5, True, None]
+    frame = encode_command_batch([_result(f"s{i}") for i in range(len(players))], players)
+
+    decoded = [command["player"] for command in decode_command_batch(frame)]
+
+    assert decoded == [2, None, None, None, None, None]
+    assert NO_PLAYER == -1
@@ -0,0 +1,16 @@
+import threading
+import time
+from scheduler import InferenceScheduler
+
+
+def test_cancelled_expired_job_does_not_kill_worker():
+    """A job cancelled while queued and past its deadline is skipped; the worker keeps going."""
+    scheduler = InferenceScheduler(1)
+    gate = threading.Event()
+    scheduler.submit(gate.wait)
+    future = scheduler.submit(lambda: None, deadline=time.monotonic() - 1)
+    future.cancel()
+    gate.set()
+
+    assert scheduler.submit(lambda: 42).result(timeout=2) == 42
+    assert all(thread.is_alive() for thread in scheduler._threads)
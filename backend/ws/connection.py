@@ -0,0 +1,158 @@
+import asyncio
+import itertools
+from typing import Any, Coroutine, Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+import config
+from audio import (
+    AudioBuffer, FeatureExtractor, StreamingResampler, UtteranceEndpointer, VoiceActivityDetector
+)
+from commands import CommandDeduplicator, VoskStream
+from narrator import Narrator
+from .job_queue import AudioJobQueue
+
+# Connection ids are never reused, unlike id(websocket)
+_connection_ids = itertools.count(1)
+
+
+class ConnectionState:
+    """
+    Everything the handler keeps for one WebSocket connection.
+
+    Slotted, so each connection costs one small object instead of an entry in
+    a dozen dicts, and a misspelt attribute fails instead of adding state
+    that nothing cleans up. close() is the only teardown path.
+    """
+
+    __slots__ = (
+        "conn_id", "websocket", "encoding", "sample_rate", "resampler",
+        # Live command analysis
+        "buffer", "feature_extractor", "vad", "analysis_window", "deduplicator",
+        "endpointing", "endpointer", "streaming", "vosk_stream",
+        "stream_frames", "stream_feeder", "stream_lock",
+        "job_queue", "processing_task", "result_format", "tasks",
+        # Game session
+        "mode", "game_type", "narrator", "speech_start_time", "last_speech_time",
+        # Enrollment and dance
+        "enrollment_buffer", "dance_recording", "dance_buffers", "dance_start_time",
+        "dance_cooldown", "dance_timer", "dance_task",
+    )
+
+    def __init__(self, websocket: Any):
+        self.conn_id: int = next(_connection_ids)
+        self.websocket = websocket
+        # Encoding of the client's audio frames
+        self.encoding = config.AUDIO_ENCODING
+        # Client capture rate, and the resampler to SAMPLE_RATE when they differ
+        self.sample_rate = config.SAMPLE_RATE
+        self.resampler: Optional[StreamingResampler] = None
+
+        self.buffer: Optional[AudioBuffer] = None
+        # Scratch arrays for per-chunk statistics and model inputs
+        self.feature_extractor = FeatureExtractor()
+        # Voice-activity detection gating the models (None when disabled or endpointing)
+        self.vad: Optional[VoiceActivityDetector] = None
+        # (window, hop) for live analysis, and de-duplication of commands
+        # heard by more than one overlapping window
+        self.analysis_window: Tuple[float, float] = (config.ANALYSIS_WINDOW_SECONDS, config.ANALYSIS_HOP_SECONDS)
+        self.deduplicator: Optional[CommandDeduplicator] = None
+        self.endpointing = config.ENDPOINTING
+        self.endpointer: Optional[UtteranceEndpointer] = None
+        self.streaming = config.VOSK_STREAMING and not config.ENDPOINTING
+        self.vosk_stream: Optional[VoskStream] = None
+        # Frames waiting to be fed to vosk_stream, the task feeding them, and
+        # the lock serializing every use of its recognizer
+        self.stream_frames: List[np.ndarray] = []
+        self.stream_feeder: Optional[asyncio.Task] = None
+        self.stream_lock = asyncio.Lock()
+        # Live audio waiting for the processing task
+        self.job_queue = AudioJobQueue()
+        self.processing_task: Optional[asyncio.Task] = None
+        self.result_format = config.RESULT_FORMAT
+        # Fire-and-forget work (result sends, narration, dance processing),
+        # held until done so close() can cancel it
+        self.tasks: Set[asyncio.Task] = set()
+
+        # "game" or "frontend". game_type stays unset until the client declares
+        # one, so undeclared clients get open-vocabulary decoding
+        self.mode = "frontend"
+        self.game_type: Optional[str] = None
+        self.narrator = Narrator(game_type="pong")
+        # Speech duration tracking per speaker
+        self.speech_start_time: Dict[str, Optional[float]] = {}
+        self.last_speech_time: Dict[str, float] = {}
+
+        # Only present while an enrollment is in progress
+        self.enrollment_buffer: Optional[AudioBuffer] = None
+        self.dance_recording = False
+        self.dance_buffers: List[np.ndarray] = []
+        self.dance_start_time = 0.0
+        self.dance_cooldown = 0.0  # Ignore live audio until this time.time() after a dance
+        self.dance_timer: Optional[asyncio.TimerHandle] = None
+        self.dance_task: Optional[asyncio.Task] = None
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Run coro as a task owned by this connection."""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def reset_dance(self) -> None:
+        """Stop any dance recording and its pending timer."""
+        if self.dance_timer is not None:
+            self.dance_timer.cancel()
+            self.dance_timer = None
+        self.dance_task = None
+        self.dance_recording = False
+        self.dance_buffers = []
+        self.dance_start_time = 0.0
+        self.dance_cooldown = 0.0
+
+    def close(self) -> None:
+        """Cancel the connection's tasks and timers and release its buffers."""
+        if self.processing_task is not None:
+            self.processing_task.cancel()
+            self.processing_task = None
+        if self.stream_feeder is not None:
+            self.stream_feeder.cancel()
+            self.stream_feeder = None
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+        self.stream_frames = []
+        self.reset_dance()
+        self.job_queue.clear()
+        self.buffer = None
+        self.enrollment_buffer = None
+        self.vosk_stream = None
+        self.endpointer = None
+        self.deduplicator = None
+        self.speech_start_time.clear()
+        self.last_speech_time.clear()
+
+
+class ConnectionRegistry:
+    """The live connections, by connection id."""
+
+    def __init__(self):
+        self._connections: Dict[int, ConnectionState] = {}
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def __iter__(self) -> Iterator[ConnectionState]:
+        return iter(list(self._connections.values()))
+
+    def open(self, websocket: Any) -> ConnectionState:
+        """Register a new connection."""
+        state = ConnectionState(websocket)
+        self._connections[state.conn_id] = state
+        return state
+
+    def get(self, conn_id: int) -> Optional[ConnectionState]:
+        return self._connections.get(conn_id)
+
+    def close(self, state: ConnectionState) -> None:
+        """Unregister a connection and release everything it holds."""
+        self._connections.pop(state.conn_id, None)
+        state.close()
@@ -1,24 +1,39 @@
 import json
 import asyncio
+import logging
 import time
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from fastapi import WebSocket, WebSocketDisconnect
 import numpy as np
-import torch
 
-from audio import AudioBuffer, AudioProcessor
-from speakers import SpeakerEnrollment, SpeakerIdentifier, SpeakerStorage
-from commands import CommandParser
+from audio import (
+    AUDIO_ENCODINGS, AudioBuffer, AudioProcessor, StreamingResampler, UtteranceEndpointer,
+    VoiceActivityDetector, decode_audio, float_to_pcm16, to_pcm16, window_overlap_factor
+)
+from speakers import SpeakerEnrollment, SpeakerIdentifier, get_speaker_storage
+from commands import CommandParser, CommandDeduplicator, command_span, is_silence_hallucination
 import config
+from model_registry import get_model_registry
+from player_assignments import get_player_assignments
+from scheduler import DeadlineExpired, InferenceScheduler, Priority
 from narrator import Narrator
+from inference import InferenceProcessPool
+from logs import get_chunk_logger, get_logger
+from metrics import CHUNKS_PROCESSED, CHUNKS_SKIPPED_SILENT, COMMAND_LATENCY, COMMANDS_SENT, STAGE_SECONDS
+from .connection import ConnectionRegistry, ConnectionState
+from .job_queue import AudioJob
+from .protocol import COMMAND_TABLE, RESULT_FORMATS, encode_command_batch
+
+log = get_logger("ws")
+# Per-chunk lines: off unless LOG_CHUNKS, so use %-style arguments
+chunk_log = get_chunk_logger()
 
 @dataclass
 class CommandResult:
     """Result sent back to client."""
-    timestamp: str
+    timestamp: float  # Unix seconds (ISO 8601 in JSON messages)
     speaker: str
     speaker_confidence: float
     command: Optional[str]
@@ -28,57 +43,113 @@ class CommandResult:
     speech_duration: float  # How long they've been speaking (seconds)
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
-        # Convert numpy floats to Python floats for JSON serialization
-        for key, value in d.items():
-            if isinstance(value, (np.floating, np.integer)):
-                d[key] = float(value)
-        return d
+        # Built field by field: asdict() deep-copies, and the float() calls
+        # turn numpy scalars from the models into JSON-serializable floats
+        timestamp = datetime.fromtimestamp(self.timestamp, timezone.utc).replace(tzinfo=None)
+        return {
+            "timestamp": timestamp.isoformat() + "Z",
+            "speaker": self.speaker,
+            "speaker_confidence": float(self.speaker_confidence),
+            "command": self.command,
+            "raw_text": self.raw_text,
+            "command_confidence": float(self.command_confidence),
+            "volume": float(self.volume),
+            "speech_duration": float(self.speech_duration)
+        }
 
 
 class WebSocketHandler:
     """Handles WebSocket connections for audio streaming."""
 
     def __init__(self):
-        self.storage = SpeakerStorage()
+        self.storage = get_speaker_storage()
+        # Shared by all server workers, like the speaker database
+        self.player_assignments = get_player_assignments()
         self.enrollment = SpeakerEnrollment(self.storage)
-        self.identifier = SpeakerIdentifier(self.storage)
-        self.command_parser = CommandParser()
+        # With inference processes, live speaker ID and Vosk decoding happen there:
+        # this process only needs the models for enrollment and dance transcription
+        self.live_in_process = config.INFERENCE_PROCESSES <= 0
+        if not self.live_in_process:
+            # Only enrollment embeds here, one recording at a time: nothing to batch
+            get_model_registry().embedding_batch_window_ms = 0
+        self.identifier = SpeakerIdentifier(self.storage) if self.live_in_process else None
+        self.command_parser = CommandParser(
+            pool_workers=config.TRANSCRIBE_POOL_WORKERS if self.live_in_process else 0
+        )
         self.audio_processor = AudioProcessor()
 
-        # Thread pool for parallel processing
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # One scheduler for all speaker-ID and transcription work, sized for
+        # transcription only (enough threads to keep any transcription worker
+        # processes busy) so that priority classes still order the work. Speaker
+        # ID doesn't hold a thread while its embedding batch forms
+        self.scheduler = InferenceScheduler(max(2, 2 * config.TRANSCRIBE_POOL_WORKERS))
+        # Live command detection in separate processes, when INFERENCE_PROCESSES > 0
+        self.inference_pool: Optional[InferenceProcessPool] = None
+
+        # Per-connection state, released in one place when the connection closes
+        self.connections = ConnectionRegistry()
+        # VAD skip counts of closed connections
+        self.vad_totals: Dict[str, int] = {"windows": 0, "skipped": 0}
 
-        # Per-connection state
-        self.buffers: Dict[int, AudioBuffer] = {}
-        self.enrollment_buffers: Dict[int, AudioBuffer] = {}
-        
-        # Per-connection mode: "game" or "frontend" (default)
-        self.connection_modes: Dict[int, str] = {}
-        self.narrators: Dict[int, Narrator] = {}
-        self.game_types: Dict[int, str] = {}
-
-        # Track speech duration per speaker per connection
-        self.speech_start_time: Dict[tuple, Optional[float]] = {}
-        self.last_speech_time: Dict[tuple, float] = {}
-        
-        # Dance mode state (per connection)
-        self.dance_recording: Dict[int, bool] = {}
-        self.dance_buffers: Dict[int, list] = {}
-        self.dance_start_time: Dict[int, float] = {}
-        self.dance_cooldown: Dict[int, float] = {}  # Ignore audio processing briefly after dance
         self.dance_expected_duration = 30.0  # seconds
 
+    def start_transcription_pool(self) -> None:
+        """Fork the one-shot transcription workers (TRANSCRIBE_POOL_WORKERS), if any."""
+        self.command_parser.start_pool()
+
+    def start_inference_processes(self) -> None:
+        """Move live command detection into INFERENCE_PROCESSES separate processes."""
+        if config.INFERENCE_PROCESSES > 0 and self.inference_pool is None:
+            self.inference_pool = InferenceProcessPool(config.INFERENCE_PROCESSES)
+
+    def _inference_settings(self, state: ConnectionState, reset: bool) -> Dict[str, Any]:
+        """A connection's live-analysis settings, as sent to its inference process."""
+        window, hop = state.analysis_window
+        return {
+            "window_seconds": window,
+            "hop_seconds": hop,
+            "game": state.game_type,
+            "mode": state.mode,
+            "endpointing": state.endpointing,
+            "reset": reset
+        }
+
+    def _on_inference_results(self, state: ConnectionState, rows: List[tuple], ready_at: float) -> None:
+        """Results from the connection's inference process (called on the event loop)."""
+        results = [CommandResult(*row) for row in rows]
+        state.spawn(self._send_inference_results(state, results, ready_at))
+
+    async def _send_inference_results(
+        self,
+        state: ConnectionState,
+        results: List[CommandResult],
+        ready_at: float
+    ) -> None:
+        """Send an inference process's results, timed from when their audio was written."""
+        await self._send_results(state, results)
+        COMMAND_LATENCY.observe(time.monotonic() - ready_at)
+
+    def warm_up(self) -> None:
+        """Load shared models and build live-command recognizers before the first client connects."""
+        # Encoder (enrollment) and Vosk model (dance transcription)
+        get_model_registry().warm_up()
+        if self.live_in_process:
+            self.command_parser.warm_up()
+
     async def handle_connection(self, websocket: WebSocket) -> None:
         """Main handler for a WebSocket connection."""
         await websocket.accept()
-        conn_id = id(websocket)
-        self.buffers[conn_id] = AudioBuffer()
-        self.enrollment_buffers[conn_id] = AudioBuffer()
-        
-        # Create default narrator (will be replaced if client specifies game type)
-        self.narrators[conn_id] = Narrator(game_type="pong")
-        self.game_types[conn_id] = "pong"
+        state = self.connections.open(websocket)
+        conn_id = state.conn_id
+        if self.inference_pool is not None:
+            self.inference_pool.open(
+                conn_id, self._inference_settings(state, reset=True),
+                lambda rows, ready_at: self._on_inference_results(state, rows, ready_at)
+            )
+        self._reset_live_buffer(state)
+
+        # This task only reads frames; inference runs in the processing task
+        state.processing_task = asyncio.create_task(self._run_processing(state))
 
         try:
             while True:
@@ -89,41 +160,141 @@ class WebSocketHandler:
                     break
 
                 if "bytes" in message:
-                    await self._handle_audio(websocket, message["bytes"])
+                    received = time.perf_counter()
+                    await self._handle_audio(state, message["bytes"])
+                    STAGE_SECONDS["frame_receive"].observe(time.perf_counter() - received)
 
                 elif "text" in message:
-                    await self._handle_control(websocket, json.loads(message["text"]))
+                    await self._handle_control(state, json.loads(message["text"]))
 
         except (WebSocketDisconnect, RuntimeError) as e:
-            print(f"[WebSocket] Connection {conn_id} closed: {e}")
+            log.info(f"[WebSocket] Connection {conn_id} closed: {e}")
         except Exception as e:
-            print(f"[WebSocket] Unexpected error for {conn_id}: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"[WebSocket] Unexpected error for {conn_id}: {e}")
         finally:
-            # Cleanup
-            self.buffers.pop(conn_id, None)
-            self.enrollment_buffers.pop(conn_id, None)
-            self.connection_modes.pop(conn_id, None)
-            self.narrators.pop(conn_id, None)
-            self.game_types.pop(conn_id, None)
-            print(f"[WebSocket] Cleaned up connection {conn_id}")
-
-    async def _handle_control(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
+            self._close_connection(state)
+
+    def _close_connection(self, state: ConnectionState) -> None:
+        """Teardown for a connection: report its counters and release all of its state."""
+        conn_id = state.conn_id
+        stats = state.job_queue.stats()
+        log.info(f"[Queue] Connection {conn_id}: processed {stats['processed']}/{stats['enqueued']}, "
+                 f"dropped {stats['dropped_full']} (full) + {stats['dropped_stale']} (stale)")
+        if state.vad is not None:
+            self.vad_totals["windows"] += state.vad.windows_total
+            self.vad_totals["skipped"] += state.vad.windows_skipped
+            log.info(f"[VAD] Connection {conn_id} skipped {state.vad.windows_skipped}/{state.vad.windows_total} windows")
+        if self.inference_pool is not None:
+            self.inference_pool.close_connection(conn_id)
+        self.connections.close(state)
+        log.info(f"[WebSocket] Cleaned up connection {conn_id}")
+
+    def _reset_live_buffer(self, state: ConnectionState) -> None:
+        """Start a fresh live buffer (and audio timeline) for a connection."""
+        if self.inference_pool is not None:
+            # The inference process keeps the buffer; streaming isn't available there
+            state.streaming = False
+            self.inference_pool.configure(state.conn_id, self._inference_settings(state, reset=True))
+            return
+        state.buffer = AudioBuffer()
+        # Audio queued under the previous settings is no longer wanted
+        state.job_queue.clear()
+        window, hop = state.analysis_window
+        if state.endpointing:
+            # Segments are cut at utterance boundaries: speech only, no overlap
+            if state.endpointer is None:
+                state.endpointer = UtteranceEndpointer()
+            else:
+                # Keep the learned noise floor across restarts
+                state.endpointer.reset_timeline()
+            state.vosk_stream = None
+            state.deduplicator = None
+            return
+
+        state.endpointer = None
+        if config.VAD_ENABLED:
+            if state.vad is None:
+                state.vad = VoiceActivityDetector()
+            else:
+                # Keep the learned noise floor across restarts
+                state.vad.reset_timeline()
+        if state.streaming:
+            # The stream is fed each sample once, so nothing to de-duplicate
+            state.vosk_stream = self.command_parser.create_stream(config.SAMPLE_RATE, game=state.game_type)
+            state.stream_frames = []
+            state.deduplicator = None
+        elif hop < window:
+            state.vosk_stream = None
+            state.deduplicator = CommandDeduplicator()
+        else:
+            # Back-to-back windows never see the same audio twice
+            state.vosk_stream = None
+            state.deduplicator = None
+
+    async def _handle_control(self, state: ConnectionState, message: Dict[str, Any]) -> None:
         """Handle control messages from client."""
         msg_type = message.get("type")
-        conn_id = id(websocket)
+        websocket = state.websocket
+        conn_id = state.conn_id
 
         if msg_type == "start_listening":
             # Get game type from message and update narrator if specified
             game_type = message.get("game")
-            if game_type and game_type != self.game_types.get(conn_id):
-                print(f"[WebSocket] Connection {conn_id} switching to {game_type}")
-                self.game_types[conn_id] = game_type
-                self.narrators[conn_id] = Narrator(game_type=game_type)
-            
-            self.buffers[conn_id] = AudioBuffer()
-            await self._send_message(websocket, {"type": "listening_started"})
+            if game_type and game_type != state.game_type:
+                log.info(f"[WebSocket] Connection {conn_id} switching to {game_type}")
+                state.game_type = game_type
+                state.narrator = Narrator(game_type=game_type)
+
+            # Optional overlapping analysis windows, e.g. 0.75s window / 0.25s hop
+            window = float(message.get("window_seconds", config.ANALYSIS_WINDOW_SECONDS))
+            hop = float(message.get("hop_seconds", config.ANALYSIS_HOP_SECONDS))
+            if not 0 < hop <= window <= config.AUDIO_BUFFER_SECONDS:
+                await self._send_error(websocket, f"Invalid analysis window {window}s / hop {hop}s")
+                return
+            result_format = message.get("result_format", state.result_format)
+            if result_format not in RESULT_FORMATS:
+                await self._send_error(websocket, f"Unknown result format '{result_format}', expected one of {RESULT_FORMATS}")
+                return
+            encoding = message.get("encoding", state.encoding)
+            if encoding not in AUDIO_ENCODINGS:
+                await self._send_error(websocket, f"Unknown audio encoding '{encoding}', expected one of {AUDIO_ENCODINGS}")
+                return
+            sample_rate = message.get("sample_rate", state.sample_rate)
+            low, high = config.CLIENT_SAMPLE_RATE_RANGE
+            if not isinstance(sample_rate, int) or not low <= sample_rate <= high:
+                await self._send_error(websocket, f"Unsupported sample rate {sample_rate}, expected {low}-{high} Hz")
+                return
+            state.result_format = result_format
+            state.encoding = encoding
+            if sample_rate != state.sample_rate:
+                state.sample_rate = sample_rate
+                state.resampler = StreamingResampler(sample_rate) if sample_rate != config.SAMPLE_RATE else None
+            state.analysis_window = (window, hop)
+            # Endpointing replaces fixed windows, so it takes precedence over streaming
+            state.endpointing = bool(message.get("endpointing", config.ENDPOINTING))
+            state.streaming = not state.endpointing and bool(message.get("streaming", config.VOSK_STREAMING))
+            overlap_factor = window_overlap_factor(window, hop)
+            log.info(f"[WebSocket] Connection {conn_id} analysing {window}s windows every {hop}s "
+                     f"({overlap_factor:.1f}x compute vs back-to-back)")
+
+            self._reset_live_buffer(state)
+            reply = {
+                "type": "listening_started",
+                "window_seconds": window,
+                "hop_seconds": hop,
+                "compute_factor": overlap_factor,
+                "streaming": state.streaming,
+                "endpointing": state.endpointing,
+                "result_format": state.result_format,
+                "encoding": state.encoding,
+                "sample_rate": state.sample_rate
+            }
+            if state.encoding == "ima_adpcm":
+                reply["adpcm_block_samples"] = config.ADPCM_BLOCK_SAMPLES
+            if state.result_format == "binary":
+                # Binary results carry command ids; this is the id -> command mapping
+                reply["command_table"] = COMMAND_TABLE
+            await self._send_message(websocket, reply)
 
         elif msg_type == "start_enrollment":
             name = message.get("name", "").strip()
@@ -131,7 +302,10 @@ class WebSocketHandler:
                 await self._send_error(websocket, "Name is required for enrollment")
                 return
 
-            self.enrollment_buffers[conn_id] = AudioBuffer()
+            # Keeps the start of the recording if the client runs past the limit
+            state.enrollment_buffer = AudioBuffer(
+                max_duration_seconds=config.ENROLLMENT_MAX_SECONDS, overflow="drop_newest"
+            )
 
             await self._send_message(websocket, {
                 "type": "enrollment_started",
@@ -141,10 +315,10 @@ class WebSocketHandler:
 
         elif msg_type == "complete_enrollment":
             name = message.get("name", "").strip()
-            await self._complete_enrollment(websocket, name)
+            await self._complete_enrollment(state, name)
 
         elif msg_type == "cancel_enrollment":
-            self.enrollment_buffers[conn_id] = AudioBuffer()
+            state.enrollment_buffer = None
             await self._send_message(websocket, {"type": "enrollment_cancelled"})
 
         elif msg_type == "list_speakers":
@@ -164,327 +338,519 @@ class WebSocketHandler:
             })
 
         elif msg_type == "stop_listening":
-            self.buffers[conn_id] = AudioBuffer()
+            self._reset_live_buffer(state)
             await self._send_message(websocket, {"type": "listening_stopped"})
 
         elif msg_type == "start_dance":
-            # Initialize dance recording
-            conn_id = id(websocket)
-            
-            # Clear cooldown and buffers to start fresh
-            self.dance_cooldown.pop(conn_id, None)
-            if conn_id in self.buffers:
-                self.buffers[conn_id] = AudioBuffer()
-            
-            self.dance_recording[conn_id] = True
-            self.dance_buffers[conn_id] = []
-            self.dance_start_time[conn_id] = time.time()
-            
+            # Clear cooldown, buffers and any earlier dance timer to start fresh
+            state.reset_dance()
+            if state.buffer is not None or self.inference_pool is not None:
+                self._reset_live_buffer(state)
+
+            state.dance_recording = True
+            state.dance_start_time = time.time()
+
             await self._send_message(websocket, {
                 "type": "dance_recording_started",
                 "duration": self.dance_expected_duration
             })
-            
-            # Schedule dance processing after 30s
-            loop = asyncio.get_event_loop()
-            loop.call_later(
-                self.dance_expected_duration,
-                lambda: asyncio.create_task(self._process_dance(websocket, conn_id))
+
+            # Schedule dance processing after 30s (cancelled if the connection closes first)
+            loop = asyncio.get_running_loop()
+            state.dance_timer = loop.call_later(
+                self.dance_expected_duration, self._start_dance_processing, state
             )
-        
+
         elif msg_type == "cancel_dance":
-            # Allow user to cancel early
-            conn_id = id(websocket)
-            self._cleanup_dance_state(conn_id)
+            # Allow user to cancel early, even while the plan is being generated
+            if state.dance_task is not None:
+                state.dance_task.cancel()
+            state.reset_dance()
             await self._send_message(websocket, {"type": "dance_cancelled"})
-        
+
         elif msg_type == "finish_dance":
             # Process dance immediately (user clicked "Done")
-            conn_id = id(websocket)
-            if self.dance_recording.get(conn_id, False):
-                elapsed = time.time() - self.dance_start_time.get(conn_id, 0)
-                print(f"[Dance] User finished early at {elapsed:.1f}s")
-                
+            if state.dance_recording:
+                elapsed = time.time() - state.dance_start_time
+                log.info(f"[Dance] User finished early at {elapsed:.1f}s")
+
                 # Minimum 3 seconds required
                 if elapsed < 3.0:
                     await self._send_message(websocket, {
                         "type": "dance_error",
                         "message": "Please record at least 3 seconds of description."
                     })
-                    self._cleanup_dance_state(conn_id)
+                    state.reset_dance()
                 else:
-                    # Process immediately
-                    await self._process_dance(websocket, conn_id)
+                    # Process immediately (as a task, so this loop keeps reading messages)
+                    self._start_dance_processing(state)
 
         elif msg_type == "set_mode":
-            conn_id = id(websocket)
-            mode = message.get("mode", "frontend")
-            self.connection_modes[conn_id] = mode
-            print(f"[Mode] Connection {conn_id} set to '{mode}'")
+            state.mode = message.get("mode", "frontend")
+            if self.inference_pool is not None:
+                self.inference_pool.configure(conn_id, self._inference_settings(state, reset=False))
+            log.info(f"[Mode] Connection {conn_id} set to '{state.mode}'")
 
         elif msg_type == "ping":
-            await self._send_message(websocket, {"type": "pong"})
+            await self._send_message(websocket, {
+                "type": "pong",
+                "queue": state.job_queue.stats()
+            })
 
-    async def _handle_audio(self, websocket: WebSocket, audio_bytes: bytes) -> None:
+    async def _handle_audio(self, state: ConnectionState, audio_bytes: bytes) -> None:
         """Handle incoming audio data."""
-        conn_id = id(websocket)
+        dance_active = state.dance_recording
+        encoding = state.encoding
 
-        # Add to both buffers (enrollment and live)
-        if conn_id in self.buffers:
-            self.buffers[conn_id].add_chunk(audio_bytes)
+        try:
+            # Audio captured at another rate is resampled once, for every consumer
+            samples = None
+            if state.resampler is not None:
+                samples = state.resampler.process(decode_audio(audio_bytes, encoding))
+
+            if self.inference_pool is not None and not dance_active and time.time() >= state.dance_cooldown:
+                # Live audio goes into the connection's shared-memory ring as 16-bit PCM
+                pcm = to_pcm16(audio_bytes, encoding) if samples is None else float_to_pcm16(samples)
+                self.inference_pool.write(state.conn_id, pcm)
+
+            # Fan the frame out to whichever consumers are active
+            consumers = [buffer for buffer in (state.buffer, state.enrollment_buffer) if buffer is not None]
+
+            if samples is None and len(consumers) == 1 and not dance_active:
+                # Single consumer: decode straight into its ring
+                consumers[0].add_chunk(audio_bytes, encoding)
+            elif consumers or dance_active:
+                # Decode once and share the samples
+                if samples is None:
+                    samples = decode_audio(audio_bytes, encoding)
+                for buffer in consumers:
+                    buffer.add_samples(samples)
+                if dance_active:
+                    state.dance_buffers.append(samples)
+        except ValueError as e:
+            # A malformed frame (e.g. a partial ADPCM block) is dropped, not fatal
+            await self._send_error(state.websocket, f"Bad audio frame: {e}")
+            return
 
-        if conn_id in self.enrollment_buffers:
-            self.enrollment_buffers[conn_id].add_chunk(audio_bytes)
-        
-        # If dance recording active, save chunks
-        if self.dance_recording.get(conn_id, False):
-            # Convert bytes to numpy array
-            audio_array = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-            self.dance_buffers[conn_id].append(audio_array)
-            
+        # If dance recording active, report progress
+        if dance_active:
             # Send progress update every 5 seconds
-            elapsed = time.time() - self.dance_start_time[conn_id]
+            elapsed = time.time() - state.dance_start_time
             if int(elapsed) % 5 == 0 and elapsed > 0 and int(elapsed * 10) % 10 == 0:  # Once per 5s
-                await self._send_message(websocket, {
+                await self._send_message(state.websocket, {
                     "type": "dance_recording_progress",
                     "elapsed": elapsed,
                     "remaining": self.dance_expected_duration - elapsed
                 })
 
-        # Process live audio when we have enough
-        buffer = self.buffers.get(conn_id)
-        if buffer and buffer.duration_seconds() >= 0.5:
-            # Check if we're in cooldown period after dance generation
-            cooldown_until = self.dance_cooldown.get(conn_id, 0)
-            if time.time() < cooldown_until:
-                # Clear buffer but don't process to avoid spurious errors/commands
-                buffer.consume(1.5)
+        buffer = state.buffer
+        live = buffer is not None and not state.dance_recording and time.time() >= state.dance_cooldown
+
+        # A streaming recognizer hears every frame as it arrives, not once per window
+        if live and state.vosk_stream is not None:
+            self._queue_stream_frame(state, buffer)
+
+        # Process live audio when we have a full analysis window (or, when
+        # endpointing, on every frame so an utterance is handled as soon as it ends)
+        window, _ = state.analysis_window
+        if buffer and (state.endpointer is not None or buffer.duration_seconds() >= window):
+            # In the cooldown after dance generation, or while recording a dance,
+            # drop everything buffered (not one fixed slice per frame, which
+            # left a backlog to be analysed once live processing resumed)
+            if not live:
+                buffer.discard_until(buffer.end_position())
                 return
-            
-            # Don't process if actively recording dance
-            if self.dance_recording.get(conn_id, False):
-                buffer.consume(1.5)
+
+            self._queue_live_audio(state, buffer)
+
+    def _queue_live_audio(self, state: ConnectionState, buffer: AudioBuffer) -> None:
+        """Move every complete analysis window (or ended utterance) into the processing queue."""
+        if state.endpointer is not None:
+            self._queue_utterances(state, buffer, state.endpointer)
+            return
+
+        window, hop = state.analysis_window
+        vad = state.vad
+        while True:
+            # Get the next (possibly overlapping) window from the buffer
+            window_start = buffer.position_seconds()
+            audio = buffer.consume_window(window, hop)
+            if audio is None:
                 return
-                
-            await self._process_audio_chunk(websocket, buffer)
 
-    async def _process_audio_chunk(self, websocket: WebSocket, buffer: AudioBuffer) -> None:
-        """Process accumulated audio for command detection."""
-        # Get audio from buffer
-        audio = buffer.consume(0.5)
-        if audio is None:
+            # Only windows with speech reach speaker ID and transcription
+            process = self._process_audio
+            if vad is not None and not vad.contains_speech(audio, int(round(window_start * config.SAMPLE_RATE))):
+                CHUNKS_SKIPPED_SILENT.inc()
+                if state.vosk_stream is None:
+                    continue
+                # A streaming utterance still has to be closed on non-speech
+                process = self._end_stream_utterance
+
+            # Copy out of the ring, which keeps filling while the job waits
+            state.job_queue.put(AudioJob(process, np.array(audio), window_start))
+
+    def _queue_stream_frame(self, state: ConnectionState, buffer: AudioBuffer) -> None:
+        """Hand the audio buffered since the last frame to the connection's recognizer feed."""
+        stream = state.vosk_stream
+        # Audio skipped while live processing was paused is never fed
+        start = max(stream.fed_position, buffer.position())
+        end = buffer.end_position()
+        audio = buffer.read_range(start, end)
+        stream.fed_position = end
+        if audio is None or len(audio) == 0:
             return
+        # Copy out of the ring, which keeps filling while the frame waits
+        state.stream_frames.append(np.array(audio))
+        if state.stream_feeder is None or state.stream_feeder.done():
+            state.stream_feeder = asyncio.create_task(self._feed_stream(state, stream))
+
+    async def _feed_stream(self, state: ConnectionState, stream) -> None:
+        """Feeder task: decode waiting frames and send commands as soon as they are stable."""
+        while state.stream_frames and state.vosk_stream is stream:
+            frames, state.stream_frames = state.stream_frames, []
+            try:
+                async with state.stream_lock:
+                    parsed_list = await self._schedule(
+                        self._feed_stream_frames, stream, frames,
+                        priority=self._priority(state), conn_id=state.conn_id
+                    )
+                commands = [parsed for parsed in parsed_list if parsed.command]
+                if not commands:
+                    continue
+                if stream.speaker is None:
+                    # Sent once the window being decoded identifies its speaker
+                    stream.held.extend(commands)
+                    continue
+                await self._send_results(state, [
+                    self._make_result(stream.speaker, parsed, stream.volume, 0.0) for parsed in commands
+                ])
+            except Exception as e:
+                log.error(f"[Stream] Decoding error for {state.conn_id}: {e}")
+
+    def _feed_stream_frames(self, stream, frames: List[np.ndarray]) -> list:
+        """Feed frames to a stream one at a time, so each gets its own partial result."""
+        start = time.perf_counter()
+        parsed = []
+        for frame in frames:
+            parsed.extend(self.command_parser.parse_stream(stream, frame, config.SAMPLE_RATE))
+        STAGE_SECONDS["vosk_decode"].observe(time.perf_counter() - start)
+        return parsed
+
+    def _queue_utterances(
+        self,
+        state: ConnectionState,
+        buffer: AudioBuffer,
+        endpointer: UtteranceEndpointer
+    ) -> None:
+        """Queue every utterance that has just ended, then drop audio no longer needed."""
+        for start, end in endpointer.update(buffer):
+            audio = buffer.read_range(start, end)
+            if audio is not None:  # None when lost to buffer overflow
+                state.job_queue.put(AudioJob(self._process_audio, np.array(audio), start / config.SAMPLE_RATE))
+            buffer.discard_until(end)
+        buffer.discard_until(endpointer.keep_from())
+
+    async def _run_processing(self, state: ConnectionState) -> None:
+        """Processing task: run queued jobs and send their commands."""
+        job_queue = state.job_queue
+        while True:
+            job = await job_queue.get()
+            STAGE_SECONDS["queue_wait"].observe(time.monotonic() - job.enqueued_at)
+            try:
+                # Model work left unstarted when the audio goes stale is skipped
+                deadline = job.enqueued_at + job_queue.max_age
+                results = await job.process(job.audio, state, job.window_start, deadline)
+                if results:
+                    await self._send_results(state, results)
+                    COMMAND_LATENCY.observe(time.monotonic() - job.enqueued_at)
+            except DeadlineExpired:
+                pass
+            except Exception as e:
+                log.error(f"[Queue] Processing error for {state.conn_id}: {e}")
 
-        # Run processing in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        conn_id = id(websocket)
-        results = await loop.run_in_executor(
-            None,
-            self._process_audio_sync,
-            audio,
-            conn_id
-        )
+    @staticmethod
+    def _priority(state: ConnectionState) -> Priority:
+        """Scheduling class for a connection's live commands."""
+        return Priority.GAME if state.mode == "game" else Priority.FRONTEND
+
+    async def _schedule(
+        self,
+        fn,
+        *args,
+        priority: Priority,
+        conn_id: int,
+        deadline: Optional[float] = None
+    ):
+        """Run fn(*args) on the inference scheduler and await its result."""
+        future = self.scheduler.submit(fn, *args, priority=priority, key=conn_id, deadline=deadline)
+        return await asyncio.wrap_future(future)
+
+    def queue_stats(self) -> Dict[int, Dict[str, int]]:
+        """Processing queue depth and drop counters per connection."""
+        return {state.conn_id: state.job_queue.stats() for state in self.connections}
+
+    async def _send_results(self, state: ConnectionState, results: List[CommandResult]) -> None:
+        """Send detected commands to the client and trigger narration."""
+        if not results:
+            return
+        start = time.perf_counter()
+        if state.result_format == "binary":
+            # Everything from this window in one frame
+            players = [self.player_assignments.get(result.speaker) for result in results]
+            await self._send_bytes(state.websocket, encode_command_batch(results, players))
+        else:
+            for result in results:
+                player = self.player_assignments.get(result.speaker)
+                await self._send_message(state.websocket, {
+                    "type": "command",
+                    "player": player,
+                    **result.to_dict()
+                })
+        STAGE_SECONDS["result_send"].observe(time.perf_counter() - start)
+        COMMANDS_SENT.inc(len(results))
 
-        # Send all detected commands
         for result in results:
-            player = config.PLAYER_ASSIGNMENTS.get(result.speaker, None)
-            await self._send_message(websocket, {
-                "type": "command",
-                "player": player,
-                **result.to_dict()
-            })
-
             if result.command:
-                asyncio.create_task(self._trigger_narration(websocket, result.speaker, result.command))
+                state.spawn(self._trigger_narration(state, result.speaker, result.command))
 
-    # Common Whisper hallucinations on silence (filter these only)
-    SILENCE_HALLUCINATIONS = [
-        "thank you", "thanks for watching", "subscribe",
-        "like and subscribe", "thanks for listening",
-        "please subscribe", "thank you for watching"
-    ]
-
-    async def _trigger_narration(self, websocket: WebSocket, speaker: str, command: str):
+    async def _trigger_narration(self, state: ConnectionState, speaker: str, command: str):
         """Generates AI audio and sends it to the frontend."""
-        conn_id = id(websocket)
-        narrator = self.narrators.get(conn_id)
-        
+        narrator = state.narrator
+
         if not narrator:
-            print(f"[Narrator] No narrator for connection {conn_id}")
+            log.info(f"[Narrator] No narrator for connection {state.conn_id}")
             return
-        
+
         try:
+            start = time.perf_counter()
             audio_b64 = await narrator.get_narration(speaker, command)
+            STAGE_SECONDS["narration"].observe(time.perf_counter() - start)
             if audio_b64:
-                await self._send_message(websocket, {
+                await self._send_message(state.websocket, {
                     "type": "narrator_audio",
                     "audio": audio_b64
                 })
         except Exception as e:
-            print(f"[Narrator] Error generating narration: {e}")
-
-    # ... rest of your methods stay exactly the same (no changes needed)
-    def _is_audio_silent(self, audio: np.ndarray, threshold: float = 0.01) -> bool:
-        """Check if audio is mostly silent based on RMS energy."""
-        rms = np.sqrt(np.mean(audio ** 2))
-        return rms < threshold
-
-    def _calculate_volume(self, audio: np.ndarray) -> float:
-        """Calculate normalized volume level (0.0 to 1.0) using RMS."""
-        rms = np.sqrt(np.mean(audio ** 2))
-        
-        # Adjusted thresholds for easier reach of high volumes
-        # Soft speech: 0.005-0.02, Normal: 0.02-0.06, Loud: 0.06+
-        min_threshold = 0.005  # Below this is silence
-        low_threshold = 0.02   # Soft speech
-        mid_threshold = 0.06   # Normal speech
-        high_threshold = 0.10  # Loud speech (reduced from 0.15)
-        
-        print(f"[Volume] RMS: {rms:.4f}", end="")
-        
-        if rms < min_threshold:
-            volume = 0.0
-        elif rms < low_threshold:
-            # 0.005-0.02 -> 0.0-0.33
-            volume = (rms - min_threshold) / (low_threshold - min_threshold) * 0.33
-        elif rms < mid_threshold:
-            # 0.02-0.06 -> 0.33-0.66
-            volume = 0.33 + (rms - low_threshold) / (mid_threshold - low_threshold) * 0.33
-        elif rms < high_threshold:
-            # 0.06-0.10 -> 0.66-1.0
-            volume = 0.66 + (rms - mid_threshold) / (high_threshold - mid_threshold) * 0.34
-        else:
-            volume = 1.0
-        
-        print(f" -> volume: {volume:.2f}")
-        return float(min(1.0, max(0.0, volume)))
+            log.error(f"[Narrator] Error generating narration: {e}")
 
-    def _get_speech_duration(self, conn_id: int, speaker: str, is_speaking: bool) -> float:
+    def _get_speech_duration(self, state: ConnectionState, speaker: str, is_speaking: bool) -> float:
         """Calculate how long a speaker has been continuously speaking."""
-        import time
         current_time = time.time()
-        key = (conn_id, speaker)
-        
+
         if is_speaking:
-            if key not in self.speech_start_time or self.speech_start_time[key] is None:
+            if state.speech_start_time.get(speaker) is None:
                 # Start new speech session
-                self.speech_start_time[key] = current_time
-                self.last_speech_time[key] = current_time
+                state.speech_start_time[speaker] = current_time
+                state.last_speech_time[speaker] = current_time
                 duration = 0.1
-                print(f" [Duration] NEW session, duration: {duration:.2f}s")
+                chunk_log.debug("[Duration] NEW session, duration: %.2fs", duration)
                 return duration
             else:
                 # Continue existing session
-                self.last_speech_time[key] = current_time
-                duration = current_time - self.speech_start_time[key]
+                state.last_speech_time[speaker] = current_time
+                duration = current_time - state.speech_start_time[speaker]
                 # Cap at 1.5 seconds for tighter range
                 capped = min(duration, 1.5)
-                print(f" [Duration] CONTINUE session, duration: {capped:.2f}s (raw: {duration:.2f}s)")
+                chunk_log.debug("[Duration] CONTINUE session, duration: %.2fs (raw: %.2fs)", capped, duration)
                 return capped
         else:
             # Not speaking - reset IMMEDIATELY, no grace period
-            if key in self.speech_start_time and self.speech_start_time[key] is not None:
-                print(f" [Duration] RESET session (not speaking)")
-                self.speech_start_time[key] = None
+            if state.speech_start_time.get(speaker) is not None:
+                chunk_log.debug("[Duration] RESET session (not speaking)")
+                state.speech_start_time[speaker] = None
             return 0.0
 
-    def _is_silence_hallucination(self, text: str) -> bool:
-        """Check if transcription is a known Whisper silence hallucination."""
-        if not text:
-            return True
-        text_lower = text.lower().strip().rstrip(".")
-        for phrase in self.SILENCE_HALLUCINATIONS:
-            if text_lower == phrase:
-                return True
-        return False
-
-    def _identify_speaker(self, audio_tensor: torch.Tensor, sample_rate: int, conn_id: int = None):
-        """Run speaker identification (for parallel execution)."""
+    async def _identify_speaker(
+        self,
+        state: ConnectionState,
+        speaker_audio: np.ndarray,
+        sample_rate: int,
+        deadline: Optional[float] = None
+    ):
+        """
+        Run speaker identification. Only the preprocessing takes a scheduler
+        thread: the embedding batch is awaited here, so the batcher (not the
+        scheduler's size) decides how many connections share a forward pass.
+        """
         # Only restrict to assigned players when in game mode
-        mode = self.connection_modes.get(conn_id, "frontend") if conn_id else "frontend"
-        if mode == "game" and config.PLAYER_ASSIGNMENTS:
-            allowed_speakers = list(config.PLAYER_ASSIGNMENTS.keys())
+        assignments = self.player_assignments.get_all() if state.mode == "game" else None
+        if assignments:
+            allowed_speakers = list(assignments.keys())
         else:
             allowed_speakers = None
-        return self.identifier.identify(audio_tensor, sample_rate, allowed_speakers=allowed_speakers)
-
-    def _parse_command(self, audio: np.ndarray, sample_rate: int):
+        start = time.perf_counter()
+        try:
+            embedding_future = await self._schedule(
+                self.identifier.embed_async, speaker_audio, sample_rate,
+                priority=self._priority(state), conn_id=state.conn_id, deadline=deadline
+            )
+            embedding = await asyncio.wrap_future(embedding_future)
+        except DeadlineExpired:
+            raise
+        except Exception:
+            embedding = None
+        match = self.identifier.match(embedding, allowed_speakers)
+        STAGE_SECONDS["speaker_id"].observe(time.perf_counter() - start)
+        return match
+
+    def _parse_command(self, audio: np.ndarray, sample_rate: int, state: Optional[ConnectionState] = None):
         """Run command parsing (for parallel execution). Returns list of commands."""
-        return self.command_parser.parse_multiple(audio, sample_rate)
+        start = time.perf_counter()
+        # Decoding is restricted to the game's grammar once the client declared one
+        game = state.game_type if state else None
+        parsed = self.command_parser.parse_multiple(audio, sample_rate, game=game)
+        STAGE_SECONDS["vosk_decode"].observe(time.perf_counter() - start)
+        return parsed
+
+    def _make_result(self, speaker_match, parsed, volume: float, speech_duration: float) -> CommandResult:
+        """Build the CommandResult sent to the client for one detected command."""
+        return CommandResult(
+            timestamp=time.time(),
+            speaker=speaker_match.name,
+            speaker_confidence=speaker_match.confidence,
+            command=parsed.command,
+            raw_text=parsed.raw_text,
+            command_confidence=parsed.confidence,
+            volume=volume,
+            speech_duration=speech_duration
+        )
+
+    async def _end_stream_utterance(
+        self,
+        audio: np.ndarray,
+        state: ConnectionState,
+        window_start: float = 0.0,
+        deadline: Optional[float] = None,
+        volume: float = 0.0
+    ) -> List[CommandResult]:
+        """Silence ends a streaming utterance: flush commands the partial
+        results hadn't confirmed yet. No-op for non-streaming connections."""
+        stream = state.vosk_stream
+        if stream is None:
+            return []
+        async with state.stream_lock:
+            if not stream.active:
+                return []
+            pending = await self._schedule(
+                self.command_parser.finish_stream, stream,
+                priority=self._priority(state), conn_id=state.conn_id, deadline=deadline
+            )
+        if not stream.speaker:
+            stream.held.clear()
+            return []
+        return [
+            self._make_result(stream.speaker, parsed, volume, 0.0)
+            for parsed in pending if parsed.command
+        ]
+
+    def vad_stats(self) -> Dict[str, Any]:
+        """Analysis windows seen and skipped by voice-activity detection, across all connections."""
+        vads = [state for state in self.connections if state.vad is not None]
+        windows = self.vad_totals["windows"] + sum(state.vad.windows_total for state in vads)
+        skipped = self.vad_totals["skipped"] + sum(state.vad.windows_skipped for state in vads)
+        return {
+            "enabled": config.VAD_ENABLED,
+            "windows": windows,
+            "skipped": skipped,
+            "skipped_ratio": skipped / windows if windows else 0.0,
+            "connections": {state.conn_id: state.vad.stats() for state in vads}
+        }
 
-    def _process_audio_sync(self, audio: np.ndarray, conn_id: int) -> List[CommandResult]:
-        """Synchronous audio processing with parallel speaker ID and transcription.
-        Returns list of CommandResults (may contain multiple if multiple commands detected)."""
+    async def _process_audio(
+        self,
+        audio: np.ndarray,
+        state: ConnectionState,
+        window_start: float = 0.0,
+        deadline: Optional[float] = None
+    ) -> List[CommandResult]:
+        """Audio processing with speaker ID and transcription scheduled in parallel.
+        Returns list of CommandResults (may contain multiple if multiple commands detected).
+        window_start is the audio time of the first sample, used to drop commands
+        already reported from an overlapping window. Model work not started by
+        `deadline` (time.monotonic()) is skipped and raises DeadlineExpired."""
         try:
-            # Calculate volume first
-            volume = self._calculate_volume(audio)
+            # RMS, volume, silence and both model inputs, computed once for this chunk
+            start = time.perf_counter()
+            features = state.feature_extractor.extract(audio)
+            STAGE_SECONDS["feature_extraction"].observe(time.perf_counter() - start)
+            volume = features.volume
+            chunk_log.debug("[Volume] RMS: %.4f -> volume: %.2f", features.rms, volume)
             # Consider any non-silent audio as speaking
             is_speaking = volume > 0.0
 
             # Skip very silent audio
-            if self._is_audio_silent(audio):
-                return []
-
-            start_time = time.perf_counter()
-
-            # Prepare audio for speaker embedding
-            audio_tensor, sample_rate = self.audio_processor.prepare_for_pyannote(audio)
-
-            # Run speaker ID and command parsing in parallel
-            speaker_future = self.executor.submit(
-                self._identify_speaker, audio_tensor, sample_rate, conn_id
-            )
-            command_future = self.executor.submit(
-                self._parse_command, audio, sample_rate
-            )
-
-            # Wait for both results and measure timing
-            speaker_match = speaker_future.result()
-            speaker_time = time.perf_counter() - start_time
-
-            parsed_list = command_future.result()  # Now returns a list
-            total_time = time.perf_counter() - start_time
+            if features.is_silent:
+                CHUNKS_SKIPPED_SILENT.inc()
+                return await self._end_stream_utterance(audio, state, window_start, deadline, volume)
+            CHUNKS_PROCESSED.inc()
+
+            sample_rate = features.sample_rate
+
+            # Run speaker ID (normalized float32) and command parsing (int16 PCM) in parallel.
+            # A streaming recognizer is fed per frame instead (_feed_stream), so
+            # its windows only identify the speaker
+            stream = state.vosk_stream
+            priority = self._priority(state)
+            tasks = [self._identify_speaker(state, features.normalized, sample_rate, deadline)]
+            if stream is None:
+                tasks.append(self._schedule(
+                    self._parse_command, features.pcm16, sample_rate, state,
+                    priority=priority, conn_id=state.conn_id, deadline=deadline
+                ))
+
+            # Wait for both (the feature arrays are reused for the next job)
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+
+            if stream is None:
+                speaker_match, parsed_list = outcomes
+            else:
+                speaker_match = outcomes[0]
+                stream.speaker = speaker_match
+                stream.volume = volume
+                # Commands the feed decoded before it knew who was speaking
+                parsed_list, stream.held = stream.held, []
 
             # Get raw_text from first result if available
             raw_text = parsed_list[0].raw_text if parsed_list else None
 
-            # Log timing
-            print(f"[Timing] Speaker ID: {speaker_time*1000:.0f}ms | "
-                  f"Total (parallel): {total_time*1000:.0f}ms | "
-                  f"Text: '{raw_text}'")
-
             # Calculate speech duration for this speaker
-            speech_duration = self._get_speech_duration(conn_id, speaker_match.name, is_speaking)
+            speech_duration = self._get_speech_duration(state, speaker_match.name, is_speaking)
 
             # Filter only silence hallucinations
-            if self._is_silence_hallucination(raw_text):
+            if is_silence_hallucination(raw_text):
                 return []
 
             # Build results for all detected commands
+            window_seconds = len(audio) / sample_rate
+            deduplicator = state.deduplicator
+            if deduplicator:
+                deduplicator.prune(window_start)
+
             results = []
             for parsed in parsed_list:
                 if parsed.command:  # Only include actual commands
-                    results.append(CommandResult(
-                        timestamp=datetime.utcnow().isoformat() + "Z",
-                        speaker=speaker_match.name,
-                        speaker_confidence=speaker_match.confidence,
-                        command=parsed.command,
-                        raw_text=parsed.raw_text,
-                        command_confidence=parsed.confidence,
-                        volume=volume,
-                        speech_duration=speech_duration
-                    ))
+                    if deduplicator:
+                        start, end = command_span(window_start, window_seconds, parsed.start, parsed.end)
+                        if deduplicator.is_duplicate(parsed.command, start, end):
+                            continue
+                    results.append(self._make_result(speaker_match, parsed, volume, speech_duration))
 
             return results
 
+        except DeadlineExpired:
+            raise
         except Exception as e:
-            print(f"Processing error: {e}")
+            log.error(f"Processing error: {e}")
             return []
 
-    async def _complete_enrollment(self, websocket: WebSocket, name: str) -> None:
+    async def _complete_enrollment(self, state: ConnectionState, name: str) -> None:
         """Complete speaker enrollment with collected audio."""
-        conn_id = id(websocket)
-        buffer = self.enrollment_buffers.get(conn_id)
+        websocket = state.websocket
+        buffer = state.enrollment_buffer
 
         if not buffer:
             await self._send_error(websocket, "No enrollment in progress")
@@ -502,33 +868,34 @@ class WebSocketHandler:
 
         try:
             # Prepare audio for speaker embedding
-            audio_tensor, sample_rate = self.audio_processor.prepare_for_pyannote(audio)
-
-            # Run enrollment in thread pool
-            loop = asyncio.get_event_loop()
-            success, message = await loop.run_in_executor(
-                None,
-                self.enrollment.enroll,
-                name,
-                audio_tensor,
-                sample_rate
+            enrollment_audio, sample_rate = self.audio_processor.prepare_for_embedding(audio)
+
+            # Run enrollment on the scheduler, behind live commands
+            success, message = await self._schedule(
+                self.enrollment.enroll, name, enrollment_audio, sample_rate,
+                priority=Priority.ENROLLMENT, conn_id=state.conn_id
             )
         except Exception as e:
-            print(f"Enrollment error: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Enrollment error: {e}")
             await self._send_error(websocket, f"Enrollment failed: {e}")
-            self.enrollment_buffers[conn_id] = AudioBuffer()
+            state.enrollment_buffer = None
             return
 
-        # Clear enrollment buffer
-        self.enrollment_buffers[conn_id] = AudioBuffer()
+        # Enrollment finished, stop collecting audio
+        state.enrollment_buffer = None
+
+        truncated = buffer.dropped_samples > 0
+        if truncated:
+            log.warning(f"[Enrollment] {name}: recording ran past {config.ENROLLMENT_MAX_SECONDS:.0f}s, "
+                        f"{buffer.dropped_samples / buffer.sample_rate:.1f}s dropped")
+            message = f"{message} (only the first {config.ENROLLMENT_MAX_SECONDS:.0f}s of audio were used)"
 
         await self._send_message(websocket, {
             "type": "enrollment_complete",
             "success": success,
             "message": message,
-            "name": name if success else None
+            "name": name if success else None,
+            "truncated": truncated
         })
 
     async def _send_message(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
@@ -544,7 +911,14 @@ class WebSocketHandler:
         try:
             await websocket.send_text(json.dumps(message, default=default_converter))
         except Exception as e:
-            print(f"Websocket Send Error: {e}")
+            log.error(f"Websocket Send Error: {e}")
+
+    async def _send_bytes(self, websocket: WebSocket, frame: bytes) -> None:
+        """Send a binary frame to the client."""
+        try:
+            await websocket.send_bytes(frame)
+        except Exception as e:
+            log.error(f"Websocket Send Error: {e}")
 
     @staticmethod
     def _json_default(obj):
@@ -565,43 +939,61 @@ class WebSocketHandler:
             "message": error
         })
     
-    async def _process_dance(self, websocket: WebSocket, conn_id: int) -> None:
+    def _start_dance_processing(self, state: ConnectionState) -> None:
+        """Run _process_dance as a connection task, unless it is already running."""
+        if state.dance_task is None:
+            state.dance_task = state.spawn(self._process_dance(state))
+
+    async def _process_dance(self, state: ConnectionState) -> None:
         """Process accumulated audio and generate dance plan."""
+        websocket = state.websocket
+        conn_id = state.conn_id
+        cooldown_until = 0.0
         try:
             # Check if dance is still active (not already processed or cancelled)
-            if not self.dance_recording.get(conn_id, False):
+            if not state.dance_recording:
                 return
+            # Processing now, so the 30s timer (if it hasn't fired) mustn't start it again
+            if state.dance_timer is not None:
+                state.dance_timer.cancel()
+                state.dance_timer = None
             
-            if not self.dance_buffers.get(conn_id):
+            if not state.dance_buffers:
                 return
             
+            # Concatenate all audio chunks, and stop recording. Live audio stays
+            # ignored until the plan's cooldown replaces this one
+            full_audio = np.concatenate(state.dance_buffers)
+            state.dance_recording = False
+            state.dance_cooldown = float("inf")
+            
             # Send status update
             await self._send_message(websocket, {
                 "type": "dance_status",
                 "message": "Transcribing your dance..."
             })
             
-            # Concatenate all audio chunks
-            full_audio = np.concatenate(self.dance_buffers[conn_id])
-            
             # Transcribe using existing Vosk/Deepgram
-            print(f"[Dance] Transcribing {len(full_audio)/config.SAMPLE_RATE:.1f}s of audio")
+            log.info(f"[Dance] Transcribing {len(full_audio)/config.SAMPLE_RATE:.1f}s of audio")
             transcript_start = time.time()
-            transcript = self.command_parser._transcribe(full_audio, config.SAMPLE_RATE)
+            transcript = await self._schedule(
+                self.command_parser._transcribe, full_audio, config.SAMPLE_RATE,
+                priority=Priority.DANCE, conn_id=conn_id
+            )
             transcript_time = time.time() - transcript_start
-            print(f"[Dance] Transcription complete: {transcript_time:.1f}s → '{transcript[:100]}...'")
+            log.info(f"[Dance] Transcription complete: {transcript_time:.1f}s → '{transcript[:100]}...'")
             
             if not transcript or len(transcript.strip()) < 3:
-                print(f"[Dance] ✗ Transcript too short or empty")
+                log.warning(f"[Dance] ✗ Transcript too short or empty")
                 await self._send_message(websocket, {
                     "type": "dance_error",
                     "message": "Could not understand the description. Please try again with clearer speech."
                 })
-                self._cleanup_dance_state(conn_id)
+                state.reset_dance()
                 return
             
             # Generate dance plan with LLM
-            print(f"[Dance] Starting AI choreography generation...")
+            log.info(f"[Dance] Starting AI choreography generation...")
             await self._send_message(websocket, {
                 "type": "dance_status",
                 "message": "AI choreographing your dance..."
@@ -610,12 +1002,10 @@ class WebSocketHandler:
             llm_start = time.time()
             dance_plan = await self._generate_dance_plan(transcript)
             llm_time = time.time() - llm_start
-            print(f"[Dance] ✓ AI generation complete in {llm_time:.2f}s")
-            print(f"[Dance] Generated {len(dance_plan['keyframes'])} keyframes")
-            print(f"[Dance] Dance duration: {dance_plan['duration']}s")
+            log.info(f"[Dance] ✓ AI generation complete in {llm_time:.2f}s: "
+                     f"{len(dance_plan['keyframes'])} keyframes, {dance_plan['duration']}s")
             
             # Send dance plan to frontend
-            print(f"[Dance] Sending dance plan to client...")
             await self._send_message(websocket, {
                 "type": "dance_plan",
                 "plan": dance_plan,
@@ -625,28 +1015,27 @@ class WebSocketHandler:
             # Set cooldown to prevent processing spurious audio during animation
             # Cooldown = dance duration + 2 second buffer for UI interaction
             cooldown_duration = dance_plan.get('duration', 10.0) + 2.0
-            self.dance_cooldown[conn_id] = time.time() + cooldown_duration
-            print(f"[Dance] Set audio processing cooldown for {cooldown_duration:.1f}s")
+            cooldown_until = time.time() + cooldown_duration
+            log.info(f"[Dance] Set audio processing cooldown for {cooldown_duration:.1f}s")
             
             total_time = time.time() - transcript_start
-            print(f"[Dance] ✓ Complete pipeline: {total_time:.2f}s (transcribe: {transcript_time:.2f}s, LLM: {llm_time:.2f}s)")
-            print(f"[Dance] ========== DANCE PROCESSING COMPLETE ==========\n")
+            log.info(f"[Dance] ✓ Complete pipeline: {total_time:.2f}s (transcribe: {transcript_time:.2f}s, LLM: {llm_time:.2f}s)")
             
         except Exception as e:
-            print(f"[Dance] Error processing: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"[Dance] Error processing: {e}")
             await self._send_message(websocket, {
                 "type": "dance_error",
                 "message": f"Processing error: {str(e)}"
             })
         finally:
-            self._cleanup_dance_state(conn_id)
+            state.reset_dance()
+            if cooldown_until:
+                state.dance_cooldown = cooldown_until
     
     async def _generate_dance_plan(self, transcript: str) -> Dict[str, Any]:
         """Use LLM to convert transcript to structured dance plan."""
         
-        print(f"\n[Dance LLM] ========== GENERATING CHOREOGRAPHY ==========\n")
+        log.info("[Dance LLM] Generating choreography")
         prompt = f"""You are a creative dance choreographer for a 2D stick figure. The dancer is FACING THE VIEWER/CAMERA at all times. NO full-body rotation/spins - use shoulder/hip offsets instead.
 
 PERSPECTIVE: Dancer faces viewer, so:
@@ -736,20 +1125,16 @@ Return ONLY valid JSON (no markdown, no explanation):
   ]
 }}"""
 
-        # Log the full prompt
-        print(f"[Dance LLM] 📝 FULL PROMPT TO AI:")
-        print(f"[Dance LLM] {'='*60}")
-        for line in prompt.split('\n'):
-            print(f"[Dance LLM] {line}")
-        print(f"[Dance LLM] {'='*60}\n")
-        
-        print(f"[Dance LLM] Preparing to call OpenRouter API...")
-        print(f"[Dance LLM] Transcript: '{transcript[:100]}..." if len(transcript) > 100 else transcript + "'")
+        # The prompt is several kilobytes: one DEBUG record, only formatted when enabled
+        log.debug("[Dance LLM] Full prompt:\n%s", prompt)
+        log.info("[Dance LLM] Transcript: '%s'", transcript[:100] + "..." if len(transcript) > 100 else transcript)
         
         try:
             llm_start = time.time()
-            print(f"[Dance LLM] Sending request to {self.command_parser.model}...")
-            response = self.command_parser.client.chat.completions.create(
+            log.debug("[Dance LLM] Sending request to %s", self.command_parser.model)
+            # The client is synchronous: run it on a thread, not the event loop
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, lambda: self.command_parser.client.chat.completions.create(
                 model=self.command_parser.model,
                 messages=[
                     {"role": "system", "content": "You are a dance choreographer. Output only valid JSON."},
@@ -759,40 +1144,34 @@ Return ONLY valid JSON (no markdown, no explanation):
                 temperature=0.8,  # More creative
                 response_format={"type": "json_object"},
                 timeout=15.0  # 15 second timeout
-            )
+            ))
             llm_time = time.time() - llm_start
-            print(f"[Dance LLM] ✓ Response received in {llm_time:.2f}s")
             
             response_content = response.choices[0].message.content
-            print(f"[Dance LLM] Response length: {len(response_content)} characters")
-            print(f"[Dance LLM] Parsing JSON response...")
+            log.info(f"[Dance LLM] ✓ Response received in {llm_time:.2f}s ({len(response_content)} characters)")
             
             result = json.loads(response_content)
-            print(f"[Dance LLM] ✓ JSON parsed successfully")
             
             # Validate structure
-            print(f"[Dance LLM] Validating response structure...")
             if "duration" not in result or "keyframes" not in result:
-                print(f"[Dance LLM] ✗ Missing required fields (duration or keyframes)")
+                log.warning(f"[Dance LLM] ✗ Missing required fields (duration or keyframes)")
                 raise ValueError("Invalid JSON structure - missing duration or keyframes")
             
             if not isinstance(result["keyframes"], list):
-                print(f"[Dance LLM] ✗ Keyframes is not a list")
+                log.warning(f"[Dance LLM] ✗ Keyframes is not a list")
                 raise ValueError("Keyframes must be a list")
             
-            print(f"[Dance LLM] Found {len(result['keyframes'])} keyframes")
             
             if len(result["keyframes"]) < 3:
-                print(f"[Dance LLM] ✗ Too few keyframes: {len(result['keyframes'])}")
+                log.warning(f"[Dance LLM] ✗ Too few keyframes: {len(result['keyframes'])}")
                 raise ValueError(f"Too few keyframes: {len(result['keyframes'])} (need at least 3)")
             
             if len(result["keyframes"]) > 20:
                 # Trim to 20 keyframes max
-                print(f"[Dance LLM] ⚠ Too many keyframes ({len(result['keyframes'])}), trimming to 20")
+                log.warning(f"[Dance LLM] ⚠ Too many keyframes ({len(result['keyframes'])}), trimming to 20")
                 result["keyframes"] = result["keyframes"][:20]
             
             # Validate each keyframe
-            print(f"[Dance LLM] Validating individual keyframes...")
             valid_poses = {'IDLE', 'ARMS_UP', 'ARMS_WAVE_LEFT', 'ARMS_WAVE_RIGHT', 
                           'SPIN_LEFT', 'SPIN_RIGHT', 'KICK_LEFT', 'KICK_RIGHT', 'JUMP', 'BOW'}
             valid_angle_keys = {'waist', 'body', 'lShoulder', 'rShoulder', 'lElbow', 'rElbow',
@@ -801,7 +1180,7 @@ Return ONLY valid JSON (no markdown, no explanation):
             fixed_count = 0
             for i, kf in enumerate(result["keyframes"]):
                 if "time" not in kf or "pose" not in kf:
-                    print(f"[Dance LLM] ✗ Keyframe {i} missing time or pose")
+                    log.warning(f"[Dance LLM] ✗ Keyframe {i} missing time or pose")
                     raise ValueError(f"Keyframe {i} missing time or pose")
                 
                 # Allow pose to be either a string or an object with angles
@@ -810,20 +1189,19 @@ Return ONLY valid JSON (no markdown, no explanation):
                     # Validate angle object keys
                     for key in list(pose_value.keys()):
                         if key not in valid_angle_keys:
-                            print(f"[Dance LLM] ⚠ Keyframe {i} has invalid angle key: {key}")
+                            log.warning(f"[Dance LLM] ⚠ Keyframe {i} has invalid angle key: {key}")
                             del pose_value[key]
                             fixed_count += 1
                 elif pose_value not in valid_poses:
                     # Validate string pose name
-                    print(f"[Dance LLM] ⚠ Invalid pose '{pose_value}' at keyframe {i} (time: {kf['time']}s), replacing with IDLE")
+                    log.warning(f"[Dance LLM] ⚠ Invalid pose '{pose_value}' at keyframe {i} (time: {kf['time']}s), replacing with IDLE")
                     kf["pose"] = "IDLE"
                     fixed_count += 1
             
             if fixed_count > 0:
-                print(f"[Dance LLM] Fixed {fixed_count} invalid poses")
+                log.info(f"[Dance LLM] Fixed {fixed_count} invalid poses")
             
             # Sort keyframes by time
-            print(f"[Dance LLM] Sorting keyframes by time...")
             result["keyframes"] = sorted(result["keyframes"], key=lambda k: k["time"])
             
             # Calculate duration based on last keyframe + 1 second buffer
@@ -831,77 +1209,59 @@ Return ONLY valid JSON (no markdown, no explanation):
             calculated_duration = last_keyframe_time + 1.0  # Add 1 second buffer
             
             if "duration" in result and result["duration"] != calculated_duration:
-                print(f"[Dance LLM] ⚠ Adjusting duration from {result['duration']}s to {calculated_duration}s (based on last keyframe at {last_keyframe_time}s)")
+                log.info(f"[Dance LLM] Adjusting duration from {result['duration']}s to {calculated_duration}s (based on last keyframe at {last_keyframe_time}s)")
             
             result["duration"] = calculated_duration
             
-            # Log AI's thinking/reasoning prominently
-            print(f"\n[Dance LLM] {'='*60}")
-            print(f"[Dance LLM] 🧠 AI CHOREOGRAPHER'S THINKING:")
-            print(f"[Dance LLM] {'='*60}")
-            if "reasoning" in result:
-                print(f"[Dance LLM] {result['reasoning']}")
-            else:
-                print(f"[Dance LLM] (No reasoning provided)")
-            print(f"[Dance LLM] {'='*60}\n")
-            
-            print(f"[Dance LLM] ✓ Validation complete")
-            print(f"\n[Dance LLM] {'='*60}")
-            print(f"[Dance LLM] 🎭 GENERATED DANCE SEQUENCE:")
-            print(f"[Dance LLM] {'='*60}")
-            print(f"[Dance LLM] Duration: {result['duration']:.1f}s ({len(result['keyframes'])} keyframes)\n")
-            
-            # Log all keyframes with details
-            for i, kf in enumerate(result["keyframes"]):
-                pose_desc = kf["pose"]
-                easing = kf.get("easing", "cubic")
-                
-                if isinstance(pose_desc, dict):
-                    # Custom angles - show key movements
-                    angles = []
-                    if "lShoulder" in pose_desc or "rShoulder" in pose_desc:
-                        angles.append(f"arms: L{pose_desc.get('lShoulder', 0)}° R{pose_desc.get('rShoulder', 0)}°")
-                    if "lHip" in pose_desc or "rHip" in pose_desc:
-                        angles.append(f"legs: L{pose_desc.get('lHip', 0)}° R{pose_desc.get('rHip', 0)}°")
-                    if "waist" in pose_desc:
-                        angles.append(f"waist: {pose_desc.get('waist')}°")
-                    if "jumpOffset" in pose_desc and pose_desc["jumpOffset"] != 0:
-                        angles.append(f"jump: {pose_desc['jumpOffset']}")
-                    if "torsoScaleY" in pose_desc:
-                        angles.append(f"squash/stretch: {pose_desc['torsoScaleY']}x")
-                    if "footTargetY" in pose_desc:
-                        angles.append(f"footIK: {pose_desc['footTargetY']}")
-                    
-                    pose_str = "Custom (" + ", ".join(angles) + ")" if angles else "Custom pose"
-                else:
-                    pose_str = pose_desc
-                
-                print(f"[Dance LLM] {i+1:2d}. {kf['time']:5.1f}s → {pose_str:<50s} [{easing}]")
-            
-            print(f"[Dance LLM] {'='*60}\n")
+            log.debug("[Dance LLM] Choreographer's reasoning: %s", result.get("reasoning", "(none provided)"))
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[Dance LLM] Generated dance sequence, %.1fs:\n%s",
+                          result["duration"], self._describe_keyframes(result["keyframes"]))
             
             return result
             
         except json.JSONDecodeError as e:
-            print(f"[Dance LLM] ✗ JSON parse error: {e}")
+            log.warning(f"[Dance LLM] ✗ JSON parse error: {e}, falling back to default dance")
             if 'response_content' in locals():
-                print(f"\n[Dance LLM] {'='*60}")
-                print(f"[Dance LLM] 📄 FULL RESPONSE FROM AI:")
-                print(f"[Dance LLM] {'='*60}")
-                print(response_content)
-                print(f"[Dance LLM] {'='*60}\n")
-            print(f"[Dance LLM] Falling back to default dance")
+                log.debug("[Dance LLM] Full response:\n%s", response_content)
             return self._get_fallback_dance()
         except Exception as e:
-            print(f"[Dance LLM] ✗ Generation failed: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"[Dance LLM] Falling back to default dance")
+            log.exception(f"[Dance LLM] ✗ Generation failed: {type(e).__name__}: {e}, falling back to default dance")
             return self._get_fallback_dance()
     
+    @staticmethod
+    def _describe_keyframes(keyframes: List[Dict[str, Any]]) -> str:
+        """One line per keyframe (time, pose or key angles, easing), for debug logs."""
+        lines = []
+        for i, kf in enumerate(keyframes):
+            pose_desc = kf["pose"]
+            easing = kf.get("easing", "cubic")
+            
+            if isinstance(pose_desc, dict):
+                # Custom angles - show key movements
+                angles = []
+                if "lShoulder" in pose_desc or "rShoulder" in pose_desc:
+                    angles.append(f"arms: L{pose_desc.get('lShoulder', 0)}° R{pose_desc.get('rShoulder', 0)}°")
+                if "lHip" in pose_desc or "rHip" in pose_desc:
+                    angles.append(f"legs: L{pose_desc.get('lHip', 0)}° R{pose_desc.get('rHip', 0)}°")
+                if "waist" in pose_desc:
+                    angles.append(f"waist: {pose_desc.get('waist')}°")
+                if "jumpOffset" in pose_desc and pose_desc["jumpOffset"] != 0:
+                    angles.append(f"jump: {pose_desc['jumpOffset']}")
+                if "torsoScaleY" in pose_desc:
+                    angles.append(f"squash/stretch: {pose_desc['torsoScaleY']}x")
+                if "footTargetY" in pose_desc:
+                    angles.append(f"footIK: {pose_desc['footTargetY']}")
+                
+                pose_str = "Custom (" + ", ".join(angles) + ")" if angles else "Custom pose"
+            else:
+                pose_str = pose_desc
+            lines.append(f"{i+1:2d}. {kf['time']:5.1f}s → {pose_str:<50s} [{easing}]")
+        return "\n".join(lines)
+
     def _get_fallback_dance(self) -> Dict[str, Any]:
         """Fallback dance plan when LLM fails."""
-        print("[Dance LLM] ⚠ Using fallback dance plan (7 keyframes, 12s)")
+        log.warning("[Dance LLM] ⚠ Using fallback dance plan (7 keyframes, 12s)")
         return {
             "duration": 12.0,
             "keyframes": [
@@ -914,10 +1274,3 @@ Return ONLY valid JSON (no markdown, no explanation):
                 {"time": 12.0, "pose": "IDLE"}
             ]
         }
-    
-    def _cleanup_dance_state(self, conn_id: int) -> None:
-        """Clean up dance recording state."""
-        self.dance_recording.pop(conn_id, None)
-        self.dance_buffers.pop(conn_id, None)
-        self.dance_start_time.pop(conn_id, None)
-        self.dance_cooldown.pop(conn_id, None)
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import numpy as np
+import config
+
+
+@dataclass
+class AudioJob:
+    """A window or utterance of live audio waiting to be processed."""
+    # Coroutine function called as process(audio, connection state, window_start, deadline)
+    process: Callable[[np.ndarray, Any, float, Optional[float]], Awaitable[List[Any]]]
+    audio: np.ndarray
+    window_start: float
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class AudioJobQueue:
+    """
+    Bounded queue joining a connection's reader task to its processing task.
+
+    The reader never waits: when the queue is full the oldest job is dropped
+    to make room. Jobs that have waited longer than `max_age` seconds are
+    dropped when dequeued instead of being processed, so a slow model never
+    turns into commands that arrive seconds late.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = config.PROCESSING_QUEUE_SIZE,
+        max_age: float = config.PROCESSING_MAX_AUDIO_AGE_SECONDS
+    ):
+        self.maxsize = max(1, maxsize)
+        self.max_age = max_age
+        self._jobs: Deque[AudioJob] = deque()
+        self._ready = asyncio.Event()
+
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped_full = 0
+        self.dropped_stale = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def put(self, job: AudioJob) -> None:
+        """Add a job, dropping the oldest one if the queue is full."""
+        if len(self._jobs) >= self.maxsize:
+            self._jobs.popleft()
+            self.dropped_full += 1
+        self._jobs.append(job)
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self._jobs))
+        self._ready.set()
+
+    async def get(self) -> AudioJob:
+        """Wait for the next job that is still fresh enough to process."""
+        while True:
+            while not self._jobs:
+                self._ready.clear()
+                await self._ready.wait()
+            job = self._jobs.popleft()
+            if time.monotonic() - job.enqueued_at > self.max_age:
+                self.dropped_stale += 1
+                continue
+            self.processed += 1
+            return job
+
+    def clear(self) -> None:
+        """Discard pending jobs (e.g. when listening restarts)."""
+        self._jobs.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Current depth and lifetime counters."""
+        return {
+            "depth": len(self._jobs),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped_full": self.dropped_full,
+            "dropped_stale": self.dropped_stale
+        }
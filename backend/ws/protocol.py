@@ -0,0 +1,96 @@
+import struct
+from typing import Any, Dict, List, Optional, Sequence
+import config
+
+# Result encodings a client can pick in start_listening ("result_format")
+RESULT_FORMATS = ("json", "binary")
+
+# Binary command batch, little-endian:
+#   header  uint8 message type (1), uint8 version (1), uint16 record count
+#   record  float64 timestamp (Unix seconds), int8 player (-1 = unassigned),
+#           uint8 command id (index into the command table, 255 = none),
+#           float32 speaker confidence, command confidence, volume, speech duration,
+#           then uint8 length + UTF-8 speaker name, uint8 length + UTF-8 raw text
+COMMAND_BATCH = 1
+PROTOCOL_VERSION = 1
+NO_PLAYER = -1
+MAX_PLAYER = 127  # Largest player number the int8 field can carry
+NO_COMMAND = 255
+
+# Sent to binary clients in listening_started, so command ids can be decoded
+COMMAND_TABLE: List[str] = list(config.VALID_COMMANDS)
+_COMMAND_IDS = {command: index for index, command in enumerate(COMMAND_TABLE)}
+
+_HEADER = struct.Struct("<BBH")
+_RECORD = struct.Struct("<dbBffff")
+
+
+def _short_utf8(text: Optional[str]) -> bytes:
+    """UTF-8 bytes of text, cut to 255 bytes on a character boundary."""
+    encoded = (text or "").encode("utf-8")
+    if len(encoded) > 255:
+        encoded = encoded[:255].decode("utf-8", "ignore").encode("utf-8")
+    return encoded
+
+
+def _player_field(player: Any) -> int:
+    """The int8 player field for an assignment; anything it can't carry is NO_PLAYER."""
+    if isinstance(player, int) and not isinstance(player, bool) and 0 <= player <= MAX_PLAYER:
+        return player
+    return NO_PLAYER
+
+
+def encode_command_batch(results: Sequence[Any], players: Sequence[Optional[int]]) -> bytes:
+    """Encode CommandResults (and their players) as one binary frame."""
+    parts = [_HEADER.pack(COMMAND_BATCH, PROTOCOL_VERSION, len(results))]
+    for result, player in zip(results, players):
+        speaker = _short_utf8(result.speaker)
+        raw_text = _short_utf8(result.raw_text)
+        parts.append(_RECORD.pack(
+            result.timestamp,
+            _player_field(player),
+            _COMMAND_IDS.get(result.command, NO_COMMAND),
+            result.speaker_confidence,
+            result.command_confidence,
+            result.volume,
+            result.speech_duration
+        ))
+        parts.append(bytes((len(speaker),)))
+        parts.append(speaker)
+        parts.append(bytes((len(raw_text),)))
+        parts.append(raw_text)
+    return b"".join(parts)
+
+
+def decode_command_batch(frame: bytes) -> List[Dict[str, Any]]:
+    """Decode a binary command batch into dicts shaped like the JSON "command" messages
+    (timestamps stay Unix seconds)."""
+    view = memoryview(frame)
+    kind, version, count = _HEADER.unpack_from(view, 0)
+    if kind != COMMAND_BATCH or version != PROTOCOL_VERSION:
+        raise ValueError(f"Not a version {PROTOCOL_VERSION} command batch (type {kind}, version {version})")
+
+    offset = _HEADER.size
+    commands = []
+    for _ in range(count):
+        timestamp, player, command_id, speaker_conf, command_conf, volume, duration = _RECORD.unpack_from(view, offset)
+        offset += _RECORD.size
+        length = view[offset]
+        speaker = bytes(view[offset + 1:offset + 1 + length]).decode("utf-8")
+        offset += 1 + length
+        length = view[offset]
+        raw_text = bytes(view[offset + 1:offset + 1 + length]).decode("utf-8")
+        offset += 1 + length
+        commands.append({
+            "type": "command",
+            "player": None if player == NO_PLAYER else player,
+            "timestamp": timestamp,
+            "speaker": speaker,
+            "speaker_confidence": speaker_conf,
+            "command": None if command_id == NO_COMMAND else COMMAND_TABLE[command_id],
+            "raw_text": raw_text or None,
+            "command_confidence": command_conf,
+            "volume": volume,
+            "speech_duration": duration
+        })
+    return commands
@@ -101,6 +101,7 @@ class WebSocketClient {
 
     // Convenience methods for specific messages
     startListening() {
+        // No game declared: dance descriptions need open-vocabulary decoding
         this.sendMessage({ type: 'start_listening' });
     }
 
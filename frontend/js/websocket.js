@@ -11,6 +11,9 @@ class WebSocketClient {
         this.maxReconnectAttempts = 5;
         this.reconnectDelay = 2000;
 
+        // Command names for binary results, sent in listening_started
+        this.commandTable = [];
+
         // Event handlers
         this.onConnect = null;
         this.onDisconnect = null;
@@ -58,10 +61,21 @@ class WebSocketClient {
                 if (typeof event.data === 'string') {
                     try {
                         const message = JSON.parse(event.data);
+                        if (message.type === 'listening_started' && message.command_table) {
+                            this.commandTable = message.command_table;
+                        }
                         if (this.onMessage) this.onMessage(message);
                     } catch (e) {
                         console.error('Failed to parse message:', e);
                     }
+                } else {
+                    try {
+                        for (const message of this._decodeCommandBatch(event.data)) {
+                            if (this.onMessage) this.onMessage(message);
+                        }
+                    } catch (e) {
+                        console.error('Failed to decode binary message:', e);
+                    }
                 }
             };
 
@@ -92,9 +106,49 @@ class WebSocketClient {
         }
     }
 
+    /**
+     * Decode a binary command batch (see backend/ws/protocol.py) into
+     * messages shaped like the JSON "command" messages.
+     */
+    _decodeCommandBatch(buffer) {
+        const view = new DataView(buffer);
+        const decoder = new TextDecoder();
+        const count = view.getUint16(2, true);
+        const messages = [];
+        let offset = 4;
+        const readText = () => {
+            const length = view.getUint8(offset);
+            const text = decoder.decode(new Uint8Array(buffer, offset + 1, length));
+            offset += 1 + length;
+            return text;
+        };
+        for (let i = 0; i < count; i++) {
+            const player = view.getInt8(offset + 8);
+            const commandId = view.getUint8(offset + 9);
+            const message = {
+                type: 'command',
+                timestamp: new Date(view.getFloat64(offset, true) * 1000).toISOString(),
+                player: player === -1 ? null : player,
+                command: commandId === 255 ? null : this.commandTable[commandId],
+                speaker_confidence: view.getFloat32(offset + 10, true),
+                command_confidence: view.getFloat32(offset + 14, true),
+                volume: view.getFloat32(offset + 18, true),
+                speech_duration: view.getFloat32(offset + 22, true)
+            };
+            offset += 26;
+            message.speaker = readText();
+            message.raw_text = readText() || null;
+            messages.push(message);
+        }
+        return messages;
+    }
+
     // Convenience methods for specific messages
-    startListening() {
-        this.sendMessage({ type: 'start_listening' });
+    startListening(options = {}) {
+        // options.resultFormat: 'binary' for batched binary command frames
+        const message = { type: 'start_listening' };
+        if (options.resultFormat) message.result_format = options.resultFormat;
+        this.sendMessage(message);
     }
 
     stopListening() {
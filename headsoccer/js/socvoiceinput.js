@@ -154,7 +154,8 @@ class SoccerVoiceInput {
 
     this.socket.onopen = () => {
       console.log('[SoccerVoice] connected');
-      this.socket.send(JSON.stringify({ type: 'start_listening' }));
+      // Declaring the game restricts decoding to the head soccer commands
+      this.socket.send(JSON.stringify({ type: 'start_listening', game: 'headsoccer' }));
       this.updateStatus('connected');
     };
 